@@ -11,7 +11,7 @@ from werkzeug.wrappers.response import Response as WerkzeugResponse
 
 from ctm_ai.chunks import Chunk, ChunkManager
 from ctm_ai.ctms.ctm import ConsciousTuringMachine
-from ctm_ai.utils import extract_audio_from_video, extract_video_frames
+from ctm_ai.utils import extract_audio_from_video, extract_video_frames, get_metrics
 
 ResponseType = Union[FlaskResponse, WerkzeugResponse]
 
@@ -614,6 +614,14 @@ class FlaskAppWrapper:
             except FileNotFoundError:
                 return jsonify({'error': 'File not found'}), 404
 
+        @self.app.route('/metrics')
+        def metrics() -> ResponseType:
+            """Prometheus scrape endpoint for LLM call metrics."""
+            return FlaskResponse(
+                get_metrics().to_prometheus(),
+                mimetype='text/plain; version=0.0.4',
+            )
+
         @self.app.route('/assets/<path:filename>')
         def serve_assets(filename: str) -> ResponseType:
             project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
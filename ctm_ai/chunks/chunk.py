@@ -18,6 +18,7 @@ class Chunk:
         mood: float = -1.0,
         additional_questions: List[str] = None,
         executor_content: str = '',
+        model: str = '',
     ) -> None:
         self.time_step: int = time_step
         self.processor_name: str = processor_name
@@ -30,6 +31,9 @@ class Chunk:
         self.mood: float = mood
         self.additional_questions: List[str] = additional_questions or []
         self.executor_content: str = executor_content
+        # Model that produced the gist (differs from the processor's model
+        # when its fallback served the call).
+        self.model: str = model
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Chunk):
@@ -73,6 +77,7 @@ class Chunk:
             'intensity': self.intensity,
             'mood': self.mood,
             'additional_questions': self.additional_questions,
+            'model': self.model,
         }
 
     def format_readable(self) -> str:
@@ -112,4 +117,5 @@ class Chunk:
             intensity=data['intensity'],
             mood=data['mood'],
             additional_questions=additional_questions,
+            model=data.get('model', ''),
         )
@@ -56,6 +56,27 @@ Analysis:
         fuse_history_header: Optional[str] = None,
         winner_answer_header: Optional[str] = None,
         link_form_threshold: Optional[float] = None,
+        fuse_batch_questions: Optional[bool] = None,
+        completion_cache_dir: Optional[str] = None,
+        completion_cache_max_mb: float = 1024.0,
+        completion_cache_read_only: bool = False,
+        rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+        adaptive_concurrency: Optional[Dict[str, Any]] = None,
+        singleflight: bool = False,
+        stream_completions: bool = False,
+        hedging: Optional[Dict[str, Any]] = None,
+        timeout_s: Optional[float] = None,
+        batch_mode: Optional[Dict[str, Any]] = None,
+        context_cache: Optional[Dict[str, Any]] = None,
+        media_uploads: Optional[Dict[str, Any]] = None,
+        circuit_breaker: Optional[Dict[str, Any]] = None,
+        llm_backend: Optional[Any] = None,
+        cassette: Optional[Dict[str, Any]] = None,
+        media_cache: Optional[Dict[str, Any]] = None,
+        transcode_cache: Optional[Dict[str, Any]] = None,
+        media_pack: Optional[str] = None,
+        executor: Optional[Any] = None,
+        executor_quota: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         self.ctm_name: Optional[str] = ctm_name
@@ -96,6 +117,76 @@ Analysis:
         # Optional override for ConsciousTuringMachine.LINK_FORM_THRESHOLD.
         # When None, CTM falls back to its class-level default (0.8).
         self.link_form_threshold: Optional[float] = link_form_threshold
+        # Optional override for ConsciousTuringMachine.FUSE_BATCH_QUESTIONS
+        # (merge follow-up questions sent to the same neighbor; default True).
+        self.fuse_batch_questions: Optional[bool] = fuse_batch_questions
+        # Opt-in on-disk cache of processor / parse completions. When
+        # ``completion_cache_read_only`` is set the cache is only replayed,
+        # never written.
+        self.completion_cache_dir: Optional[str] = completion_cache_dir
+        self.completion_cache_max_mb: float = completion_cache_max_mb
+        self.completion_cache_read_only: bool = completion_cache_read_only
+        # Process-wide RPM / TPM quotas keyed by provider ("gemini") or model
+        # ("gemini/gemini-2.5-flash-lite"), e.g. {"gemini": {"rpm": 1000,
+        # "tpm": 4000000}}. Unlisted providers are not throttled.
+        self.rate_limits: Optional[Dict[str, Dict[str, float]]] = rate_limits
+        # AIMD in-flight request window per provider; {} enables it with the
+        # controller defaults, e.g. {"initial": 8, "max_limit": 64}.
+        self.adaptive_concurrency: Optional[Dict[str, Any]] = adaptive_concurrency
+        # Share one provider call between identical requests in flight at the
+        # same time (process-wide).
+        self.singleflight: bool = singleflight
+        # Stream processor completions and stop once the current phase's JSON
+        # fields are complete. A processor entry may override it with "stream".
+        self.stream_completions: bool = stream_completions
+        # Duplicate processor calls slower than the model's observed latency
+        # percentile, e.g. {"percentile": 0.95, "budget": 0.1}; budget caps
+        # duplicates as a fraction of all requests.
+        self.hedging: Optional[Dict[str, Any]] = hedging
+        # Default wall-clock budget for one forward pass; when it runs out the
+        # best answer so far is parsed and returned. None means no limit.
+        self.timeout_s: Optional[float] = timeout_s
+        # Send processor and parse calls through provider batch jobs, e.g.
+        # {"api_base": ..., "poll_interval_s": 60}; see BatchCollector.
+        self.batch_mode: Optional[Dict[str, Any]] = batch_mode
+        # Register media processors' system prompt + media prefix with the
+        # provider's context cache once per forward pass, e.g. {"ttl_s": 600}.
+        # A processor entry may override it with "context_cache".
+        self.context_cache: Optional[Dict[str, Any]] = context_cache
+        # Upload video / audio files once through the provider's file API and
+        # send their URI instead of inline base64, e.g. {"index_path": ...};
+        # see MediaUploadRegistry.
+        self.media_uploads: Optional[Dict[str, Any]] = media_uploads
+        # Per-model circuit breakers, e.g. {"failure_threshold": 5,
+        # "cooldown_s": 30}; while a model's circuit is open its processors
+        # call their "fallback_model" from processors_config instead.
+        self.circuit_breaker: Optional[Dict[str, Any]] = circuit_breaker
+        # Client every LLM call goes through: "litellm" (default), "mock" for
+        # offline runs, a dict such as {"type": "litellm", "api_base": ...} for
+        # a local model server, or an LLMBackend instance.
+        self.llm_backend: Optional[Any] = llm_backend
+        # Record every LLM and tool call of each forward pass to a cassette
+        # file, or replay one offline, e.g. {"path": "run.json.gz", "mode":
+        # "replay", "latency_scale": 0}; see Cassette.
+        self.cassette: Optional[Dict[str, Any]] = cassette
+        # In-memory cache of encoded media shared by all processors; by
+        # default 512MB and emptied after each forward pass. {"scope":
+        # "process", "max_mb": 2048} keeps entries across forwards (LRU).
+        self.media_cache: Optional[Dict[str, Any]] = media_cache
+        # On-disk cache of ffmpeg transcodes (Qwen audio-as-video), keyed by
+        # file content, e.g. {"cache_dir": "~/.cache/ctm", "max_mb": 4096}.
+        # Also enabled by the CTM_TRANSCODE_CACHE_DIR environment variable.
+        self.transcode_cache: Optional[Dict[str, Any]] = transcode_cache
+        # Pack file of pre-encoded dataset media (exp_affective/pack_media.py);
+        # processors read payloads found in it instead of the source files.
+        self.media_pack: Optional[str] = media_pack
+        # Thread pool shared by all CTMs in the process for their parallel
+        # processor calls, e.g. {"max_workers": 64} (default 32), or an
+        # Executor instance to run them on; see SharedExecutor.
+        self.executor: Optional[Any] = executor
+        # Most calls this CTM keeps in the shared pool at once; the rest wait
+        # their turn so one instance cannot hold every worker.
+        self.executor_quota: Optional[int] = executor_quota
         for key, value in kwargs.items():
             setattr(self, key, value)
 
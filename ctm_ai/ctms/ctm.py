@@ -1,7 +1,7 @@
-import concurrent.futures
 import json
 import os
-from typing import Any, List, Optional, Tuple
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from numpy.typing import NDArray
@@ -9,9 +9,51 @@ from numpy.typing import NDArray
 from ..chunks import Chunk
 from ..configs import ConsciousTuringMachineConfig
 from ..graphs import ProcessorGraph
-from ..utils import logger, logging_func_with_count
+from ..processors.processor_base import new_usage_stats
+from ..utils import (
+    Deadline,
+    get_cassette,
+    get_media_cache,
+    logger,
+    logging_func_with_count,
+    resolve_deadline,
+    wrap_tool_env,
+)
 from .ctm_base import BaseConsciousTuringMachine
 
+# A fuse call: the neighbor asked, its query, and the ``(asking_processor,
+# questions)`` it answers for (several when their questions were merged).
+FuseCall = Tuple[Any, str, List[Tuple[str, str]]]
+
+FUSE_QUESTIONS_HEADER = 'Please answer the following questions:\n'
+FUSE_PARTS_HEADER = (
+    'Please answer the following questions. They are grouped into parts; '
+    'answer every part and start the answer to each part with its label '
+    '(e.g. "[Part 1]").\n'
+)
+_FUSE_PART_LABEL = re.compile(r'\[Part (\d+)\]')
+
+
+def _fuse_call_name(call: FuseCall) -> str:
+    nbr_proc, _, askers = call
+    return f'{nbr_proc.name}->{",".join(c_name for c_name, _ in askers)}'
+
+
+def merge_fuse_questions(queries: List[str]) -> str:
+    """One multi-part query from several ``FUSE_QUESTIONS_HEADER`` queries."""
+    merged = FUSE_PARTS_HEADER
+    for i, query in enumerate(queries, 1):
+        merged += f'[Part {i}]\n{query[len(FUSE_QUESTIONS_HEADER) :]}'
+    return merged
+
+
+def split_fuse_answer(answer: str, parts: int) -> Optional[List[str]]:
+    """Per-part answers of a merged fuse call, or None if a part is missing."""
+    pieces = _FUSE_PART_LABEL.split(answer)
+    found = {int(n): text.strip() for n, text in zip(pieces[1::2], pieces[2::2])}
+    answers = [found.get(i) for i in range(1, parts + 1)]
+    return answers if all(answers) else None
+
 
 class ConsciousTuringMachine(BaseConsciousTuringMachine):
     """Conscious Turing Machine.
@@ -23,6 +65,8 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         num_additional_questions: Override the config value if given.
         detailed_log_dir: Directory where per-instance trajectories are saved
             (defaults to ``detailed_info/``).
+        callbacks: Handlers (e.g. ``ServerEventCallback``) whose
+            ``on_llm_new_token`` receives streamed processor tokens.
     """
 
     # Default link formation relevance threshold.
@@ -33,6 +77,10 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
     # Default False — matches the efficient behavior of skipping the winner.
     LINK_FORM_ASK_SELF: bool = False
 
+    # Whether the follow-up questions of several non-winners linked to the
+    # same neighbor are sent to it as one multi-part fuse call.
+    FUSE_BATCH_QUESTIONS: bool = True
+
     def __init__(
         self,
         ctm_name: Optional[str] = None,
@@ -40,8 +88,10 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         num_additional_questions: Optional[int] = None,
         *,
         detailed_log_dir: Optional[str] = None,
+        callbacks: Optional[List[Any]] = None,
     ) -> None:
         self.api_manager = api_manager
+        self.callbacks = callbacks or []
         self.config = (
             ConsciousTuringMachineConfig.from_ctm(ctm_name)
             if ctm_name
@@ -60,6 +110,8 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
             'prompt_tokens': 0,
             'completion_tokens': 0,
             'total_tokens': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
         }
 
         # Per-instance override of the class-level link_form relevance
@@ -68,6 +120,9 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         cfg_lft = getattr(self.config, 'link_form_threshold', None)
         if cfg_lft is not None:
             self.LINK_FORM_THRESHOLD = float(cfg_lft)
+        cfg_fbq = getattr(self.config, 'fuse_batch_questions', None)
+        if cfg_fbq is not None:
+            self.FUSE_BATCH_QUESTIONS = bool(cfg_fbq)
 
         self.load_ctm()
 
@@ -83,6 +138,8 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         video_frames_path: Optional[List[str]] = None,
         video_path: Optional[str] = None,
         instance_id: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
+        timeout_s: Optional[float] = None,
     ) -> Tuple[str, float, str]:
         return self.forward(
             query=query,
@@ -96,6 +153,8 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
             video_path=video_path,
             api_manager=self.api_manager,
             instance_id=instance_id,
+            deadline=deadline,
+            timeout_s=timeout_s,
         )
 
     # ------------------------------------------------------------------
@@ -106,6 +165,7 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         """Load processors – from config or dynamically from api_manager."""
         if self.api_manager:
             self.processor_graph = ProcessorGraph()
+            self._apply_provider_limits()
             self._load_tool_processors()
         else:
             super().load_ctm()
@@ -122,9 +182,12 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
                 processor_name=func_name,
                 processor_group_name='tool',
                 model=getattr(self.config, 'model', 'gemini/gemini-2.0-flash-lite'),
-                api_manager=self.api_manager,
+                api_manager=wrap_tool_env(self.api_manager),
                 num_additional_questions=self.config.num_additional_questions,
                 score_weights=self.config.score_weights,
+                completion_cache=self.completion_cache,
+                stream=getattr(self.config, 'stream_completions', False),
+                callbacks=self.callbacks,
             )
 
     # ------------------------------------------------------------------
@@ -133,12 +196,7 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
 
     def get_usage_stats(self):
         """Aggregate usage stats across processors (excludes parse step)."""
-        total = {
-            'prompt_tokens': 0,
-            'completion_tokens': 0,
-            'total_tokens': 0,
-            'api_calls': 0,
-        }
+        total = new_usage_stats()
         for proc in self.processor_graph.nodes:
             for k in total:
                 total[k] += proc._usage_stats.get(k, 0)
@@ -151,16 +209,13 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
     def reset_usage_stats(self):
         """Reset all usage counters – call before each forward pass."""
         for proc in self.processor_graph.nodes:
-            proc._usage_stats = {
-                'prompt_tokens': 0,
-                'completion_tokens': 0,
-                'total_tokens': 0,
-                'api_calls': 0,
-            }
+            proc.reset_usage_stats()
         self._parse_usage = {
             'prompt_tokens': 0,
             'completion_tokens': 0,
             'total_tokens': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
         }
 
     # ------------------------------------------------------------------
@@ -173,39 +228,80 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
     def link_form(
         self, chunks: List[Chunk], winning_chunk: Chunk, **input_kwargs: Any
     ) -> None:
-        form_t = self.LINK_FORM_THRESHOLD
+        request = self._prepare_link_form(winning_chunk)
+        if request is None:
+            return
+        combined_query, procs_to_ask = request
+
+        futures = [
+            self.executor.submit(
+                lambda p: p.ask(
+                    query=combined_query, phase='link_form', **input_kwargs
+                ),
+                proc,
+            )
+            for proc in procs_to_ask
+        ]
+        question_chunks = self._results_before_deadline(
+            futures,
+            [p.name for p in procs_to_ask],
+            input_kwargs.get('deadline'),
+            'link_form',
+        )
+        self._apply_link_form(question_chunks, winning_chunk, combined_query)
 
+    async def alink_form(
+        self, chunks: List[Chunk], winning_chunk: Chunk, **input_kwargs: Any
+    ) -> None:
+        """Async counterpart of :meth:`link_form`."""
+        request = self._prepare_link_form(winning_chunk)
+        if request is None:
+            return
+        combined_query, procs_to_ask = request
+
+        question_chunks = await self._agather_before_deadline(
+            [
+                proc.aask(query=combined_query, phase='link_form', **input_kwargs)
+                for proc in procs_to_ask
+            ],
+            [p.name for p in procs_to_ask],
+            input_kwargs.get('deadline'),
+            'link_form',
+        )
+        self._apply_link_form(question_chunks, winning_chunk, combined_query)
+
+    def _prepare_link_form(
+        self, winning_chunk: Chunk
+    ) -> Optional[Tuple[str, List[Any]]]:
+        """Return ``(combined_query, processors_to_ask)`` or None if no questions."""
         additional_questions = winning_chunk.additional_questions or []
         valid_questions = [q for q in additional_questions if q]
         if not valid_questions:
-            return
+            return None
 
         combined_query = 'Please answer the following questions:\n'
         for i, q in enumerate(valid_questions, 1):
             combined_query += f'{i}. {q}\n'
 
-        proc_map = {p.name: p for p in self.processor_graph.nodes}
         w_name = winning_chunk.processor_name
-        ask_self = self.LINK_FORM_ASK_SELF
         procs_to_ask = (
             list(self.processor_graph.nodes)
-            if ask_self
+            if self.LINK_FORM_ASK_SELF
             else [p for p in self.processor_graph.nodes if p.name != w_name]
         )
+        return combined_query, procs_to_ask
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(
-                    lambda p: p.ask(
-                        query=combined_query, phase='link_form', **input_kwargs
-                    ),
-                    proc,
-                )
-                for proc in procs_to_ask
-            ]
-            question_chunks = [
-                f.result() for f in concurrent.futures.as_completed(futures)
-            ]
+    def _apply_link_form(
+        self,
+        question_chunks: List[Optional[Chunk]],
+        winning_chunk: Chunk,
+        combined_query: str,
+    ) -> None:
+        """Add links for relevant answers and cache them into the winner's history."""
+        form_t = self.LINK_FORM_THRESHOLD
+        proc_map = {p.name: p for p in self.processor_graph.nodes}
+        w_name = winning_chunk.processor_name
+        ask_self = self.LINK_FORM_ASK_SELF
         question_chunks = [c for c in question_chunks if c is not None]
 
         if self.detailed_log is not None:
@@ -213,6 +309,7 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
             for chunk in question_chunks:
                 link_info = {
                     'processor_name': chunk.processor_name,
+                    'model': chunk.model,
                     'query': chunk.executor_content or combined_query,
                     'answer': chunk.gist,
                     'relevance': chunk.relevance,
@@ -264,9 +361,10 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
                     )
 
     # ------------------------------------------------------------------
-    # fuse_processor: only the winning processor answers the linked
-    # non-winners' questions. (link_form already cached the reverse
-    # direction.)
+    # fuse_processor: linked neighbors answer the non-winners' follow-up
+    # questions, all calls in parallel; questions for the same neighbor are
+    # merged into one multi-part call. (link_form already cached the
+    # winner's direction.)
     # ------------------------------------------------------------------
 
     @logging_func_with_count
@@ -277,11 +375,55 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         winning_chunk: Chunk = None,
         **input_kwargs: Any,
     ) -> None:
+        calls = self._fuse_calls(self._fuse_requests(chunks, winning_chunk))
+        futures = [
+            self.executor.submit(
+                lambda p, q: p.ask(query=q, phase='fuse', **input_kwargs),
+                nbr_proc,
+                fuse_query,
+            )
+            for nbr_proc, fuse_query, _ in calls
+        ]
+        answer_chunks = self._results_before_deadline(
+            futures,
+            [_fuse_call_name(call) for call in calls],
+            input_kwargs.get('deadline'),
+            'fuse',
+        )
+        for call, answer_chunk in zip(calls, answer_chunks):
+            self._record_fuse_call(call, answer_chunk)
+
+    async def afuse_processor(
+        self,
+        chunks: List[Chunk],
+        query: str,
+        winning_chunk: Chunk = None,
+        **input_kwargs: Any,
+    ) -> None:
+        """Async counterpart of :meth:`fuse_processor`; all fuse calls run concurrently."""
+        calls = self._fuse_calls(self._fuse_requests(chunks, winning_chunk))
+        answer_chunks = await self._agather_before_deadline(
+            [
+                nbr_proc.aask(query=fuse_query, phase='fuse', **input_kwargs)
+                for nbr_proc, fuse_query, _ in calls
+            ],
+            [_fuse_call_name(call) for call in calls],
+            input_kwargs.get('deadline'),
+            'fuse',
+        )
+        for call, answer_chunk in zip(calls, answer_chunks):
+            self._record_fuse_call(call, answer_chunk)
+
+    def _fuse_requests(
+        self, chunks: List[Chunk], winning_chunk: Optional[Chunk]
+    ) -> List[Tuple[str, Any, str]]:
+        """List the ``(asking_processor, neighbor_processor, query)`` fuse calls."""
         if winning_chunk is None:
-            return
+            return []
 
         proc_map = {p.name: p for p in self.processor_graph.nodes}
         w_name = winning_chunk.processor_name
+        requests: List[Tuple[str, Any, str]] = []
 
         # Iterate non-winner chunks; for each, ask ALL of its linked neighbors
         # (winner AND other linked non-winners) to answer its follow-up
@@ -303,7 +445,7 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
             if not valid_questions:
                 continue
 
-            combined_query = 'Please answer the following questions:\n'
+            combined_query = FUSE_QUESTIONS_HEADER
             for i, q in enumerate(valid_questions, 1):
                 combined_query += f'{i}. {q}\n'
 
@@ -313,27 +455,71 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
                 nbr_proc = proc_map.get(nbr)
                 if nbr_proc is None:
                     continue
-
-                answer_chunk = nbr_proc.ask(
-                    query=combined_query, phase='fuse', **input_kwargs
+                requests.append((c_name, nbr_proc, combined_query))
+        return requests
+
+    def _fuse_calls(self, requests: List[Tuple[str, Any, str]]) -> List[FuseCall]:
+        """Group fuse requests into calls, merging those sent to one neighbor."""
+        grouped: Dict[str, Tuple[Any, List[Tuple[str, str]]]] = {}
+        for c_name, nbr_proc, combined_query in requests:
+            grouped.setdefault(nbr_proc.name, (nbr_proc, []))[1].append(
+                (c_name, combined_query)
+            )
+        calls: List[FuseCall] = []
+        for nbr_proc, askers in grouped.values():
+            if len(askers) > 1 and self.FUSE_BATCH_QUESTIONS:
+                merged = merge_fuse_questions([q for _, q in askers])
+                calls.append((nbr_proc, merged, askers))
+            else:
+                calls.extend((nbr_proc, q, [(c_name, q)]) for c_name, q in askers)
+        return calls
+
+    def _record_fuse_call(self, call: FuseCall, answer_chunk: Optional[Chunk]) -> None:
+        if answer_chunk is None:
+            return
+        nbr_proc, _, askers = call
+        answers = None
+        if len(askers) > 1:
+            answers = split_fuse_answer(answer_chunk.gist, len(askers))
+            if answers is None:
+                logger.warning(
+                    f'{nbr_proc.name}: could not split merged fuse answer; '
+                    f'giving all of it to {[c_name for c_name, _ in askers]}'
                 )
-                if answer_chunk is None:
-                    continue
+        for i, (c_name, combined_query) in enumerate(askers):
+            answer = answers[i] if answers else answer_chunk.gist
+            self._record_fuse_answer(
+                c_name, nbr_proc.name, combined_query, answer_chunk, answer
+            )
 
-                proc_map[c_name].add_fuse_history(
-                    combined_query, answer_chunk.gist, nbr
-                )
+    def _record_fuse_answer(
+        self,
+        c_name: str,
+        nbr: str,
+        combined_query: str,
+        answer_chunk: Optional[Chunk],
+        answer: Optional[str] = None,
+    ) -> None:
+        if answer_chunk is None:
+            return
+        if answer is None:
+            answer = answer_chunk.gist
 
-                if self.detailed_log is not None:
-                    current_iteration = self.detailed_log['current_iteration']
-                    current_iteration['fuse_phase'].append(
-                        {
-                            'from_processor': c_name,
-                            'to_processor': nbr,
-                            'query': answer_chunk.executor_content or combined_query,
-                            'answer': answer_chunk.gist,
-                        }
-                    )
+        self.processor_graph.get_node(c_name).add_fuse_history(
+            combined_query, answer, nbr
+        )
+
+        if self.detailed_log is not None:
+            current_iteration = self.detailed_log['current_iteration']
+            current_iteration['fuse_phase'].append(
+                {
+                    'from_processor': c_name,
+                    'to_processor': nbr,
+                    'model': answer_chunk.model,
+                    'query': answer_chunk.executor_content or combined_query,
+                    'answer': answer,
+                }
+            )
 
     # ------------------------------------------------------------------
     # go_down: broadcast + link_form
@@ -347,6 +533,13 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         self.downtree_broadcast(winning_chunk)
         self.link_form(chunks, winning_chunk, **input_kwargs)
 
+    async def ago_down(
+        self, winning_chunk: Chunk, chunks: List[Chunk], **input_kwargs: Any
+    ) -> None:
+        logger.info(f'Going down with winning chunk: {winning_chunk.processor_name}')
+        self.downtree_broadcast(winning_chunk)
+        await self.alink_form(chunks, winning_chunk, **input_kwargs)
+
     # ------------------------------------------------------------------
     # Forward
     # ------------------------------------------------------------------
@@ -365,28 +558,200 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         api_manager: Any = None,
         instance_id: Optional[str] = None,
         *args: Any,
+        deadline: Union[None, float, Deadline] = None,
+        timeout_s: Optional[float] = None,
         **kwargs: Any,
     ) -> Tuple[str, float, str]:
         """Run the iterative CTM loop.
 
+        ``deadline`` (a :class:`Deadline` or ``time.time()`` timestamp) and
+        ``timeout_s`` (defaulting to ``config.timeout_s``) bound the whole
+        pass. Every processor call gets the remaining budget as its timeout,
+        processors that miss it are dropped from the competition, and once
+        it runs out the current winner is parsed and returned.
+
+        Returns:
+            ``(answer, weight_score, parsed_answer)``
+        """
+        input_params = self._start_forward(
+            query,
+            instance_id,
+            text=text,
+            image=image,
+            image_path=image_path,
+            audio=audio,
+            audio_path=audio_path,
+            video_frames=video_frames,
+            video_frames_path=video_frames_path,
+            video_path=video_path,
+            api_manager=api_manager,
+            deadline=deadline,
+            timeout_s=timeout_s,
+        )
+        try:
+            deadline = input_params.get('deadline')
+            answer = ''
+            weight_score = 0.0
+
+            max_iters = self.config.max_iter_num
+
+            for i in range(max_iters):
+                if i > 0 and self._out_of_time(deadline):
+                    break
+                self._start_iteration(i)
+
+                chunks = self.ask_processors(query, **input_params)
+                if not chunks and self._out_of_time(deadline):
+                    break
+                winning_chunk = self.uptree_competition(chunks)
+                answer, weight_score = self._record_winner(winning_chunk)
+
+                is_final_iter = (
+                    i == max_iters - 1
+                    or weight_score >= self.config.output_threshold
+                    or self._out_of_time(deadline)
+                )
+
+                if is_final_iter:
+                    self._finish_iteration(i, winning_chunk, chunks, final=True)
+                    parsed_answer = self.parse_answer(
+                        answer=answer, query=query, deadline=deadline
+                    )
+                    return self._finish_forward(answer, weight_score, parsed_answer)
+
+                # Downtree + link_form
+                self.go_down(winning_chunk, chunks, **input_params)
+
+                # Fusion
+                self.fuse_processor(
+                    chunks, query, winning_chunk=winning_chunk, **input_params
+                )
+
+                self._finish_iteration(i, winning_chunk, chunks)
+
+            # Reached when the deadline cuts the loop short
+            parsed_answer = self.parse_answer(
+                answer=answer, query=query, deadline=deadline
+            )
+            return self._finish_forward(answer, weight_score, parsed_answer)
+        finally:
+            self._end_forward()
+
+    async def aforward(
+        self,
+        query: str,
+        text: Optional[str] = None,
+        image: Optional[np.uint8] = None,
+        image_path: Optional[str] = None,
+        audio: Optional[NDArray[np.float32]] = None,
+        audio_path: Optional[str] = None,
+        video_frames: Optional[List[NDArray[np.uint8]]] = None,
+        video_frames_path: Optional[List[str]] = None,
+        video_path: Optional[str] = None,
+        api_manager: Any = None,
+        instance_id: Optional[str] = None,
+        *args: Any,
+        deadline: Union[None, float, Deadline] = None,
+        timeout_s: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Tuple[str, float, str]:
+        """Async counterpart of :meth:`forward`.
+
+        Every phase awaits its processor calls together on the running event
+        loop (see :meth:`_agather_before_deadline`, which cancels the calls
+        still pending at the deadline) instead of submitting them to the
+        shared executor, so many CTM instances can share one loop without
+        holding a worker thread per call.
+
         Returns:
             ``(answer, weight_score, parsed_answer)``
         """
+        input_params = self._start_forward(
+            query,
+            instance_id,
+            text=text,
+            image=image,
+            image_path=image_path,
+            audio=audio,
+            audio_path=audio_path,
+            video_frames=video_frames,
+            video_frames_path=video_frames_path,
+            video_path=video_path,
+            api_manager=api_manager,
+            deadline=deadline,
+            timeout_s=timeout_s,
+        )
+        try:
+            deadline = input_params.get('deadline')
+            answer = ''
+            weight_score = 0.0
+
+            max_iters = self.config.max_iter_num
+
+            for i in range(max_iters):
+                if i > 0 and self._out_of_time(deadline):
+                    break
+                self._start_iteration(i)
+
+                chunks = await self.aask_processors(query, **input_params)
+                if not chunks and self._out_of_time(deadline):
+                    break
+                winning_chunk = self.uptree_competition(chunks)
+                answer, weight_score = self._record_winner(winning_chunk)
+
+                is_final_iter = (
+                    i == max_iters - 1
+                    or weight_score >= self.config.output_threshold
+                    or self._out_of_time(deadline)
+                )
+
+                if is_final_iter:
+                    self._finish_iteration(i, winning_chunk, chunks, final=True)
+                    parsed_answer = await self.aparse_answer(
+                        answer=answer, query=query, deadline=deadline
+                    )
+                    return self._finish_forward(answer, weight_score, parsed_answer)
+
+                await self.ago_down(winning_chunk, chunks, **input_params)
+                await self.afuse_processor(
+                    chunks, query, winning_chunk=winning_chunk, **input_params
+                )
+
+                self._finish_iteration(i, winning_chunk, chunks)
+
+            parsed_answer = await self.aparse_answer(
+                answer=answer, query=query, deadline=deadline
+            )
+            return self._finish_forward(answer, weight_score, parsed_answer)
+        finally:
+            self._end_forward()
+
+    # ------------------------------------------------------------------
+    # Forward bookkeeping shared by forward / aforward
+    # ------------------------------------------------------------------
+
+    def _start_forward(
+        self,
+        query: str,
+        instance_id: Optional[str] = None,
+        api_manager: Any = None,
+        deadline: Union[None, float, Deadline] = None,
+        timeout_s: Optional[float] = None,
+        **inputs: Any,
+    ) -> dict:
+        """Reset per-forward state and return the processor input parameters."""
         if api_manager is None:
             api_manager = self.api_manager
+        api_manager = wrap_tool_env(api_manager)
+        if timeout_s is None:
+            timeout_s = getattr(self.config, 'timeout_s', None)
 
-        input_params: dict = {
-            'text': text,
-            'image': image,
-            'image_path': image_path,
-            'audio': audio,
-            'audio_path': audio_path,
-            'video_frames': video_frames,
-            'video_frames_path': video_frames_path,
-            'video_path': video_path,
-        }
+        input_params: dict = dict(inputs)
         if api_manager is not None:
             input_params['api_manager'] = api_manager
+        deadline = resolve_deadline(deadline, timeout_s)
+        if deadline is not None:
+            input_params['deadline'] = deadline
 
         self.detailed_log = {
             'instance_id': instance_id,
@@ -398,115 +763,106 @@ class ConsciousTuringMachine(BaseConsciousTuringMachine):
         self.iteration_history = []
         self._total_links_added = 0
         self.reset_usage_stats()
-        answer = ''
-        weight_score = 0.0
-
-        max_iters = self.config.max_iter_num
-
-        for i in range(max_iters):
-            self._iter_links_added = 0
-
-            self.detailed_log['current_iteration'] = {
-                'iteration': i + 1,
-                'initial_phase': [],
-                'winning_processor': None,
-                'winning_weight': None,
-                'link_form_phase': [],
-                'fuse_phase': [],
-            }
-
-            chunks = self.ask_processors(query, **input_params)
-            winning_chunk = self.uptree_competition(chunks)
-
-            answer = winning_chunk.gist
-            weight_score = winning_chunk.weight
+        self._media_cache = get_media_cache()
+        self._media_forward = self._media_cache.begin_forward()
+        return input_params
+
+    def _out_of_time(self, deadline: Optional[Deadline]) -> bool:
+        if deadline is None or not deadline.expired():
+            return False
+        if not self.detailed_log.get('timed_out'):
+            logger.warning('Forward deadline reached; returning the best answer so far')
+            self.detailed_log['timed_out'] = True
+        return True
+
+    def _start_iteration(self, i: int) -> None:
+        self._iter_links_added = 0
 
-            self.detailed_log['current_iteration']['winning_processor'] = (
-                winning_chunk.processor_name
-            )
-            self.detailed_log['current_iteration']['winning_weight'] = (
-                winning_chunk.weight
-            )
+        self.detailed_log['current_iteration'] = {
+            'iteration': i + 1,
+            'initial_phase': [],
+            'winning_processor': None,
+            'winning_weight': None,
+            'link_form_phase': [],
+            'fuse_phase': [],
+        }
 
-            is_final_iter = (
-                i == max_iters - 1 or weight_score >= self.config.output_threshold
-            )
+    def _record_winner(self, winning_chunk: Chunk) -> Tuple[str, float]:
+        self.detailed_log['current_iteration']['winning_processor'] = (
+            winning_chunk.processor_name
+        )
+        self.detailed_log['current_iteration']['winning_weight'] = (
+            winning_chunk.weight
+        )
+        return winning_chunk.gist, winning_chunk.weight
 
-            if is_final_iter:
-                iteration_info = {
-                    'iteration': i + 1,
-                    'winning_processor': winning_chunk.processor_name,
-                    'winning_weight': winning_chunk.weight,
-                    'winning_answer': winning_chunk.gist,
-                    'all_chunks': [
-                        {
-                            'processor_name': c.processor_name,
-                            'weight': c.weight,
-                            'relevance': c.relevance,
-                            'confidence': c.confidence,
-                            'surprise': c.surprise,
-                        }
-                        for c in chunks
-                    ],
-                    'links_added': self._iter_links_added,
+    def _finish_iteration(
+        self,
+        i: int,
+        winning_chunk: Chunk,
+        chunks: List[Chunk],
+        final: bool = False,
+    ) -> None:
+        iteration_info = {
+            'iteration': i + 1,
+            'winning_processor': winning_chunk.processor_name,
+            'winning_weight': winning_chunk.weight,
+            'winning_answer': winning_chunk.gist,
+            'all_chunks': [
+                {
+                    'processor_name': c.processor_name,
+                    'model': c.model,
+                    'weight': c.weight,
+                    'relevance': c.relevance,
+                    'confidence': c.confidence,
+                    'surprise': c.surprise,
                 }
-                self.iteration_history.append(iteration_info)
-
-                self.detailed_log['iterations'].append(
-                    self.detailed_log['current_iteration']
-                )
-                self.detailed_log['current_iteration'] = None
-
-                parsed_answer = self.parse_answer(answer=answer, query=query)
-
-                self.detailed_log['final_answer'] = answer
-                self.detailed_log['final_weight'] = weight_score
-                self.detailed_log['parsed_answer'] = parsed_answer
-                self._save_detailed_log()
-
-                return answer, weight_score, parsed_answer
-
-            # Downtree + link_form
-            self.go_down(winning_chunk, chunks, **input_params)
-
-            # Fusion
-            self.fuse_processor(
-                chunks, query, winning_chunk=winning_chunk, **input_params
-            )
-
-            iteration_info = {
-                'iteration': i + 1,
-                'winning_processor': winning_chunk.processor_name,
-                'winning_weight': winning_chunk.weight,
-                'winning_answer': winning_chunk.gist,
-                'all_chunks': [
-                    {
-                        'processor_name': c.processor_name,
-                        'weight': c.weight,
-                        'relevance': c.relevance,
-                        'confidence': c.confidence,
-                        'surprise': c.surprise,
-                    }
-                    for c in chunks
-                ],
-                'links_added': self._iter_links_added,
-            }
-            self.iteration_history.append(iteration_info)
-
-            self.detailed_log['iterations'].append(
-                self.detailed_log['current_iteration']
-            )
+                for c in chunks
+            ],
+            'links_added': self._iter_links_added,
+        }
+        self.iteration_history.append(iteration_info)
 
-        # Fallback (not normally reached)
-        parsed_answer = self.parse_answer(answer=answer, query=query)
+        self.detailed_log['iterations'].append(
+            self.detailed_log['current_iteration']
+        )
+        if final:
+            self.detailed_log['current_iteration'] = None
 
+    def _finish_forward(
+        self, answer: str, weight_score: float, parsed_answer: str
+    ) -> Tuple[str, float, str]:
         self.detailed_log['final_answer'] = answer
         self.detailed_log['final_weight'] = weight_score
         self.detailed_log['parsed_answer'] = parsed_answer
+        self.detailed_log['media_cache'] = self._media_cache.stats()
+        # Bytes and estimated prompt tokens saved by each processor's
+        # media_preprocess settings, cumulative since the CTM was loaded.
+        self.detailed_log['media_preprocess'] = {
+            proc.name: proc.media_preprocess.stats()
+            for proc in self.processor_graph.nodes
+            if proc.media_preprocess is not None
+        }
+        # Shared pool gauges (queue depth, active workers) and this CTM's share.
+        self.detailed_log['executor'] = {
+            **self.executor.executor.stats(),
+            'quota': self.executor.stats(),
+        }
         self._save_detailed_log()
 
         return answer, weight_score, parsed_answer
 
+    def _end_forward(self) -> None:
+        """Release per-forward resources, whether or not the forward succeeded."""
+        self._media_cache.end_forward(self._media_forward)
+        # Provider-side caches are billed by storage time until their TTL.
+        for proc in self.processor_graph.nodes:
+            proc.release_context_cache()
+        # An aborted recording run keeps the calls it made.
+        cassette = get_cassette()
+        if cassette is not None:
+            cassette.save()
+
     # ------------------------------------------------------------------
     # Logging helpers
     # ------------------------------------------------------------------
@@ -1,7 +1,8 @@
+import asyncio
 import concurrent.futures
 import time
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional, Tuple
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
 import numpy as np
 from numpy.typing import NDArray
@@ -9,12 +10,50 @@ from numpy.typing import NDArray
 from ..chunks import Chunk, ChunkManager
 from ..configs import ConsciousTuringMachineConfig
 from ..graphs import ProcessorGraph
-from ..utils import get_completion_kwargs, logger, logging_func_with_count
+from ..utils import (
+    CompletionCache,
+    Deadline,
+    aacquire_rate_limit,
+    acoalesce,
+    acquire_rate_limit,
+    api_key_lease,
+    coalesce,
+    completion_cache_key,
+    configure_adaptive_concurrency,
+    configure_batch_mode,
+    configure_cassette,
+    configure_circuit_breakers,
+    configure_executor,
+    configure_hedging,
+    configure_llm_backend,
+    configure_media_cache,
+    configure_media_pack,
+    configure_media_uploads,
+    configure_rate_limits,
+    configure_singleflight,
+    configure_transcode_cache,
+    get_batch_collector,
+    get_completion_cache,
+    get_completion_kwargs,
+    get_default_completion_cache,
+    get_executor,
+    get_llm_backend,
+    get_metrics,
+    logger,
+    logging_func_with_count,
+    settle_rate_limit,
+    track_llm_call,
+    with_deadline_timeout,
+)
+from ..utils.error_handler import _not_retryable
 
 
 class BaseConsciousTuringMachine(ABC):
-    def __init__(self, ctm_name: Optional[str] = None) -> None:
+    def __init__(
+        self, ctm_name: Optional[str] = None, callbacks: Optional[List[Any]] = None
+    ) -> None:
         super().__init__()
+        self.callbacks = callbacks or []
         self.config = (
             ConsciousTuringMachineConfig.from_ctm(ctm_name)
             if ctm_name
@@ -26,8 +65,67 @@ class BaseConsciousTuringMachine(ABC):
     def reset(self) -> None:
         self.load_ctm()
 
+    @property
+    def completion_cache(self) -> Optional[CompletionCache]:
+        """Completion cache configured for this CTM, if any."""
+        cache_dir = getattr(self.config, 'completion_cache_dir', None)
+        if not cache_dir:
+            return get_default_completion_cache()
+        return get_completion_cache(
+            cache_dir,
+            max_size_mb=getattr(self.config, 'completion_cache_max_mb', 1024.0),
+            read_only=getattr(self.config, 'completion_cache_read_only', False),
+        )
+
+    def _apply_provider_limits(self) -> None:
+        """Install the config's process-wide LLM call policies."""
+        llm_backend = getattr(self.config, 'llm_backend', None)
+        if llm_backend is not None:
+            configure_llm_backend(llm_backend)
+        cassette = getattr(self.config, 'cassette', None)
+        if cassette is not None:
+            configure_cassette(cassette)
+        rate_limits = getattr(self.config, 'rate_limits', None)
+        if rate_limits:
+            configure_rate_limits(rate_limits)
+        adaptive = getattr(self.config, 'adaptive_concurrency', None)
+        if adaptive is not None:
+            configure_adaptive_concurrency(adaptive)
+        if getattr(self.config, 'singleflight', False):
+            configure_singleflight(True)
+        hedging = getattr(self.config, 'hedging', None)
+        if hedging is not None:
+            configure_hedging(hedging)
+        batch_mode = getattr(self.config, 'batch_mode', None)
+        if batch_mode is not None:
+            configure_batch_mode(batch_mode)
+        circuit_breaker = getattr(self.config, 'circuit_breaker', None)
+        if circuit_breaker is not None:
+            configure_circuit_breakers(circuit_breaker)
+        media_uploads = getattr(self.config, 'media_uploads', None)
+        if media_uploads is not None:
+            configure_media_uploads(media_uploads)
+        media_cache = getattr(self.config, 'media_cache', None)
+        if media_cache is not None:
+            configure_media_cache(media_cache)
+        transcode_cache = getattr(self.config, 'transcode_cache', None)
+        if transcode_cache is not None:
+            configure_transcode_cache(transcode_cache)
+        media_pack = getattr(self.config, 'media_pack', None)
+        if media_pack is not None:
+            configure_media_pack(media_pack)
+        executor = getattr(self.config, 'executor', None)
+        if executor is not None:
+            configure_executor(executor)
+        # Every phase's parallel calls share the process-wide pool, capped at
+        # ``executor_quota`` in flight for this CTM.
+        self.executor = get_executor().quota(
+            getattr(self.config, 'executor_quota', None)
+        )
+
     def load_ctm(self) -> None:
         self.processor_graph = ProcessorGraph()
+        self._apply_provider_limits()
 
         for processor_name, processor_config in self.config.processors_config.items():
             # Per-processor temperature overrides config-level default
@@ -40,12 +138,22 @@ class BaseConsciousTuringMachine(ABC):
                 processor_group_name=None,
                 system_prompt=processor_config.get('system_prompt'),
                 model=processor_config.get('model'),
+                fallback_model=processor_config.get('fallback_model'),
                 extra_body=processor_config.get('extra_body'),
                 temperature=temp,
                 score_weights=self.config.score_weights,
                 num_additional_questions=self.config.num_additional_questions,
                 fuse_history_header=self.config.fuse_history_header,
                 winner_answer_header=self.config.winner_answer_header,
+                completion_cache=self.completion_cache,
+                stream=processor_config.get(
+                    'stream', getattr(self.config, 'stream_completions', False)
+                ),
+                context_cache=processor_config.get(
+                    'context_cache', getattr(self.config, 'context_cache', None)
+                ),
+                media_preprocess=processor_config.get('media_preprocess'),
+                callbacks=getattr(self, 'callbacks', None),
             )
 
         self.output_threshold = self.config.output_threshold
@@ -60,10 +168,20 @@ class BaseConsciousTuringMachine(ABC):
             processor_group_name=group_name,
             system_prompt=processor_config.get('system_prompt'),
             model=processor_config.get('model'),
+            fallback_model=processor_config.get('fallback_model'),
             score_weights=self.config.score_weights,
             num_additional_questions=self.config.num_additional_questions,
             fuse_history_header=self.config.fuse_history_header,
             winner_answer_header=self.config.winner_answer_header,
+            completion_cache=self.completion_cache,
+            stream=processor_config.get(
+                'stream', getattr(self.config, 'stream_completions', False)
+            ),
+            context_cache=processor_config.get(
+                'context_cache', getattr(self.config, 'context_cache', None)
+            ),
+            media_preprocess=processor_config.get('media_preprocess'),
+            callbacks=getattr(self, 'callbacks', None),
         )
 
     def remove_processor(self, processor_name: str) -> None:
@@ -83,6 +201,7 @@ class BaseConsciousTuringMachine(ABC):
         video_path: Optional[str] = None,
         api_manager: Any = None,
         phase: str = 'initial',
+        deadline: Optional[Deadline] = None,
     ) -> Chunk:
         """Ask a single processor, passing api_manager when available."""
         return processor.ask(
@@ -97,6 +216,7 @@ class BaseConsciousTuringMachine(ABC):
             video_path=video_path,
             api_manager=api_manager,
             phase=phase,
+            deadline=deadline,
         )
 
     @logging_func_with_count
@@ -113,38 +233,134 @@ class BaseConsciousTuringMachine(ABC):
         video_path: Optional[str] = None,
         api_manager: Any = None,
         phase: str = 'initial',
+        deadline: Optional[Deadline] = None,
         **kwargs,
     ) -> List[Chunk]:
-        """Ask all processors in parallel."""
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(
-                    self.ask_processor,
-                    processor,
-                    query,
-                    text,
-                    image,
-                    image_path,
-                    audio,
-                    audio_path,
-                    video_frames,
-                    video_frames_path,
-                    video_path,
-                    api_manager,
-                    phase,
+        """Ask all processors in parallel.
+
+        With a ``deadline``, processors that have not answered by then are
+        left out of the returned chunks (and so of the competition).
+        """
+        processors = list(self.processor_graph.nodes)
+        futures = [
+            self.executor.submit(
+                self.ask_processor,
+                processor,
+                query,
+                text,
+                image,
+                image_path,
+                audio,
+                audio_path,
+                video_frames,
+                video_frames_path,
+                video_path,
+                api_manager,
+                phase,
+                deadline,
+            )
+            for processor in processors
+        ]
+        chunks = self._results_before_deadline(
+            futures, [p.name for p in processors], deadline, phase
+        )
+        chunks = [chunk for chunk in chunks if chunk is not None]
+        self._log_initial_phase(chunks, query, phase)
+        return chunks
+
+    async def aask_processors(
+        self,
+        query: str,
+        text: Optional[str] = None,
+        image: Optional[np.uint8] = None,
+        image_path: Optional[str] = None,
+        audio: Optional[NDArray[np.float32]] = None,
+        audio_path: Optional[str] = None,
+        video_frames: Optional[List[NDArray[np.uint8]]] = None,
+        video_frames_path: Optional[List[str]] = None,
+        video_path: Optional[str] = None,
+        api_manager: Any = None,
+        phase: str = 'initial',
+        deadline: Optional[Deadline] = None,
+        **kwargs,
+    ) -> List[Chunk]:
+        """Ask all processors concurrently on the running event loop."""
+        processors = list(self.processor_graph.nodes)
+        chunks = await self._agather_before_deadline(
+            [
+                processor.aask(
+                    query=query,
+                    text=text,
+                    image=image,
+                    image_path=image_path,
+                    audio=audio,
+                    audio_path=audio_path,
+                    video_frames=video_frames,
+                    video_frames_path=video_frames_path,
+                    video_path=video_path,
+                    api_manager=api_manager,
+                    phase=phase,
+                    deadline=deadline,
                 )
-                for processor in self.processor_graph.nodes
-            ]
-            chunks = [
-                future.result() for future in concurrent.futures.as_completed(futures)
-            ]
+                for processor in processors
+            ],
+            [p.name for p in processors],
+            deadline,
+            phase,
+        )
         chunks = [chunk for chunk in chunks if chunk is not None]
+        self._log_initial_phase(chunks, query, phase)
+        return chunks
 
+    @staticmethod
+    def _results_before_deadline(
+        futures: List[concurrent.futures.Future],
+        names: List[str],
+        deadline: Optional[Deadline],
+        phase: str,
+    ) -> List[Any]:
+        """Results of ``futures`` in order, None for those that miss ``deadline``.
+
+        Late calls not yet started are cancelled; stragglers already running
+        finish (or time out) in the background.
+        """
+        timeout = deadline.remaining() if deadline is not None else None
+        done, pending = concurrent.futures.wait(futures, timeout=timeout)
+        if pending:
+            for future in pending:
+                future.cancel()
+            dropped = [n for f, n in zip(futures, names) if f in pending]
+            logger.warning(f'Deadline reached in {phase} phase; dropping {dropped}')
+        return [f.result() if f in done else None for f in futures]
+
+    @staticmethod
+    async def _agather_before_deadline(
+        awaitables: List[Awaitable[Any]],
+        names: List[str],
+        deadline: Optional[Deadline],
+        phase: str,
+    ) -> List[Any]:
+        """Async counterpart of :meth:`_results_before_deadline`; cancels late calls."""
+        if deadline is None:
+            return list(await asyncio.gather(*awaitables))
+        tasks = [asyncio.ensure_future(a) for a in awaitables]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+        if pending:
+            for task in pending:
+                task.cancel()
+            dropped = [n for t, n in zip(tasks, names) if t in pending]
+            logger.warning(f'Deadline reached in {phase} phase; dropping {dropped}')
+        return [t.result() if t in done else None for t in tasks]
+
+    def _log_initial_phase(self, chunks: List[Chunk], query: str, phase: str) -> None:
         if self.detailed_log is not None and phase == 'initial':
             current_iteration = self.detailed_log['current_iteration']
             for chunk in chunks:
                 chunk_info = {
                     'processor_name': chunk.processor_name,
+                    'model': chunk.model,
                     'query': chunk.executor_content or query,
                     'answer': chunk.gist,
                     'relevance': chunk.relevance,
@@ -155,18 +371,14 @@ class BaseConsciousTuringMachine(ABC):
                 }
                 current_iteration['initial_phase'].append(chunk_info)
 
-        return chunks
-
-    def parse_answer(
+    def _build_parse_call(
         self,
         answer: str,
         query: str,
         reasoning: str = '',
         action_history: str = '',
         force_final: bool = False,
-    ) -> str:
-        from litellm import completion
-
+    ) -> Dict[str, Any]:
         template = (
             self.config.force_final_prompt_template
             if force_final
@@ -188,44 +400,180 @@ class BaseConsciousTuringMachine(ABC):
 
         parse_temp = getattr(self.config, 'parse_temperature', 0.3)
 
-        # Retry with exponential backoff on transient failures (503 / rate limit
-        # / timeout). Matches the 5-retry pattern used by ask_executor's
-        # @message_exponential_backoff decorator. Without this, a single transient
-        # error on the parse step silently returns the raw CTM analysis as the
-        # "parsed" answer, breaking downstream Yes/No classification.
-        retries = 5
+        return {
+            **completion_kwargs,
+            'messages': [{'role': 'user', 'content': parse_prompt}],
+            'max_tokens': 4096,
+            'temperature': parse_temp,
+        }
+
+    def _lookup_parse_cache(
+        self, call_kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(cache_key, cached_parsed_answer)`` for a parse request."""
+        cache = self.completion_cache
+        if cache is None:
+            return None, None
+        cache_key = completion_cache_key(call_kwargs)
+        cached = cache.get(cache_key)
+        if hasattr(self, '_parse_usage'):
+            counter = 'cache_hits' if cached is not None else 'cache_misses'
+            self._parse_usage[counter] = self._parse_usage.get(counter, 0) + 1
+        return cache_key, cached['contents'][0] if cached is not None else None
+
+    def _call_parse_model(self, call_kwargs: Dict[str, Any]) -> Any:
+        parse_model = self.config.parse_model
+        with track_llm_call('parse', parse_model, 'parse') as call:
+            collector = get_batch_collector()
+            if collector is not None:
+                return call.done(collector.complete(call_kwargs))
+            ticket = acquire_rate_limit(parse_model, call_kwargs)
+            with api_key_lease(parse_model, call_kwargs) as lease:
+                call.started()
+                response = call.done(get_llm_backend().complete(**lease.call_kwargs))
+                lease.record(response)
+        settle_rate_limit(ticket, response)
+        return response
+
+    async def _acall_parse_model(self, call_kwargs: Dict[str, Any]) -> Any:
+        parse_model = self.config.parse_model
+        with track_llm_call('parse', parse_model, 'parse') as call:
+            collector = get_batch_collector()
+            if collector is not None:
+                response = await asyncio.to_thread(collector.complete, call_kwargs)
+                return call.done(response)
+            ticket = await aacquire_rate_limit(parse_model, call_kwargs)
+            with api_key_lease(parse_model, call_kwargs) as lease:
+                call.started()
+                response = await get_llm_backend().acomplete(**lease.call_kwargs)
+                call.done(response)
+                lease.record(response)
+        settle_rate_limit(ticket, response)
+        return response
+
+    def _finish_parse(
+        self, response: Any, cache_key: Optional[str], shared: bool = False
+    ) -> str:
+        parsed_answer = response.choices[0].message.content.strip()
+        if shared:
+            # Another caller's in-flight request already cached and counted it.
+            return parsed_answer
+        cache = self.completion_cache
+        if cache_key is not None and cache is not None:
+            cache.put(cache_key, {'contents': [parsed_answer]})
+        # Parse step tracks tokens for cost calculation but is NOT
+        # counted as an api_call (it's a post-processing formatting step,
+        # not part of the CTM reasoning loop).
+        if hasattr(self, '_parse_usage') and hasattr(response, 'usage') and response.usage:
+            self._parse_usage['prompt_tokens'] += getattr(response.usage, 'prompt_tokens', 0) or 0
+            self._parse_usage['completion_tokens'] += getattr(response.usage, 'completion_tokens', 0) or 0
+            self._parse_usage['total_tokens'] += getattr(response.usage, 'total_tokens', 0) or 0
+        return parsed_answer
+
+    # Retry with exponential backoff on transient failures (503 / rate limit
+    # / timeout). Matches the 5-retry pattern used by ask_executor's
+    # @message_exponential_backoff decorator. Without this, a single transient
+    # error on the parse step silently returns the raw CTM analysis as the
+    # "parsed" answer, breaking downstream Yes/No classification. Like the
+    # decorator, errors that cannot succeed on retry (open circuit, cassette
+    # miss, a deadline the next attempt could not meet) end the loop early.
+    PARSE_RETRIES = 5
+
+    def parse_answer(
+        self,
+        answer: str,
+        query: str,
+        reasoning: str = '',
+        action_history: str = '',
+        force_final: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        call_kwargs = self._build_parse_call(
+            answer, query, reasoning, action_history, force_final
+        )
+        cache_key, cached = self._lookup_parse_cache(call_kwargs)
+        if cached is not None:
+            return cached
+
+        retries = self.PARSE_RETRIES
         base_wait = 1
         last_exc: Optional[Exception] = None
         for attempt in range(retries):
             try:
-                response = completion(
-                    **completion_kwargs,
-                    messages=[{'role': 'user', 'content': parse_prompt}],
-                    max_tokens=4096,
-                    temperature=parse_temp,
+                request = with_deadline_timeout(call_kwargs, deadline)
+                response, shared = coalesce(
+                    call_kwargs, lambda: self._call_parse_model(request)
                 )
-                parsed_answer = response.choices[0].message.content.strip()
-                # Parse step tracks tokens for cost calculation but is NOT
-                # counted as an api_call (it's a post-processing formatting step,
-                # not part of the CTM reasoning loop).
-                if hasattr(self, '_parse_usage') and hasattr(response, 'usage') and response.usage:
-                    self._parse_usage['prompt_tokens'] += getattr(response.usage, 'prompt_tokens', 0) or 0
-                    self._parse_usage['completion_tokens'] += getattr(response.usage, 'completion_tokens', 0) or 0
-                    self._parse_usage['total_tokens'] += getattr(response.usage, 'total_tokens', 0) or 0
-                return parsed_answer
+                return self._finish_parse(response, cache_key, shared)
             except Exception as e:
                 last_exc = e
                 wait_time = base_wait * (2 ** attempt)
+                reason = _not_retryable(deadline, wait_time, e)
+                if reason is not None:
+                    logger.warning(f'parse_answer failed: {e}. {reason}; not retrying.')
+                    break
+                get_metrics().record_retry('parse', self.config.parse_model, 'parse')
                 logger.warning(
                     f'parse_answer attempt {attempt + 1}/{retries} failed: {e}. '
                     f'Retrying in {wait_time}s...'
                 )
                 time.sleep(wait_time)
 
-        logger.warning(
-            f'parse_answer exhausted {retries} retries; returning raw answer. '
-            f'Last error: {last_exc}'
+        else:
+            logger.warning(
+                f'parse_answer exhausted {retries} retries; returning raw answer. '
+                f'Last error: {last_exc}'
+            )
+        return answer
+
+    async def aparse_answer(
+        self,
+        answer: str,
+        query: str,
+        reasoning: str = '',
+        action_history: str = '',
+        force_final: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """Async counterpart of :meth:`parse_answer`."""
+        call_kwargs = self._build_parse_call(
+            answer, query, reasoning, action_history, force_final
         )
+        cache_key, cached = self._lookup_parse_cache(call_kwargs)
+        if cached is not None:
+            return cached
+
+        retries = self.PARSE_RETRIES
+        base_wait = 1
+        last_exc: Optional[Exception] = None
+        for attempt in range(retries):
+            try:
+                request = with_deadline_timeout(call_kwargs, deadline)
+                response, shared = await acoalesce(
+                    call_kwargs, lambda: self._acall_parse_model(request)
+                )
+                return self._finish_parse(response, cache_key, shared)
+            except Exception as e:
+                last_exc = e
+                wait_time = base_wait * (2 ** attempt)
+                reason = _not_retryable(deadline, wait_time, e)
+                if reason is not None:
+                    logger.warning(
+                        f'aparse_answer failed: {e}. {reason}; not retrying.'
+                    )
+                    break
+                get_metrics().record_retry('parse', self.config.parse_model, 'parse')
+                logger.warning(
+                    f'aparse_answer attempt {attempt + 1}/{retries} failed: {e}. '
+                    f'Retrying in {wait_time}s...'
+                )
+                await asyncio.sleep(wait_time)
+
+        else:
+            logger.warning(
+                f'aparse_answer exhausted {retries} retries; returning raw answer. '
+                f'Last error: {last_exc}'
+            )
         return answer
 
     @logging_func_with_count
@@ -274,6 +622,7 @@ class BaseConsciousTuringMachine(ABC):
             for chunk in question_chunks:
                 link_info = {
                     'processor_name': chunk.processor_name,
+                    'model': chunk.model,
                     'query': chunk.executor_content or combined_query,
                     'answer': chunk.gist,
                     'relevance': chunk.relevance,
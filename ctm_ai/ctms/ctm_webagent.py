@@ -215,25 +215,24 @@ class WebConsciousTuringMachine(ConsciousTuringMachine):
             'screenshot_processor': {'screenshot': screenshot},
         }
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(
-                    proc.ask,
-                    query,
-                    **_modality.get(proc.name, {}),
-                    **shared,
-                ): proc.name
-                for proc in self.processor_graph.nodes
-            }
-            chunks = []
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    chunk = future.result()
-                    if chunk is not None:
-                        chunks.append(chunk)
-                except Exception as exc:
-                    proc_name = futures[future]
-                    logger.warning(f'WebCTM: processor {proc_name} raised: {exc}')
+        futures = {
+            self.executor.submit(
+                proc.ask,
+                query,
+                **_modality.get(proc.name, {}),
+                **shared,
+            ): proc.name
+            for proc in self.processor_graph.nodes
+        }
+        chunks = []
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                chunk = future.result()
+                if chunk is not None:
+                    chunks.append(chunk)
+            except Exception as exc:
+                proc_name = futures[future]
+                logger.warning(f'WebCTM: processor {proc_name} raised: {exc}')
 
         return chunks
 
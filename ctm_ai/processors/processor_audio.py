@@ -1,11 +1,19 @@
-import base64
 import os
 import subprocess
-import tempfile
 from typing import Any, Dict, List
 
+from ..utils import (
+    TranscodeError,
+    cached_data_url,
+    encode_data_url,
+    get_media_cache,
+    transcoded,
+)
 from .processor_base import BaseProcessor
 
+# Names the ffmpeg command below in the transcode cache; bump when it changes.
+QWEN_AUDIO_VIDEO_RECIPE = 'black_video_320x240_r1_x264_stereo_aac_v1'
+
 
 @BaseProcessor.register_processor('audio_processor')
 class AudioProcessor(BaseProcessor):
@@ -62,63 +70,38 @@ class AudioProcessor(BaseProcessor):
             return False
         return True
 
-    def _build_gemini_audio_content(
-        self, audio_path: str, query: str
-    ) -> Dict[str, Any]:
-        """Build audio message in Gemini format (file type - litellm convention)."""
+    def _build_gemini_audio_content(self, audio_path: str) -> Dict[str, Any]:
+        """Build audio content block in Gemini format (file type - litellm convention)."""
         mime_type = self.get_mime_type(audio_path)
-        with open(audio_path, 'rb') as f:
-            audio_bytes = f.read()
-        encoded_data = base64.b64encode(audio_bytes).decode('utf-8')
+        uploaded_block = self.uploaded_media_block(audio_path, mime_type)
+        if uploaded_block is not None:
+            return uploaded_block
         return {
-            'role': 'user',
-            'content': [
-                {
-                    'type': 'text',
-                    'text': f'[AUDIO PROVIDED BELOW]\n\n{query}\n\nBased on the audio you received, provide your analysis.',
-                },
-                {
-                    'type': 'file',
-                    'file': {
-                        'file_data': f'data:{mime_type};base64,{encoded_data}',
-                    },
-                },
-            ],
+            'type': 'file',
+            'file': {'file_data': cached_data_url(audio_path, mime_type)},
         }
 
-    def _build_qwen_audio_content(self, audio_path: str, query: str) -> Dict[str, Any]:
-        """Build audio message in Qwen format (audio embedded in black-screen video)."""
-        tmp_video = tempfile.mktemp(suffix='.mp4')
-        try:
-            if not self._make_black_video_with_audio(audio_path, tmp_video):
-                raise RuntimeError(
-                    'Failed to convert audio to video with ffmpeg. '
-                    'Ensure ffmpeg is installed.'
-                )
-            with open(tmp_video, 'rb') as f:
-                video_bytes = f.read()
-            encoded_data = base64.b64encode(video_bytes).decode('utf-8')
-        finally:
-            if os.path.exists(tmp_video):
-                os.unlink(tmp_video)
+    def _build_qwen_audio_content(self, audio_path: str) -> Dict[str, Any]:
+        """Build audio content block in Qwen format (audio in a black-screen video)."""
+        data_url = get_media_cache().get_or_encode(
+            audio_path,
+            'qwen_black_video_data_url',
+            lambda: self._encode_qwen_audio_video(audio_path),
+        )
+        return {'type': 'video_url', 'video_url': {'url': data_url}}
 
-        return {
-            'role': 'user',
-            'content': [
-                {
-                    'type': 'text',
-                    'text': (
-                        f'Focus ONLY on what the person is SAYING in the audio. '
-                        f'The video is just a black screen.\n\n{query}\n\n'
-                        f'Based on the audio you received, provide your analysis.'
-                    ),
-                },
-                {
-                    'type': 'video_url',
-                    'video_url': {'url': f'data:video/mp4;base64,{encoded_data}'},
-                },
-            ],
-        }
+    def _encode_qwen_audio_video(self, audio_path: str) -> str:
+        """Transcode audio to a black-screen MP4 and return it as a data URL."""
+        try:
+            with transcoded(
+                audio_path, QWEN_AUDIO_VIDEO_RECIPE, self._make_black_video_with_audio
+            ) as video_path:
+                return encode_data_url(video_path, 'video/mp4')
+        except TranscodeError as e:
+            raise RuntimeError(
+                'Failed to convert audio to video with ffmpeg. '
+                'Ensure ffmpeg is installed.'
+            ) from e
 
     def build_executor_messages(
         self,
@@ -133,13 +116,21 @@ class AudioProcessor(BaseProcessor):
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f'Audio file not found: {audio_path}')
         try:
+            # The audio precedes the query so the system prompt + audio form a
+            # prefix that stays the same across phases.
             if self.provider == 'qwen':
-                audio_message = self._build_qwen_audio_content(audio_path, query)
+                audio_block = self._build_qwen_audio_content(audio_path)
+                question = (
+                    f'Focus ONLY on what the person is SAYING in the audio. '
+                    f'The video is just a black screen.\n\n{query}\n\n'
+                    f'Based on the audio you received, provide your analysis.'
+                )
             else:
-                audio_message = self._build_gemini_audio_content(audio_path, query)
-
-            all_messages = [{'role': 'system', 'content': self.system_prompt}]
-            all_messages.append(audio_message)
-            return all_messages
+                audio_block = self._build_gemini_audio_content(audio_path)
+                question = (
+                    f'[AUDIO PROVIDED ABOVE]\n\n{query}\n\n'
+                    f'Based on the audio you received, provide your analysis.'
+                )
+            return self.build_media_messages([audio_block], question)
         except Exception as e:
             raise RuntimeError(f'Error building executor messages: {str(e)}')
@@ -1,8 +1,10 @@
+import asyncio
 import os
+from types import SimpleNamespace
 from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 
 import numpy as np
-from litellm import completion
+import requests
 from numpy.typing import NDArray
 
 from ..chunks import Chunk
@@ -12,18 +14,66 @@ from ..configs.ctm_config_base import (
     DEFAULT_WINNER_ANSWER_HEADER,
 )
 from ..utils import (
+    CircuitOpenError,
+    CompletionCache,
+    ContextCacheRegistry,
+    Deadline,
+    MediaPreprocessor,
+    MediaUploadError,
+    aacquire_rate_limit,
+    acoalesce,
+    aconcurrency_slot,
+    acquire_rate_limit,
+    ahedged,
+    api_key_lease,
+    async_message_exponential_backoff,
+    cached_data_url,
+    circuit_allows,
+    circuit_guard,
+    coalesce,
+    completion_cache_key,
+    concurrency_slot,
     configure_litellm,
+    estimate_request_tokens,
+    get_batch_collector,
     get_completion_kwargs,
+    get_default_completion_cache,
+    get_key_pool,
+    get_llm_backend,
+    get_media_registry,
     get_model_provider,
     get_required_api_key_name,
+    hedged,
+    logger,
     message_exponential_backoff,
+    referenced_file_ids,
+    settle_rate_limit,
+    strip_cache_markers,
+    track_llm_call,
+    with_deadline_timeout,
 )
 from .prompts.base_prompts import (
     BASE_JSON_FORMAT_FUSE,
     BASE_JSON_FORMAT_LINK_FORM,
     build_base_score_format,
 )
-from .utils import parse_json_response_with_scores
+from .utils import (
+    PHASE_REQUIRED_FIELDS,
+    IncrementalJSONExtractor,
+    parse_json_response_with_scores,
+)
+
+
+def new_usage_stats() -> Dict[str, int]:
+    return {
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'total_tokens': 0,
+        'api_calls': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'coalesced_calls': 0,
+    }
 
 
 class BaseProcessor(object):
@@ -78,6 +128,18 @@ class BaseProcessor(object):
         # Provider-specific setup
         self.provider = get_model_provider(self.model)
         self._completion_kwargs = get_completion_kwargs(self.model)
+        # Served instead of ``model`` while the model's circuit breaker is open.
+        # Messages (media blocks, uploads, cached contents) are built for the
+        # provider, so the fallback must be another model of the same one.
+        self.fallback_model: Optional[str] = kwargs.get('fallback_model')
+        if (
+            self.fallback_model is not None
+            and get_model_provider(self.fallback_model) != self.provider
+        ):
+            raise ValueError(
+                f'[{name}] fallback_model {self.fallback_model!r} must use the '
+                f'same provider as model {self.model!r}'
+            )
 
         # Merge extra_body from config (e.g. thinking_budget for Qwen models)
         extra_body = kwargs.get('extra_body')
@@ -105,7 +167,29 @@ class BaseProcessor(object):
         self.fuse_history = []
         self.winner_answer = []
         self.all_context_history = []
-        self._usage_stats = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'api_calls': 0}
+        self._usage_stats = new_usage_stats()
+        # Optional CompletionCache; falls back to the process-wide default.
+        self.completion_cache = kwargs.get('completion_cache')
+        # Stream completions and stop as soon as the fields the current phase
+        # needs are complete; streamed tokens go to ``on_llm_new_token``.
+        self.stream: bool = kwargs.get('stream', False)
+        self.callbacks: List[Any] = kwargs.get('callbacks') or []
+        # Register the system prompt + media prefix with the provider's context
+        # cache (``True`` or ContextCacheRegistry kwargs such as ``ttl_s``).
+        context_cache = kwargs.get('context_cache')
+        if context_cache is True:
+            context_cache = {}
+        self._context_cache: Optional[ContextCacheRegistry] = (
+            ContextCacheRegistry(**context_cache)
+            if isinstance(context_cache, dict)
+            else None
+        )
+        # Shrink images and videos before encoding (max_long_edge, jpeg_quality,
+        # fps, max_duration_s); see MediaPreprocessor.
+        media_preprocess = kwargs.get('media_preprocess')
+        self.media_preprocess: Optional[MediaPreprocessor] = (
+            MediaPreprocessor(**media_preprocess) if media_preprocess else None
+        )
 
         configure_litellm(model_name=self.model_name)
 
@@ -119,7 +203,11 @@ class BaseProcessor(object):
 
         # Check the provider-specific API key based on the configured model
         required_key = get_required_api_key_name(self.model)
-        if required_key and required_key not in os.environ:
+        if (
+            required_key
+            and required_key not in os.environ
+            and get_key_pool(self.model) is None
+        ):
             missing_vars.append(required_key)
 
         if missing_vars:
@@ -185,6 +273,36 @@ class BaseProcessor(object):
         messages: List[Dict[str, Any]],
         default_additional_questions: List[str] = None,
         *args: Any,
+        phase: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': messages,
+            'max_tokens': self.max_tokens,
+            'n': self.return_num,
+            **kwargs,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        model, call_kwargs = self._route_call(call_kwargs)
+        contents = self._complete(
+            call_kwargs, phase=phase, model=model, deadline=deadline
+        )
+        output = parse_json_response_with_scores(
+            contents[0], default_additional_questions
+        )
+        output['model'] = model
+        return output
+
+    @async_message_exponential_backoff()
+    async def ask_executor_async(
+        self,
+        messages: List[Dict[str, Any]],
+        default_additional_questions: List[str] = None,
+        *args: Any,
+        phase: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         call_kwargs = {
@@ -194,18 +312,449 @@ class BaseProcessor(object):
             'n': self.return_num,
             **kwargs,
         }
-        response = completion(**call_kwargs)
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        model, call_kwargs = self._route_call(call_kwargs)
+        contents = await self._acomplete(
+            call_kwargs, phase=phase, model=model, deadline=deadline
+        )
+        output = parse_json_response_with_scores(
+            contents[0], default_additional_questions
+        )
+        output['model'] = model
+        return output
+
+    def _route_call(self, call_kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Pick ``model``, or the fallback model while ``model``'s circuit is open.
+
+        Returns the model name and the call kwargs rewritten for it. Without a
+        fallback, or when the fallback's circuit is open too, an open circuit
+        fails the call immediately.
+        """
+        if circuit_allows(self.model):
+            return self.model, call_kwargs
+        if self.fallback_model is None:
+            raise CircuitOpenError(f'{self.model} circuit is open; no fallback_model')
+        if not circuit_allows(self.fallback_model):
+            raise CircuitOpenError(
+                f'{self.model} and fallback {self.fallback_model} circuits are open'
+            )
+        request = {
+            k: v for k, v in call_kwargs.items() if k not in self._completion_kwargs
+        }
+        request.update(get_completion_kwargs(self.fallback_model))
+        return self.fallback_model, request
+
+    def _complete(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> List[str]:
+        """Run a completion and return the content of every choice.
+
+        Consults the completion cache (if any) first; hits are served without
+        a provider call and do not count towards token usage. Misses wait for
+        the shared per-provider rate limiter and, when enabled, an adaptive
+        concurrency slot before calling out. With single-flight enabled, a
+        request identical to one already in flight shares its response.
+        In streaming mode ``phase`` decides which fields end the stream early.
+        ``model`` is the configured model being called (``self.model`` or the
+        fallback); limits, key leases and circuit breakers are kept per model.
+        ``deadline`` keeps its own timeouts from counting against the model.
+        """
+        cache_key, cached = self._lookup_cache(call_kwargs)
+        if cached is not None:
+            return cached
+        response, shared = coalesce(
+            call_kwargs,
+            lambda: self._hedged_call(call_kwargs, phase, model, deadline),
+        )
+        if shared:
+            self._usage_stats['coalesced_calls'] += 1
+            return self._response_contents(response)
+        return self._finish_completion(response, cache_key)
+
+    async def _acomplete(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> List[str]:
+        """Async counterpart of :meth:`_complete`."""
+        cache_key, cached = self._lookup_cache(call_kwargs)
+        if cached is not None:
+            return cached
+        response, shared = await acoalesce(
+            call_kwargs,
+            lambda: self._ahedged_call(call_kwargs, phase, model, deadline),
+        )
+        if shared:
+            self._usage_stats['coalesced_calls'] += 1
+            return self._response_contents(response)
+        return self._finish_completion(response, cache_key)
+
+    def _hedged_call(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Any:
+        """Call the provider, racing a duplicate if the call runs slow.
+
+        Streamed and batched calls are never hedged: both copies would forward
+        tokens, or sit in the same batch queue. The outcome is reported to the
+        model's circuit breaker.
+        """
+        model = model or self.model
+        with circuit_guard(model, deadline):
+            if self._should_stream(call_kwargs) or get_batch_collector() is not None:
+                return self._call_provider(call_kwargs, phase, model)
+            # A losing duplicate still used (and billed) tokens.
+            return hedged(
+                model,
+                lambda: self._call_provider(call_kwargs, phase, model),
+                self._record_usage,
+            )
+
+    async def _ahedged_call(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Any:
+        model = model or self.model
+        with circuit_guard(model, deadline):
+            if self._should_stream(call_kwargs) or get_batch_collector() is not None:
+                return await self._acall_provider(call_kwargs, phase, model)
+            return await ahedged(
+                model,
+                lambda: self._acall_provider(call_kwargs, phase, model),
+                self._record_usage,
+            )
+
+    def _call_provider(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Any:
+        model = model or self.model
+        with track_llm_call(self.name, model, phase) as call:
+            collector = get_batch_collector()
+            if collector is not None:
+                request = self._without_cache_markers(call_kwargs)
+                return call.done(collector.complete(request))
+            ticket = acquire_rate_limit(model, call_kwargs)
+            pin_key_id = self._upload_key_id(call_kwargs)
+            with concurrency_slot(model):
+                with api_key_lease(model, call_kwargs, pin_key_id) as lease:
+                    call.started()
+                    request = self._with_context_cache(lease.call_kwargs)
+                    if self._should_stream(call_kwargs):
+                        response = self._stream_completion(request, phase)
+                    else:
+                        response = get_llm_backend().complete(**request)
+                    lease.record(response)
+            settle_rate_limit(ticket, response)
+            return call.done(response)
+
+    async def _acall_provider(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Any:
+        model = model or self.model
+        with track_llm_call(self.name, model, phase) as call:
+            collector = get_batch_collector()
+            if collector is not None:
+                request = self._without_cache_markers(call_kwargs)
+                return call.done(await asyncio.to_thread(collector.complete, request))
+            ticket = await aacquire_rate_limit(model, call_kwargs)
+            pin_key_id = self._upload_key_id(call_kwargs)
+            async with aconcurrency_slot(model):
+                with api_key_lease(model, call_kwargs, pin_key_id) as lease:
+                    call.started()
+                    request = lease.call_kwargs
+                    if self._context_cache is not None:
+                        # Registering a prefix is a blocking HTTP call.
+                        request = await asyncio.to_thread(
+                            self._with_context_cache, request
+                        )
+                    if self._should_stream(call_kwargs):
+                        response = await self._astream_completion(request, phase)
+                    else:
+                        response = await get_llm_backend().acomplete(**request)
+                    lease.record(response)
+            settle_rate_limit(ticket, response)
+            return call.done(response)
+
+    def _call_llm(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Any:
+        """One direct call for a processor's own prompts (search, tools, ...).
+
+        Rate limited, key leased and metered like executor calls, but not
+        cached, hedged or rerouted to the fallback model. ``model`` labels a
+        call to another model than the processor's own.
+        """
+        model = model or self.model
+        with track_llm_call(self.name, model, phase) as call:
+            ticket = acquire_rate_limit(model, call_kwargs)
+            with api_key_lease(model, call_kwargs) as lease:
+                call.started()
+                response = call.done(get_llm_backend().complete(**lease.call_kwargs))
+                lease.record(response)
+        settle_rate_limit(ticket, response)
+        return response
+
+    async def _acall_llm(
+        self,
+        call_kwargs: Dict[str, Any],
+        phase: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> Any:
+        """Async counterpart of :meth:`_call_llm`."""
+        model = model or self.model
+        with track_llm_call(self.name, model, phase) as call:
+            ticket = await aacquire_rate_limit(model, call_kwargs)
+            with api_key_lease(model, call_kwargs) as lease:
+                call.started()
+                response = call.done(
+                    await get_llm_backend().acomplete(**lease.call_kwargs)
+                )
+                lease.record(response)
+        settle_rate_limit(ticket, response)
+        return response
+
+    # ------------------------------------------------------------------
+    # Provider-side context caching
+    # ------------------------------------------------------------------
+
+    def build_media_messages(
+        self, media_blocks: List[Dict[str, Any]], question: str
+    ) -> List[Dict[str, Any]]:
+        """System prompt and media first, then the phase-specific question.
+
+        The first two messages are identical across every phase and iteration
+        of a forward pass, so they form a prefix the provider can cache.
+        """
+        media_message: Dict[str, Any] = {'role': 'user', 'content': media_blocks}
+        if self._context_cache is not None:
+            media_message['cache_control'] = {'type': 'ephemeral'}
+        return [
+            {'role': 'system', 'content': self.system_prompt},
+            media_message,
+            {'role': 'user', 'content': question},
+        ]
+
+    def uploaded_media_block(
+        self, path: str, mime_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """File-reference content block for ``path``, or None to send it inline.
+
+        Uses the process-wide media upload registry, so each file is uploaded
+        once per provider and later requests carry only its URI.
+        """
+        registry = get_media_registry()
+        if registry is None:
+            return None
+        # The file belongs to the uploading key's project; requests that
+        # reference it are pinned to that key (see _upload_key_id).
+        pool = get_key_pool(self.model)
+        if pool is not None:
+            api_key = pool.preferred_key()
+        else:
+            api_key = os.getenv(get_required_api_key_name(self.model))
+        try:
+            return registry.file_block(path, mime_type, self.provider, api_key)
+        except (MediaUploadError, requests.RequestException) as e:
+            logger.warning(f'{self.name}: upload failed, sending media inline: {e}')
+            return None
+
+    @staticmethod
+    def _upload_key_id(call_kwargs: Dict[str, Any]) -> Optional[str]:
+        """Id of the key that uploaded the files the request references."""
+        registry = get_media_registry()
+        if registry is None:
+            return None
+        for file_id in referenced_file_ids(call_kwargs.get('messages') or []):
+            key_id = registry.upload_key_id(file_id)
+            if key_id is not None:
+                return key_id
+        return None
+
+    def media_data_url(self, path: str, mime_type: str) -> str:
+        """Inline ``data:`` URL of ``path``, shrunk by ``media_preprocess``."""
+        if self.media_preprocess is None:
+            return cached_data_url(path, mime_type)
+        return self.media_preprocess.data_url(path, mime_type, self.provider)
+
+    def _with_context_cache(self, call_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self._context_cache is None:
+            return call_kwargs
+        return self._context_cache.apply(call_kwargs)
+
+    def _without_cache_markers(self, call_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self._context_cache is None:
+            return call_kwargs
+        return {
+            **call_kwargs,
+            'messages': strip_cache_markers(call_kwargs.get('messages') or []),
+        }
+
+    def release_context_cache(self) -> None:
+        """Drop the provider caches registered during the current forward pass."""
+        if self._context_cache is not None:
+            self._context_cache.release()
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    def _should_stream(self, call_kwargs: Dict[str, Any]) -> bool:
+        return self.stream and (call_kwargs.get('n') or 1) == 1
+
+    def _stream_completion(
+        self, call_kwargs: Dict[str, Any], phase: Optional[str] = None
+    ) -> Any:
+        """Stream a completion, stopping once ``phase``'s fields are complete.
+
+        Returns a response-shaped object so callers can treat it like a
+        regular completion.
+        """
+        required = PHASE_REQUIRED_FIELDS.get(phase) if phase else None
+        extractor = IncrementalJSONExtractor()
+        pieces: List[str] = []
+        usage = None
+        stopped = False
+        stream = get_llm_backend().stream(**call_kwargs)
+        for chunk in stream:
+            usage = getattr(chunk, 'usage', None) or usage
+            self._consume_stream_chunk(chunk, extractor, pieces, phase)
+            if required and extractor.has_fields(required):
+                stopped = True
+                break
+        if stopped and hasattr(stream, 'close'):
+            stream.close()
+        return self._streamed_response(call_kwargs, extractor, pieces, usage, stopped)
+
+    async def _astream_completion(
+        self, call_kwargs: Dict[str, Any], phase: Optional[str] = None
+    ) -> Any:
+        """Async counterpart of :meth:`_stream_completion`."""
+        required = PHASE_REQUIRED_FIELDS.get(phase) if phase else None
+        extractor = IncrementalJSONExtractor()
+        pieces: List[str] = []
+        usage = None
+        stopped = False
+        stream = await get_llm_backend().astream(**call_kwargs)
+        async for chunk in stream:
+            usage = getattr(chunk, 'usage', None) or usage
+            self._consume_stream_chunk(chunk, extractor, pieces, phase)
+            if required and extractor.has_fields(required):
+                stopped = True
+                break
+        if stopped and hasattr(stream, 'aclose'):
+            await stream.aclose()
+        return self._streamed_response(call_kwargs, extractor, pieces, usage, stopped)
+
+    def _consume_stream_chunk(
+        self,
+        chunk: Any,
+        extractor: IncrementalJSONExtractor,
+        pieces: List[str],
+        phase: Optional[str],
+    ) -> None:
+        choices = getattr(chunk, 'choices', None)
+        if not choices:
+            return
+        token = getattr(choices[0].delta, 'content', None)
+        if not token:
+            return
+        pieces.append(token)
+        extractor.feed(token)
+        for callback in self.callbacks:
+            callback.on_llm_new_token(token, processor_name=self.name, phase=phase)
+
+    @staticmethod
+    def _streamed_response(
+        call_kwargs: Dict[str, Any],
+        extractor: IncrementalJSONExtractor,
+        pieces: List[str],
+        usage: Any,
+        stopped: bool,
+    ) -> Any:
+        # When generation was cut short, return just the closed fields so the
+        # usual JSON parsing sees a well-formed object.
+        content = extractor.as_json() if stopped else ''.join(pieces)
+        if usage is None:
+            # Early-stopped streams never receive the provider's usage chunk.
+            prompt_tokens = estimate_request_tokens({**call_kwargs, 'max_tokens': 0})
+            completion_tokens = estimate_request_tokens(
+                {'messages': [{'role': 'assistant', 'content': ''.join(pieces)}]}
+            )
+            usage = SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=usage,
+        )
+
+    @staticmethod
+    def _response_contents(response: Any) -> List[str]:
+        return [
+            response.choices[i].message.content for i in range(len(response.choices))
+        ]
+
+    def _get_completion_cache(self) -> Optional[CompletionCache]:
+        if self.completion_cache is not None:
+            return self.completion_cache
+        return get_default_completion_cache()
+
+    def _lookup_cache(
+        self, call_kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Return ``(cache_key, cached_contents)`` for a completion request."""
+        cache = self._get_completion_cache()
+        if cache is None:
+            return None, None
+        cache_key = completion_cache_key(call_kwargs)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self._usage_stats['cache_hits'] += 1
+            return cache_key, cached['contents']
+        self._usage_stats['cache_misses'] += 1
+        return cache_key, None
+
+    def _finish_completion(self, response: Any, cache_key: Optional[str]) -> List[str]:
+        """Record usage for a provider response and store it in the cache."""
+        self._record_usage(response)
+        contents = self._response_contents(response)
+        cache = self._get_completion_cache()
+        if cache_key is not None and cache is not None and contents[0] is not None:
+            cache.put(cache_key, {'contents': contents})
+        return contents
+
+    def _record_usage(self, response: Any) -> None:
         if hasattr(response, 'usage') and response.usage:
             self._usage_stats['prompt_tokens'] += getattr(response.usage, 'prompt_tokens', 0) or 0
             self._usage_stats['completion_tokens'] += getattr(response.usage, 'completion_tokens', 0) or 0
             self._usage_stats['total_tokens'] += getattr(response.usage, 'total_tokens', 0) or 0
         self._usage_stats['api_calls'] += 1
-        contents = [
-            response.choices[i].message.content for i in range(len(response.choices))
-        ]
-        return parse_json_response_with_scores(
-            contents[0], default_additional_questions
-        )
+
+    def reset_usage_stats(self) -> None:
+        self._usage_stats = new_usage_stats()
 
     def build_executor_messages(
         self,
@@ -240,7 +789,7 @@ class BaseProcessor(object):
             ),
         }
 
-    def ask(
+    def _prepare_executor_call(
         self,
         query: str,
         text: Optional[str] = None,
@@ -253,9 +802,8 @@ class BaseProcessor(object):
         video_path: Optional[str] = None,
         api_manager: Any = None,
         phase: str = 'initial',
-        *args: Any,
-        **kwargs: Any,
-    ) -> Chunk:
+    ) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        """Build the executor prompt and messages shared by ``ask`` and ``aask``."""
         executor_content = self._build_executor_content(
             query=query,
             text=text,
@@ -290,16 +838,16 @@ class BaseProcessor(object):
             video_path=video_path,
             api_manager=api_manager,
         )
-        if executor_messages is None:
-            return None
+        return executor_content, executor_messages
 
-        default_qs = []
-        executor_output = self.ask_executor(
-            messages=executor_messages,
-            default_additional_questions=default_qs,
-        )
-
-        # Handle different phases
+    def _build_phase_chunk(
+        self,
+        query: str,
+        executor_output: Dict[str, Any],
+        executor_content: str,
+        phase: str = 'initial',
+    ) -> Optional[Chunk]:
+        """Turn executor output into the chunk expected by ``phase``."""
         if phase == 'link_form':
             # Need response + relevance for link_form
             response = executor_output.get('response', '')
@@ -314,6 +862,7 @@ class BaseProcessor(object):
                 weight=relevance,
                 additional_questions=[],
                 executor_content=executor_content,
+                model=executor_output.get('model', self.model),
             )
         elif phase == 'fuse':
             # Only need response for fuse
@@ -330,6 +879,7 @@ class BaseProcessor(object):
                 weight=0.0,
                 additional_questions=[],
                 executor_content=executor_content,
+                model=executor_output.get('model', self.model),
             )
 
         # Initial phase - full processing
@@ -352,8 +902,111 @@ class BaseProcessor(object):
             additional_questions=additional_questions,
             executor_content=executor_content,
         )
+        chunk.model = executor_output.get('model', self.model)
         return chunk
 
+    def ask(
+        self,
+        query: str,
+        text: Optional[str] = None,
+        image: Optional[np.uint8] = None,
+        image_path: Optional[str] = None,
+        audio: Optional[NDArray[np.float32]] = None,
+        audio_path: Optional[str] = None,
+        video_frames: Optional[List[NDArray[np.uint8]]] = None,
+        video_frames_path: Optional[List[str]] = None,
+        video_path: Optional[str] = None,
+        api_manager: Any = None,
+        phase: str = 'initial',
+        *args: Any,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Chunk:
+        executor_content, executor_messages = self._prepare_executor_call(
+            query=query,
+            text=text,
+            image=image,
+            image_path=image_path,
+            audio=audio,
+            audio_path=audio_path,
+            video_frames=video_frames,
+            video_frames_path=video_frames_path,
+            video_path=video_path,
+            api_manager=api_manager,
+            phase=phase,
+        )
+        if executor_messages is None:
+            return None
+
+        default_qs = []
+        executor_output = self.ask_executor(
+            messages=executor_messages,
+            default_additional_questions=default_qs,
+            phase=phase,
+            deadline=deadline,
+        )
+        return self._build_phase_chunk(
+            query, executor_output, executor_content, phase=phase
+        )
+
+    async def aask(
+        self,
+        query: str,
+        text: Optional[str] = None,
+        image: Optional[np.uint8] = None,
+        image_path: Optional[str] = None,
+        audio: Optional[NDArray[np.float32]] = None,
+        audio_path: Optional[str] = None,
+        video_frames: Optional[List[NDArray[np.uint8]]] = None,
+        video_frames_path: Optional[List[str]] = None,
+        video_path: Optional[str] = None,
+        api_manager: Any = None,
+        phase: str = 'initial',
+        *args: Any,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Chunk:
+        """Async counterpart of :meth:`ask` built on :meth:`LLMBackend.acomplete`.
+
+        Processors that override ``ask`` with a custom flow (tool, search,
+        math, web-agent, ...) have no native async path; their ``ask`` is run
+        in a worker thread instead so callers can still ``await`` them.
+        """
+        inputs = {
+            'text': text,
+            'image': image,
+            'image_path': image_path,
+            'audio': audio,
+            'audio_path': audio_path,
+            'video_frames': video_frames,
+            'video_frames_path': video_frames_path,
+            'video_path': video_path,
+            'api_manager': api_manager,
+            'phase': phase,
+        }
+        if type(self).ask is not BaseProcessor.ask:
+            return await asyncio.to_thread(
+                self.ask, query, *args, **inputs, deadline=deadline, **kwargs
+            )
+
+        # Message building may read and encode large media files; keep it off
+        # the event loop.
+        executor_content, executor_messages = await asyncio.to_thread(
+            self._prepare_executor_call, query, **inputs
+        )
+        if executor_messages is None:
+            return None
+
+        executor_output = await self.ask_executor_async(
+            messages=executor_messages,
+            default_additional_questions=[],
+            phase=phase,
+            deadline=deadline,
+        )
+        return self._build_phase_chunk(
+            query, executor_output, executor_content, phase=phase
+        )
+
     def get_memory_info(self) -> Tuple[int, int]:
         return {
             'all_history': self.all_context_history,
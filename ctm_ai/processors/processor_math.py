@@ -2,9 +2,9 @@ import os
 from typing import Any, Dict, List, Optional
 
 import requests
-from litellm import completion
 
 from ..chunks import Chunk
+from ..utils import with_deadline_timeout
 from .processor_base import BaseProcessor
 from .utils import parse_json_response_with_scores
 
@@ -139,7 +139,9 @@ Based on the Wolfram|Alpha result above, please:
     def _ask_for_structured_output(
         self, prompt: str, *args: Any, **kwargs: Any
     ) -> Dict[str, Any]:
-        """Get structured output with self-evaluation scores using litellm."""
+        """Get structured output with self-evaluation scores from the LLM backend."""
+        deadline = kwargs.pop('deadline', None)
+        phase = kwargs.pop('phase', None)
         call_kwargs = {
             **self._completion_kwargs,
             'messages': [{'role': 'user', 'content': prompt}],
@@ -148,7 +150,8 @@ Based on the Wolfram|Alpha result above, please:
             'temperature': self.temperature,
             **kwargs,
         }
-        response = completion(**call_kwargs)
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, phase)
 
         content = response.choices[0].message.content
 
@@ -2,7 +2,6 @@ import base64
 import io
 from typing import Any, Dict, List, Optional
 
-from ..utils import load_image
 from .processor_base import BaseProcessor
 from .processor_webagent_base import WebAgentBaseProcessor
 from .prompts.webagent_prompts import (
@@ -53,12 +52,18 @@ class ScreenshotProcessor(WebAgentBaseProcessor):
         if not screenshot_b64 and not image_path and image is None:
             return None
 
-        if screenshot_b64:
-            base64_image = screenshot_b64
-        elif image_path:
-            base64_image = load_image(image_path)
+        if image_path and not screenshot_b64:
+            image_url = self.media_data_url(image_path, 'image/jpeg')
         else:
-            base64_image = _pil_to_base64(image)
+            if self.media_preprocess is not None:
+                base64_image = self.media_preprocess.image_base64(
+                    screenshot_b64 or image, self.provider
+                )
+            elif screenshot_b64:
+                base64_image = screenshot_b64
+            else:
+                base64_image = _pil_to_base64(image)
+            image_url = f'data:image/jpeg;base64,{base64_image}'
 
         system_prompt = self.system_prompt or SCREENSHOT_SYSTEM_PROMPT
 
@@ -66,10 +71,7 @@ class ScreenshotProcessor(WebAgentBaseProcessor):
             'role': 'user',
             'content': [
                 {'type': 'text', 'text': query},
-                {
-                    'type': 'image_url',
-                    'image_url': {'url': f'data:image/jpeg;base64,{base64_image}'},
-                },
+                {'type': 'image_url', 'image_url': {'url': image_url}},
             ],
         }
         return [
@@ -1,9 +1,12 @@
 from typing import Any, Dict, List, Optional
 
-from litellm import completion
-
 from ..chunks import Chunk
-from ..utils import logger
+from ..utils import (
+    acquire_rate_limit,
+    api_key_lease,
+    logger,
+    with_deadline_timeout,
+)
 from .processor_base import BaseProcessor
 from .utils import parse_json_response_with_scores
 
@@ -48,7 +51,6 @@ class SearchProcessor(BaseProcessor):
         from google import genai
         from google.genai import types
 
-        client = genai.Client()
         grounding_tool = types.Tool(google_search=types.GoogleSearch())
 
         system_instruction = (
@@ -60,12 +62,23 @@ class SearchProcessor(BaseProcessor):
             tools=[grounding_tool], system_instruction=system_instruction
         )
 
-        search_response = client.models.generate_content(
-            model='gemini-2.5-flash-lite',
-            contents=query_with_context,
-            config=config,
+        # The grounding call bypasses the LLM backend but draws on the same
+        # Gemini quota and key pool.
+        grounding_model = 'gemini/gemini-2.5-flash-lite'
+        acquire_rate_limit(
+            grounding_model,
+            {'messages': [{'role': 'user', 'content': query_with_context}]},
         )
 
+        with api_key_lease(grounding_model, {}) as lease:
+            client = genai.Client(api_key=lease.key) if lease.key else genai.Client()
+            search_response = client.models.generate_content(
+                model='gemini-2.5-flash-lite',
+                contents=query_with_context,
+                config=config,
+            )
+            lease.record(search_response)
+
         return search_response.text
 
     def _llm_search_fallback(self, query: str, query_with_context: str) -> str:
@@ -76,15 +89,16 @@ class SearchProcessor(BaseProcessor):
             f'Use your knowledge to answer as accurately as possible.'
         )
 
-        response = completion(
+        call_kwargs = {
             **self._completion_kwargs,
-            messages=[
+            'messages': [
                 {'role': 'system', 'content': system_instruction},
                 {'role': 'user', 'content': query_with_context},
             ],
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-        )
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+        }
+        response = self._call_llm(call_kwargs, 'search')
 
         return response.choices[0].message.content
 
@@ -188,7 +202,9 @@ Based on the search result above, please:
     def _ask_for_structured_output(
         self, prompt: str, *args: Any, **kwargs: Any
     ) -> Dict[str, Any]:
-        """Get structured output with self-evaluation scores using litellm."""
+        """Get structured output with self-evaluation scores from the LLM backend."""
+        deadline = kwargs.pop('deadline', None)
+        phase = kwargs.pop('phase', None)
         call_kwargs = {
             **self._completion_kwargs,
             'messages': [{'role': 'user', 'content': prompt}],
@@ -197,7 +213,8 @@ Based on the search result above, please:
             'temperature': self.temperature,
             **kwargs,
         }
-        response = completion(**call_kwargs)
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, phase)
 
         content = response.choices[0].message.content
 
@@ -10,7 +10,6 @@ import json
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-from litellm import completion
 from numpy.typing import NDArray
 
 from ..chunks import Chunk
@@ -154,7 +153,8 @@ class ToolProcessor(BaseProcessor):
             'tools': tools,
             'tool_choice': 'auto',
         }
-        return completion(**call_kwargs)
+        response = self._call_llm(call_kwargs, 'tool_call')
+        return response
 
     def _tool_decision_and_execute(
         self,
@@ -309,6 +309,8 @@ class ToolProcessor(BaseProcessor):
         stage2_output = self.ask_executor(
             messages=[{'role': 'user', 'content': stage2_prompt}],
             default_additional_questions=default_qs,
+            phase=phase,
+            deadline=kwargs.get('deadline'),
         )
 
         # ── Build Chunk based on phase ──
@@ -3,23 +3,29 @@ import os
 import subprocess
 from typing import Any, Dict, List
 
+from ..utils import cached_base64, get_media_cache
 from .processor_base import BaseProcessor
 
 # Qwen VL API rejects videos shorter than ~4s with "video file is too short".
 # For shorter clips we fall back to sending extracted frames as images.
 _QWEN_MIN_VIDEO_DURATION_SEC = 4.0
 _QWEN_FALLBACK_NUM_FRAMES = 4
+_MAX_INLINE_VIDEO_BYTES = 20 * 1024 * 1024  # inline data limit
 
 
 def load_video_as_base64(video_path: str) -> str:
-    """Load video file and convert to base64 string."""
-    with open(video_path, 'rb') as video_file:
-        video_bytes = video_file.read()
-    return base64.b64encode(video_bytes).decode('utf-8')
+    """Load video file as a base64 string, through the shared media cache."""
+    return cached_base64(video_path)
 
 
 def _get_video_duration(video_path: str) -> float:
     """Return video duration in seconds, or -1.0 on failure."""
+    return get_media_cache().get_or_encode(
+        video_path, 'duration', lambda: _probe_video_duration(video_path)
+    )
+
+
+def _probe_video_duration(video_path: str) -> float:
     try:
         result = subprocess.run(
             [
@@ -33,48 +39,65 @@ def _get_video_duration(video_path: str) -> float:
         return -1.0
 
 
+def _split_jpeg_stream(data: bytes) -> List[bytes]:
+    """Split concatenated JPEGs (ffmpeg ``image2pipe`` output) into images."""
+    images: List[bytes] = []
+    start = data.find(b'\xff\xd8')
+    while start != -1:
+        end = data.find(b'\xff\xd9', start + 2)
+        if end == -1:
+            break
+        images.append(data[start : end + 2])
+        start = data.find(b'\xff\xd8', end + 2)
+    return images
+
+
+def _pipe_jpeg_frames(args: List[str]) -> List[bytes]:
+    """Run one ffmpeg process and read the JPEGs it writes to stdout."""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', *args, '-q:v', '5',
+             '-f', 'image2pipe', '-c:v', 'mjpeg', 'pipe:1'],
+            capture_output=True, timeout=30,
+        )
+    except Exception:
+        return []
+    return _split_jpeg_stream(result.stdout)
+
+
 def _extract_frames_as_base64(
     video_path: str, num_frames: int = _QWEN_FALLBACK_NUM_FRAMES
 ) -> List[str]:
-    """Extract evenly-spaced frames from video as base64 JPEG strings."""
+    """Extract evenly-spaced frames from video as base64 JPEG strings.
+
+    Cached per (video, num_frames) in the shared media cache.
+    """
+    return get_media_cache().get_or_encode(
+        video_path,
+        f'jpeg_frames_{num_frames}',
+        lambda: _decode_frames(video_path, num_frames),
+    )
+
+
+def _decode_frames(video_path: str, num_frames: int) -> List[str]:
     duration = _get_video_duration(video_path)
     if duration <= 0:
         duration = 1.0
     actual_frames = max(1, min(num_frames, int(duration / 0.1) or 1))
 
-    frames_b64: List[str] = []
-    for i in range(actual_frames):
-        t = duration * (i + 0.5) / actual_frames
-        t = max(0.0, min(t, max(0.0, duration - 0.01)))
-        tmp = f'/tmp/ctm_qwen_frame_{os.getpid()}_{i}.jpg'
-        try:
-            subprocess.run(
-                ['ffmpeg', '-y', '-ss', str(t), '-i', video_path,
-                 '-vframes', '1', '-q:v', '5', tmp],
-                capture_output=True, timeout=10,
-            )
-            if os.path.exists(tmp):
-                with open(tmp, 'rb') as f:
-                    frames_b64.append(base64.b64encode(f.read()).decode('utf-8'))
-                os.remove(tmp)
-        except Exception:
-            continue
-
+    # One ffmpeg pass: seek to the first frame's midpoint, then keep one frame
+    # per 1/actual_frames of the clip, streamed as JPEGs over stdout.
+    frames = _pipe_jpeg_frames(
+        [
+            '-ss', f'{duration / actual_frames / 2:.3f}', '-i', video_path,
+            '-vf', f'fps={actual_frames}/{duration:.3f}',
+            '-frames:v', str(actual_frames),
+        ]
+    )
     # Last-ditch fallback: grab the very first frame
-    if not frames_b64:
-        tmp = f'/tmp/ctm_qwen_frame_{os.getpid()}_fallback.jpg'
-        try:
-            subprocess.run(
-                ['ffmpeg', '-y', '-i', video_path, '-vframes', '1', '-q:v', '5', tmp],
-                capture_output=True, timeout=10,
-            )
-            if os.path.exists(tmp):
-                with open(tmp, 'rb') as f:
-                    frames_b64.append(base64.b64encode(f.read()).decode('utf-8'))
-                os.remove(tmp)
-        except Exception:
-            pass
-    return frames_b64
+    if not frames:
+        frames = _pipe_jpeg_frames(['-i', video_path, '-frames:v', '1'])
+    return [base64.b64encode(frame).decode('utf-8') for frame in frames]
 
 
 @BaseProcessor.register_processor('video_processor')
@@ -96,16 +119,6 @@ class VideoProcessor(BaseProcessor):
         if not os.path.exists(video_path):
             raise FileNotFoundError(f'Video file not found: {video_path}')
 
-        # Check file size (inline data limit is 20MB)
-        file_size = os.path.getsize(video_path)
-        max_size = 20 * 1024 * 1024  # 20MB in bytes
-        if file_size > max_size:
-            raise ValueError(
-                f'Video file size ({file_size / 1024 / 1024:.2f}MB) exceeds '
-                f'the 20MB limit for inline video data. '
-                f'Please use a smaller video file.'
-            )
-
         # Detect MIME type from file extension
         ext = os.path.splitext(video_path)[1].lower()
         mime_type_map = {
@@ -121,6 +134,11 @@ class VideoProcessor(BaseProcessor):
         }
         mime_type = mime_type_map.get(ext, 'video/mp4')
 
+        # An uploaded file is referenced by URI and has no inline size limit
+        uploaded_block = self.uploaded_media_block(video_path, mime_type)
+        if uploaded_block is not None:
+            return self.build_media_messages([uploaded_block], f'{query}\n')
+
         # Build video content block based on provider
         if self.provider == 'qwen':
             # Qwen VL needs videos to be long enough. For very short clips,
@@ -137,42 +155,41 @@ class VideoProcessor(BaseProcessor):
                 ]
                 if not media_content_blocks:
                     # Frame extraction failed – fall back to sending the video.
-                    base64_video = load_video_as_base64(video_path)
                     media_content_blocks = [{
                         'type': 'video_url',
                         'video_url': {
-                            'url': f'data:{mime_type};base64,{base64_video}'
+                            'url': self._inline_video_url(video_path, mime_type)
                         },
                     }]
             else:
-                base64_video = load_video_as_base64(video_path)
                 media_content_blocks = [{
                     'type': 'video_url',
-                    'video_url': {
-                        'url': f'data:{mime_type};base64,{base64_video}'
-                    },
+                    'video_url': {'url': self._inline_video_url(video_path, mime_type)},
                 }]
         else:
             # Gemini via litellm uses image_url type for video
-            base64_video = load_video_as_base64(video_path)
             media_content_blocks = [{
                 'type': 'image_url',
-                'image_url': {
-                    'url': f'data:{mime_type};base64,{base64_video}'
-                },
+                'image_url': {'url': self._inline_video_url(video_path, mime_type)},
             }]
 
-        video_message = {
-            'role': 'user',
-            'content': [
-                {'type': 'text', 'text': f'{query}\n'},
-                *media_content_blocks,
-            ],
-        }
+        # Media precede the query so the system prompt + video form a prefix
+        # that stays the same across phases and can be cached by the provider.
+        return self.build_media_messages(media_content_blocks, f'{query}\n')
 
-        all_messages = [
-            {'role': 'system', 'content': self.system_prompt},
-            video_message,
-        ]
+    def _inline_video_url(self, video_path: str, mime_type: str) -> str:
+        """Inline ``data:`` URL of the video, after ``media_preprocess``.
 
-        return all_messages
+        The 20MB inline data limit applies to the bytes actually sent, so a
+        large file that preprocessing shrinks below it is accepted.
+        """
+        url = self.media_data_url(video_path, mime_type)
+        payload = url.split(',', 1)[1]
+        size = len(payload) * 3 // 4 - payload[-2:].count('=')
+        if size > _MAX_INLINE_VIDEO_BYTES:
+            raise ValueError(
+                f'Video data size ({size / 1024 / 1024:.2f}MB) exceeds '
+                f'the 20MB limit for inline video data. '
+                f'Enable media_uploads or use a smaller video file.'
+            )
+        return url
@@ -2,7 +2,6 @@ import base64
 import io
 from typing import Any, Dict, List
 
-from ..utils import load_image
 from .processor_base import BaseProcessor
 
 
@@ -27,29 +26,17 @@ class VisionProcessor(BaseProcessor):
         if not image_path and not image:
             return None
         if image_path:
-            base64_image = load_image(image_path)
+            image_url = self.media_data_url(image_path, 'image/jpeg')
         if image:
-            base64_image = pil_to_base64(image)
+            if self.media_preprocess is not None:
+                base64_image = self.media_preprocess.image_base64(image, self.provider)
+            else:
+                base64_image = pil_to_base64(image)
+            image_url = f'data:image/jpeg;base64,{base64_image}'
 
         # Use system_prompt from config if provided, otherwise use default
         if not self.system_prompt:
             self.system_prompt = 'You are an expert in image understanding. Your task is to analyze the provided image and answer questions about it.'
 
-        all_messages = [{'role': 'system', 'content': self.system_prompt}]
-
-        image_message = {
-            'role': 'user',
-            'content': [
-                {
-                    'type': 'text',
-                    'text': f'{query}\n',
-                },
-                {
-                    'type': 'image_url',
-                    'image_url': {'url': f'data:image/jpeg;base64,{base64_image}'},
-                },
-            ],
-        }
-        all_messages.append(image_message)
-
-        return all_messages
+        image_block = {'type': 'image_url', 'image_url': {'url': image_url}}
+        return self.build_media_messages([image_block], f'{query}\n')
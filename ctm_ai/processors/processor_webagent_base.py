@@ -1,10 +1,9 @@
 from typing import Any, Dict, List, Optional
 
 import numpy as np
-from litellm import completion
 
 from ..chunks import Chunk
-from ..utils import message_exponential_backoff
+from ..utils import Deadline, message_exponential_backoff, with_deadline_timeout
 from .processor_base import BaseProcessor
 from .prompts.webagent_prompts import parse_webagent_response
 
@@ -142,6 +141,8 @@ class WebAgentBaseProcessor(BaseProcessor):
         messages: List[Dict[str, Any]],
         default_additional_questions: Optional[List[str]] = None,
         *args: Any,
+        phase: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         call_kwargs = {
@@ -151,9 +152,14 @@ class WebAgentBaseProcessor(BaseProcessor):
             'n': self.return_num,
             **kwargs,
         }
-        response = completion(**call_kwargs)
-        content = response.choices[0].message.content
-        return parse_webagent_response(content, default_additional_questions)
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        model, call_kwargs = self._route_call(call_kwargs)
+        content = self._complete(
+            call_kwargs, phase=phase, model=model, deadline=deadline
+        )[0]
+        output = parse_webagent_response(content, default_additional_questions)
+        output['model'] = model
+        return output
 
     # ------------------------------------------------------------------
     # Memory — store reasoning + action so next iteration has full context
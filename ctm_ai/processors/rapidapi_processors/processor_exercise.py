@@ -1,13 +1,19 @@
 import asyncio
+import functools
 import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from litellm import completion
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 from ...chunks import Chunk
+from ...utils import (
+    Deadline,
+    DeadlineExceeded,
+    get_llm_backend,
+    with_deadline_timeout,
+)
 from ..processor_base import BaseProcessor
 
 # Prompt for generating Exercise search query
@@ -32,8 +38,17 @@ Additional Information: {history_info}
 class ExerciseMCPAgent:
     """ExerciseDB MCP Agent for finding exercises by body part, muscle, or equipment"""
 
-    def __init__(self, rapidapi_key: str, model: str = 'gpt-4o-mini'):
+    def __init__(
+        self,
+        rapidapi_key: str,
+        model: str = 'gpt-4o-mini',
+        acomplete: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    ):
         self.model = model
+        # Completions of the tool loop; processors pass their metered _acall_llm.
+        self.acomplete = acomplete or (
+            lambda call_kwargs: get_llm_backend().acomplete(**call_kwargs)
+        )
         self.rapidapi_key = rapidapi_key
         self.session: Optional[ClientSession] = None
         self.tools: List[Dict] = []
@@ -103,17 +118,14 @@ When listing multiple exercises, organize them clearly by category."""
         return ''
 
     async def run(self, prompt: str) -> str:
-        from litellm import acompletion
-
         messages = [
             {'role': 'system', 'content': self.system_prompt},
             {'role': 'user', 'content': prompt},
         ]
         tools = self._get_tools_for_llm()
 
-        response = await acompletion(
-            model=self.model, messages=messages, tools=tools, tool_choice='auto'
-        )
+        call_kwargs = {'model': self.model, 'tools': tools, 'tool_choice': 'auto'}
+        response = await self.acomplete({**call_kwargs, 'messages': messages})
 
         assistant_message = response.choices[0].message
 
@@ -144,9 +156,7 @@ When listing multiple exercises, organize them clearly by category."""
                     {'role': 'tool', 'tool_call_id': tc.id, 'content': result[:10000]}
                 )
 
-            response = await acompletion(
-                model=self.model, messages=messages, tools=tools, tool_choice='auto'
-            )
+            response = await self.acomplete({**call_kwargs, 'messages': messages})
             assistant_message = response.choices[0].message
 
         return assistant_message.content or ''
@@ -181,7 +191,9 @@ class ExerciseProcessor(BaseProcessor):
 
         return content
 
-    def _generate_exercise_query(self, query: str) -> str:
+    def _generate_exercise_query(
+        self, query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 1: Generate a concise exercise search query."""
         history_info = self._build_history_info()
 
@@ -190,42 +202,61 @@ class ExerciseProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=100,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 100,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, 'api_query')
 
         exercise_query = response.choices[0].message.content.strip()
         exercise_query = exercise_query.strip('"\'')
         return exercise_query[:50]
 
-    async def _call_exercise_mcp_async(self, exercise_query: str) -> str:
+    async def _call_exercise_mcp_async(
+        self, exercise_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """MCP Call: Use ExerciseMCPAgent to search for exercises."""
-        try:
+
+        async def run() -> str:
             async with ExerciseMCPAgent(
-                rapidapi_key=self.rapidapi_key, model=self.exercise_model
+                rapidapi_key=self.rapidapi_key,
+                model=self.exercise_model,
+                acomplete=functools.partial(
+                    self._acall_llm, phase='mcp', model=self.exercise_model
+                ),
             ) as agent:
                 return await agent.run(exercise_query)
+
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            return 'Error calling Exercise MCP: deadline reached'
         except Exception as e:
             return f'Error calling Exercise MCP: {str(e)}'
 
-    def _call_exercise_mcp(self, exercise_query: str) -> str:
+    def _call_exercise_mcp(
+        self, exercise_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """Sync wrapper for async MCP call."""
         try:
-            return asyncio.run(self._call_exercise_mcp_async(exercise_query))
+            return asyncio.run(self._call_exercise_mcp_async(exercise_query, deadline))
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 return loop.run_until_complete(
-                    self._call_exercise_mcp_async(exercise_query)
+                    self._call_exercise_mcp_async(exercise_query, deadline)
                 )
             finally:
                 loop.close()
 
-    def _generate_additional_question(self, query: str, response: str) -> str:
+    def _generate_additional_question(
+        self, query: str, response: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 2: Generate additional question based on Exercise response."""
         history_info = self._build_history_info()
 
@@ -235,12 +266,14 @@ class ExerciseProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        llm_response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=200,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 200,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        llm_response = self._call_llm(call_kwargs, 'additional_question')
 
         return llm_response.choices[0].message.content.strip()
 
@@ -257,24 +290,32 @@ class ExerciseProcessor(BaseProcessor):
         1. LLM Call 1: query + history → Exercise search query
         2. MCP Call: search for exercises
         3. LLM Call 2: response + history → additional question
+
+        Each step is bounded by the forward ``deadline``; once it passes the
+        processor gives no answer.
         """
         clean_query = query
+        deadline = kwargs.get('deadline')
 
-        # Step 1: LLM Call - Generate exercise search query
-        exercise_query = self._generate_exercise_query(query)
-        print(f'[ExerciseProcessor] Generated search query: {exercise_query}')
+        try:
+            # Step 1: LLM Call - Generate exercise search query
+            exercise_query = self._generate_exercise_query(query, deadline)
+            print(f'[ExerciseProcessor] Generated search query: {exercise_query}')
 
-        # Step 2: MCP Call - Get exercise data
-        exercise_response = self._call_exercise_mcp(exercise_query)
+            # Step 2: MCP Call - Get exercise data
+            exercise_response = self._call_exercise_mcp(exercise_query, deadline)
 
-        if exercise_response.startswith('Error calling Exercise MCP:'):
-            print(f'[ExerciseProcessor] {exercise_response}')
-            return None
+            if exercise_response.startswith('Error calling Exercise MCP:'):
+                print(f'[ExerciseProcessor] {exercise_response}')
+                return None
 
-        # Step 3: LLM Call - Generate additional question
-        additional_question = self._generate_additional_question(
-            clean_query, exercise_response
-        )
+            # Step 3: LLM Call - Generate additional question
+            additional_question = self._generate_additional_question(
+                clean_query, exercise_response, deadline
+            )
+        except DeadlineExceeded:
+            print('[ExerciseProcessor] Deadline reached; no answer')
+            return None
 
         executor_output = {
             'response': exercise_response,
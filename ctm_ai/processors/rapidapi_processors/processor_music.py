@@ -1,13 +1,19 @@
 import asyncio
+import functools
 import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from litellm import completion
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 from ...chunks import Chunk
+from ...utils import (
+    Deadline,
+    DeadlineExceeded,
+    get_llm_backend,
+    with_deadline_timeout,
+)
 from ..processor_base import BaseProcessor
 
 # Prompt for generating Music search query
@@ -32,8 +38,17 @@ Additional Information: {history_info}
 class MusicMCPAgent:
     """Spotify/Music API MCP Agent for songs, albums, playlists, and artists"""
 
-    def __init__(self, rapidapi_key: str, model: str = 'gpt-4o-mini'):
+    def __init__(
+        self,
+        rapidapi_key: str,
+        model: str = 'gpt-4o-mini',
+        acomplete: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    ):
         self.model = model
+        # Completions of the tool loop; processors pass their metered _acall_llm.
+        self.acomplete = acomplete or (
+            lambda call_kwargs: get_llm_backend().acomplete(**call_kwargs)
+        )
         self.rapidapi_key = rapidapi_key
         self.session: Optional[ClientSession] = None
         self.tools: List[Dict] = []
@@ -110,17 +125,14 @@ When presenting search results, organize them clearly by type (songs, albums, ar
         return ''
 
     async def run(self, prompt: str) -> str:
-        from litellm import acompletion
-
         messages = [
             {'role': 'system', 'content': self.system_prompt},
             {'role': 'user', 'content': prompt},
         ]
         tools = self._get_tools_for_llm()
 
-        response = await acompletion(
-            model=self.model, messages=messages, tools=tools, tool_choice='auto'
-        )
+        call_kwargs = {'model': self.model, 'tools': tools, 'tool_choice': 'auto'}
+        response = await self.acomplete({**call_kwargs, 'messages': messages})
 
         assistant_message = response.choices[0].message
 
@@ -151,9 +163,7 @@ When presenting search results, organize them clearly by type (songs, albums, ar
                     {'role': 'tool', 'tool_call_id': tc.id, 'content': result[:10000]}
                 )
 
-            response = await acompletion(
-                model=self.model, messages=messages, tools=tools, tool_choice='auto'
-            )
+            response = await self.acomplete({**call_kwargs, 'messages': messages})
             assistant_message = response.choices[0].message
 
         return assistant_message.content or ''
@@ -188,7 +198,9 @@ class MusicProcessor(BaseProcessor):
 
         return content
 
-    def _generate_music_query(self, query: str) -> str:
+    def _generate_music_query(
+        self, query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 1: Generate a concise music search query."""
         history_info = self._build_history_info()
 
@@ -197,40 +209,61 @@ class MusicProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=100,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 100,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, 'api_query')
 
         music_query = response.choices[0].message.content.strip()
         music_query = music_query.strip('"\'')
         return music_query[:50]
 
-    async def _call_music_mcp_async(self, music_query: str) -> str:
+    async def _call_music_mcp_async(
+        self, music_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """MCP Call: Use MusicMCPAgent to search for music content."""
-        try:
+
+        async def run() -> str:
             async with MusicMCPAgent(
-                rapidapi_key=self.rapidapi_key, model=self.music_model
+                rapidapi_key=self.rapidapi_key,
+                model=self.music_model,
+                acomplete=functools.partial(
+                    self._acall_llm, phase='mcp', model=self.music_model
+                ),
             ) as agent:
                 return await agent.run(music_query)
+
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            return 'Error calling Music MCP: deadline reached'
         except Exception as e:
             return f'Error calling Music MCP: {str(e)}'
 
-    def _call_music_mcp(self, music_query: str) -> str:
+    def _call_music_mcp(
+        self, music_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """Sync wrapper for async MCP call."""
         try:
-            return asyncio.run(self._call_music_mcp_async(music_query))
+            return asyncio.run(self._call_music_mcp_async(music_query, deadline))
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                return loop.run_until_complete(self._call_music_mcp_async(music_query))
+                return loop.run_until_complete(
+                    self._call_music_mcp_async(music_query, deadline)
+                )
             finally:
                 loop.close()
 
-    def _generate_additional_question(self, query: str, response: str) -> str:
+    def _generate_additional_question(
+        self, query: str, response: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 2: Generate additional question based on Music response."""
         history_info = self._build_history_info()
 
@@ -240,12 +273,14 @@ class MusicProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        llm_response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=200,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 200,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        llm_response = self._call_llm(call_kwargs, 'additional_question')
 
         return llm_response.choices[0].message.content.strip()
 
@@ -262,24 +297,32 @@ class MusicProcessor(BaseProcessor):
         1. LLM Call 1: query + history → Music search query
         2. MCP Call: search for music content
         3. LLM Call 2: response + history → additional question
+
+        Each step is bounded by the forward ``deadline``; once it passes the
+        processor gives no answer.
         """
         clean_query = query
+        deadline = kwargs.get('deadline')
 
-        # Step 1: LLM Call - Generate music search query
-        music_query = self._generate_music_query(query)
-        print(f'[MusicProcessor] Generated search query: {music_query}')
+        try:
+            # Step 1: LLM Call - Generate music search query
+            music_query = self._generate_music_query(query, deadline)
+            print(f'[MusicProcessor] Generated search query: {music_query}')
 
-        # Step 2: MCP Call - Get music data
-        music_response = self._call_music_mcp(music_query)
+            # Step 2: MCP Call - Get music data
+            music_response = self._call_music_mcp(music_query, deadline)
 
-        if music_response.startswith('Error calling Music MCP:'):
-            print(f'[MusicProcessor] {music_response}')
-            return None
+            if music_response.startswith('Error calling Music MCP:'):
+                print(f'[MusicProcessor] {music_response}')
+                return None
 
-        # Step 3: LLM Call - Generate additional question
-        additional_question = self._generate_additional_question(
-            clean_query, music_response
-        )
+            # Step 3: LLM Call - Generate additional question
+            additional_question = self._generate_additional_question(
+                clean_query, music_response, deadline
+            )
+        except DeadlineExceeded:
+            print('[MusicProcessor] Deadline reached; no answer')
+            return None
 
         executor_output = {
             'response': music_response,
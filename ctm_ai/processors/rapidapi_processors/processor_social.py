@@ -1,13 +1,19 @@
 import asyncio
+import functools
 import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from litellm import completion
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 from ...chunks import Chunk
+from ...utils import (
+    Deadline,
+    DeadlineExceeded,
+    get_llm_backend,
+    with_deadline_timeout,
+)
 from ..processor_base import BaseProcessor
 
 # Prompt for generating Social search query
@@ -32,8 +38,17 @@ Additional Information: {history_info}
 class SocialMCPAgent:
     """Social Links Search MCP Agent for finding social media profiles"""
 
-    def __init__(self, rapidapi_key: str, model: str = 'gpt-4o-mini'):
+    def __init__(
+        self,
+        rapidapi_key: str,
+        model: str = 'gpt-4o-mini',
+        acomplete: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    ):
         self.model = model
+        # Completions of the tool loop; processors pass their metered _acall_llm.
+        self.acomplete = acomplete or (
+            lambda call_kwargs: get_llm_backend().acomplete(**call_kwargs)
+        )
         self.rapidapi_key = rapidapi_key
         self.session: Optional[ClientSession] = None
         self.tools: List[Dict] = []
@@ -97,17 +112,14 @@ You can search for profiles on Facebook, TikTok, Instagram, Snapchat, Twitter, L
         return ''
 
     async def run(self, prompt: str) -> str:
-        from litellm import acompletion
-
         messages = [
             {'role': 'system', 'content': self.system_prompt},
             {'role': 'user', 'content': prompt},
         ]
         tools = self._get_tools_for_llm()
 
-        response = await acompletion(
-            model=self.model, messages=messages, tools=tools, tool_choice='auto'
-        )
+        call_kwargs = {'model': self.model, 'tools': tools, 'tool_choice': 'auto'}
+        response = await self.acomplete({**call_kwargs, 'messages': messages})
 
         assistant_message = response.choices[0].message
 
@@ -138,9 +150,7 @@ You can search for profiles on Facebook, TikTok, Instagram, Snapchat, Twitter, L
                     {'role': 'tool', 'tool_call_id': tc.id, 'content': result[:10000]}
                 )
 
-            response = await acompletion(
-                model=self.model, messages=messages, tools=tools, tool_choice='auto'
-            )
+            response = await self.acomplete({**call_kwargs, 'messages': messages})
             assistant_message = response.choices[0].message
 
         return assistant_message.content or ''
@@ -175,7 +185,9 @@ class SocialProcessor(BaseProcessor):
 
         return content
 
-    def _generate_social_query(self, query: str) -> str:
+    def _generate_social_query(
+        self, query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 1: Generate a concise social profile search query."""
         history_info = self._build_history_info()
 
@@ -184,42 +196,61 @@ class SocialProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=100,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 100,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, 'api_query')
 
         social_query = response.choices[0].message.content.strip()
         social_query = social_query.strip('"\'')
         return social_query[:50]
 
-    async def _call_social_mcp_async(self, social_query: str) -> str:
+    async def _call_social_mcp_async(
+        self, social_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """MCP Call: Use SocialMCPAgent to search for social profiles."""
-        try:
+
+        async def run() -> str:
             async with SocialMCPAgent(
-                rapidapi_key=self.rapidapi_key, model=self.social_model
+                rapidapi_key=self.rapidapi_key,
+                model=self.social_model,
+                acomplete=functools.partial(
+                    self._acall_llm, phase='mcp', model=self.social_model
+                ),
             ) as agent:
                 return await agent.run(social_query)
+
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            return 'Error calling Social MCP: deadline reached'
         except Exception as e:
             return f'Error calling Social MCP: {str(e)}'
 
-    def _call_social_mcp(self, social_query: str) -> str:
+    def _call_social_mcp(
+        self, social_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """Sync wrapper for async MCP call."""
         try:
-            return asyncio.run(self._call_social_mcp_async(social_query))
+            return asyncio.run(self._call_social_mcp_async(social_query, deadline))
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 return loop.run_until_complete(
-                    self._call_social_mcp_async(social_query)
+                    self._call_social_mcp_async(social_query, deadline)
                 )
             finally:
                 loop.close()
 
-    def _generate_additional_question(self, query: str, response: str) -> str:
+    def _generate_additional_question(
+        self, query: str, response: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 2: Generate additional question based on Social response."""
         history_info = self._build_history_info()
 
@@ -229,12 +260,14 @@ class SocialProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        llm_response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=200,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 200,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        llm_response = self._call_llm(call_kwargs, 'additional_question')
 
         return llm_response.choices[0].message.content.strip()
 
@@ -251,24 +284,32 @@ class SocialProcessor(BaseProcessor):
         1. LLM Call 1: query + history → Social search query
         2. MCP Call: search for social profiles
         3. LLM Call 2: response + history → additional question
+
+        Each step is bounded by the forward ``deadline``; once it passes the
+        processor gives no answer.
         """
         clean_query = query
+        deadline = kwargs.get('deadline')
 
-        # Step 1: LLM Call - Generate social search query
-        social_query = self._generate_social_query(query)
-        print(f'[SocialProcessor] Generated search query: {social_query}')
+        try:
+            # Step 1: LLM Call - Generate social search query
+            social_query = self._generate_social_query(query, deadline)
+            print(f'[SocialProcessor] Generated search query: {social_query}')
 
-        # Step 2: MCP Call - Get social profile data
-        social_response = self._call_social_mcp(social_query)
+            # Step 2: MCP Call - Get social profile data
+            social_response = self._call_social_mcp(social_query, deadline)
 
-        if social_response.startswith('Error calling Social MCP:'):
-            print(f'[SocialProcessor] {social_response}')
-            return None
+            if social_response.startswith('Error calling Social MCP:'):
+                print(f'[SocialProcessor] {social_response}')
+                return None
 
-        # Step 3: LLM Call - Generate additional question
-        additional_question = self._generate_additional_question(
-            clean_query, social_response
-        )
+            # Step 3: LLM Call - Generate additional question
+            additional_question = self._generate_additional_question(
+                clean_query, social_response, deadline
+            )
+        except DeadlineExceeded:
+            print('[SocialProcessor] Deadline reached; no answer')
+            return None
 
         executor_output = {
             'response': social_response,
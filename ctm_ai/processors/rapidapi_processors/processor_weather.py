@@ -1,13 +1,19 @@
 import asyncio
+import functools
 import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from litellm import completion
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
 from ...chunks import Chunk
+from ...utils import (
+    Deadline,
+    DeadlineExceeded,
+    get_llm_backend,
+    with_deadline_timeout,
+)
 from ..processor_base import BaseProcessor
 
 # Prompt for generating Weather search query
@@ -32,8 +38,17 @@ Additional Information: {history_info}
 class WeatherMCPAgent:
     """Open Weather MCP Agent for real-time weather data retrieval"""
 
-    def __init__(self, rapidapi_key: str, model: str = 'gpt-4o-mini'):
+    def __init__(
+        self,
+        rapidapi_key: str,
+        model: str = 'gpt-4o-mini',
+        acomplete: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    ):
         self.model = model
+        # Completions of the tool loop; processors pass their metered _acall_llm.
+        self.acomplete = acomplete or (
+            lambda call_kwargs: get_llm_backend().acomplete(**call_kwargs)
+        )
         self.rapidapi_key = rapidapi_key
         self.session: Optional[ClientSession] = None
         self.tools: List[Dict] = []
@@ -97,17 +112,14 @@ You can get current weather conditions, temperature, humidity, wind speed, and f
         return ''
 
     async def run(self, prompt: str) -> str:
-        from litellm import acompletion
-
         messages = [
             {'role': 'system', 'content': self.system_prompt},
             {'role': 'user', 'content': prompt},
         ]
         tools = self._get_tools_for_llm()
 
-        response = await acompletion(
-            model=self.model, messages=messages, tools=tools, tool_choice='auto'
-        )
+        call_kwargs = {'model': self.model, 'tools': tools, 'tool_choice': 'auto'}
+        response = await self.acomplete({**call_kwargs, 'messages': messages})
 
         assistant_message = response.choices[0].message
 
@@ -138,9 +150,7 @@ You can get current weather conditions, temperature, humidity, wind speed, and f
                     {'role': 'tool', 'tool_call_id': tc.id, 'content': result[:10000]}
                 )
 
-            response = await acompletion(
-                model=self.model, messages=messages, tools=tools, tool_choice='auto'
-            )
+            response = await self.acomplete({**call_kwargs, 'messages': messages})
             assistant_message = response.choices[0].message
 
         return assistant_message.content or ''
@@ -175,7 +185,9 @@ class WeatherProcessor(BaseProcessor):
 
         return content
 
-    def _generate_weather_query(self, query: str) -> str:
+    def _generate_weather_query(
+        self, query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 1: Generate a concise weather search query."""
         history_info = self._build_history_info()
 
@@ -184,42 +196,61 @@ class WeatherProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=100,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 100,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        response = self._call_llm(call_kwargs, 'api_query')
 
         weather_query = response.choices[0].message.content.strip()
         weather_query = weather_query.strip('"\'')
         return weather_query[:50]
 
-    async def _call_weather_mcp_async(self, weather_query: str) -> str:
+    async def _call_weather_mcp_async(
+        self, weather_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """MCP Call: Use WeatherMCPAgent to get weather data."""
-        try:
+
+        async def run() -> str:
             async with WeatherMCPAgent(
-                rapidapi_key=self.rapidapi_key, model=self.weather_model
+                rapidapi_key=self.rapidapi_key,
+                model=self.weather_model,
+                acomplete=functools.partial(
+                    self._acall_llm, phase='mcp', model=self.weather_model
+                ),
             ) as agent:
                 return await agent.run(weather_query)
+
+        try:
+            timeout = deadline.remaining() if deadline is not None else None
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            return 'Error calling Weather MCP: deadline reached'
         except Exception as e:
             return f'Error calling Weather MCP: {str(e)}'
 
-    def _call_weather_mcp(self, weather_query: str) -> str:
+    def _call_weather_mcp(
+        self, weather_query: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """Sync wrapper for async MCP call."""
         try:
-            return asyncio.run(self._call_weather_mcp_async(weather_query))
+            return asyncio.run(self._call_weather_mcp_async(weather_query, deadline))
         except RuntimeError:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 return loop.run_until_complete(
-                    self._call_weather_mcp_async(weather_query)
+                    self._call_weather_mcp_async(weather_query, deadline)
                 )
             finally:
                 loop.close()
 
-    def _generate_additional_question(self, query: str, response: str) -> str:
+    def _generate_additional_question(
+        self, query: str, response: str, deadline: Optional[Deadline] = None
+    ) -> str:
         """LLM Call 2: Generate additional question based on Weather response."""
         history_info = self._build_history_info()
 
@@ -229,12 +260,14 @@ class WeatherProcessor(BaseProcessor):
             history_info=history_info if history_info else 'None',
         )
 
-        llm_response = completion(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=200,
-            temperature=0.3,
-        )
+        call_kwargs = {
+            **self._completion_kwargs,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': 200,
+            'temperature': 0.3,
+        }
+        call_kwargs = with_deadline_timeout(call_kwargs, deadline)
+        llm_response = self._call_llm(call_kwargs, 'additional_question')
 
         return llm_response.choices[0].message.content.strip()
 
@@ -251,24 +284,32 @@ class WeatherProcessor(BaseProcessor):
         1. LLM Call 1: query + history → Weather search query
         2. MCP Call: get weather data
         3. LLM Call 2: response + history → additional question
+
+        Each step is bounded by the forward ``deadline``; once it passes the
+        processor gives no answer.
         """
         clean_query = query
+        deadline = kwargs.get('deadline')
 
-        # Step 1: LLM Call - Generate weather search query
-        weather_query = self._generate_weather_query(query)
-        print(f'[WeatherProcessor] Generated search query: {weather_query}')
+        try:
+            # Step 1: LLM Call - Generate weather search query
+            weather_query = self._generate_weather_query(query, deadline)
+            print(f'[WeatherProcessor] Generated search query: {weather_query}')
 
-        # Step 2: MCP Call - Get weather data
-        weather_response = self._call_weather_mcp(weather_query)
+            # Step 2: MCP Call - Get weather data
+            weather_response = self._call_weather_mcp(weather_query, deadline)
 
-        if weather_response.startswith('Error calling Weather MCP:'):
-            print(f'[WeatherProcessor] {weather_response}')
-            return None
+            if weather_response.startswith('Error calling Weather MCP:'):
+                print(f'[WeatherProcessor] {weather_response}')
+                return None
 
-        # Step 3: LLM Call - Generate additional question
-        additional_question = self._generate_additional_question(
-            clean_query, weather_response
-        )
+            # Step 3: LLM Call - Generate additional question
+            additional_question = self._generate_additional_question(
+                clean_query, weather_response, deadline
+            )
+        except DeadlineExceeded:
+            print('[WeatherProcessor] Deadline reached; no answer')
+            return None
 
         executor_output = {
             'response': weather_response,
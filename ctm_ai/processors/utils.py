@@ -159,3 +159,116 @@ def parse_json_response_with_scores(
         )
 
     return result
+
+
+# ---------------------------------------------------------------------------
+# Streaming JSON extraction
+# ---------------------------------------------------------------------------
+
+# Fields each phase needs from the executor; once all of them have closed, a
+# streamed completion can be cut short.
+PHASE_REQUIRED_FIELDS: Dict[str, tuple] = {
+    'initial': (
+        'response',
+        'additional_questions',
+        'relevance',
+        'confidence',
+        'surprise',
+    ),
+    'link_form': ('response', 'relevance'),
+    'fuse': ('response',),
+}
+
+
+class IncrementalJSONExtractor:
+    """Extract top-level fields of a JSON object while it is being streamed.
+
+    Feed text chunks as they arrive; every top-level field becomes available
+    in :attr:`fields` as soon as its value closes. Text before the opening
+    ``{`` (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, object] = {}
+        self._buf = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = 'start'  # start, key, colon, value, comma, done
+        self._token_start = -1
+        self._key = ''
+
+    def feed(self, text: str) -> Dict[str, object]:
+        """Consume ``text`` and return the fields completed by it."""
+        self._buf += text
+        completed: Dict[str, object] = {}
+        buf = self._buf
+        while self._pos < len(buf):
+            i = self._pos
+            ch = buf[i]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == 'key':
+                        self._key = json.loads(buf[self._token_start : i + 1])
+                        self._state = 'colon'
+                    elif self._depth == 1 and self._state == 'value':
+                        self._complete(buf[self._token_start : i + 1], completed)
+                continue
+            if self._state == 'start':
+                if ch == '{':
+                    self._depth = 1
+                    self._state = 'key'
+                continue
+            if self._state == 'done' or ch.isspace():
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state in ('key', 'value'):
+                    self._token_start = i
+            elif ch == ':' and self._depth == 1 and self._state == 'colon':
+                self._state = 'value'
+                self._token_start = -1
+            elif ch in '{[':
+                if self._depth == 1 and self._state == 'value':
+                    self._token_start = i
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._state == 'value':
+                    self._complete(buf[self._token_start : i + 1], completed)
+                elif self._depth == 0:
+                    if self._state == 'value' and self._token_start >= 0:
+                        self._complete(buf[self._token_start : i], completed)
+                    self._state = 'done'
+            elif ch == ',' and self._depth == 1:
+                if self._state == 'value' and self._token_start >= 0:
+                    self._complete(buf[self._token_start : i], completed)
+                self._state = 'key'
+            elif self._depth == 1 and self._state == 'value' and self._token_start < 0:
+                # Start of a bare scalar (number, true, false, null).
+                self._token_start = i
+        return completed
+
+    def _complete(self, raw: str, completed: Dict[str, object]) -> None:
+        try:
+            value = json.loads(raw.strip())
+        except json.JSONDecodeError:
+            value = raw.strip()
+        self.fields[self._key] = value
+        completed[self._key] = value
+        self._state = 'comma'
+        self._token_start = -1
+
+    def has_fields(self, names: tuple) -> bool:
+        return all(name in self.fields for name in names)
+
+    def as_json(self) -> str:
+        """The fields extracted so far, serialized as a JSON object."""
+        return json.dumps(self.fields, ensure_ascii=False)
@@ -1,16 +1,97 @@
+from .batch import (
+    BatchCollector,
+    BatchJobClient,
+    BatchJobError,
+    configure_batch_mode,
+    get_batch_collector,
+)
+from .cassette import (
+    Cassette,
+    CassetteBackend,
+    CassetteMiss,
+    CassetteToolEnv,
+    configure_cassette,
+    get_cassette,
+    wrap_tool_env,
+)
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    circuit_allows,
+    circuit_breaker_stats,
+    circuit_guard,
+    configure_circuit_breakers,
+    get_circuit_breaker,
+)
+from .completion_cache import (
+    CompletionCache,
+    completion_cache_key,
+    configure_completion_cache,
+    get_completion_cache,
+    get_default_completion_cache,
+)
+from .concurrency import (
+    AdaptiveConcurrencyController,
+    aconcurrency_slot,
+    add_concurrency_listener,
+    concurrency_slot,
+    configure_adaptive_concurrency,
+    get_concurrency_controller,
+)
+from .context_cache import (
+    ContextCacheRegistry,
+    split_cached_prefix,
+    strip_cache_markers,
+)
+from .deadline import (
+    Deadline,
+    DeadlineExceeded,
+    resolve_deadline,
+    with_deadline_timeout,
+)
 from .error_handler import (
     MissingAPIKeyError,
+    async_message_exponential_backoff,
     info_exponential_backoff,
     message_exponential_backoff,
     multi_info_exponential_backoff,
     score_exponential_backoff,
 )
+from .executor import (
+    ExecutorQuota,
+    SharedExecutor,
+    configure_executor,
+    get_executor,
+)
+from .hedging import (
+    HedgePolicy,
+    LatencyTracker,
+    ahedged,
+    configure_hedging,
+    get_hedge_policy,
+    hedged,
+)
+from .key_pool import (
+    APIKeyPool,
+    api_key_id,
+    api_key_lease,
+    configure_key_pool,
+    get_key_pool,
+    key_pool_stats,
+)
 from .litellm_utils import (
     configure_litellm,
     get_completion_kwargs,
     get_model_provider,
     get_required_api_key_name,
 )
+from .llm_backend import (
+    LiteLLMBackend,
+    LLMBackend,
+    MockLLMBackend,
+    configure_llm_backend,
+    get_llm_backend,
+)
 from .loader import (
     extract_audio_from_video,
     extract_video_frames,
@@ -18,6 +99,7 @@ from .loader import (
     load_image,
     load_images,
     load_video,
+    sample_video_frames,
 )
 from .logger import (
     get_iteration_log_file,
@@ -32,15 +114,138 @@ from .logger import (
     logging_func_with_count,
     set_iteration_log_file,
 )
+from .media_cache import (
+    MediaEncodingCache,
+    cached_base64,
+    cached_data_url,
+    configure_media_cache,
+    encode_data_url,
+    encode_file_base64,
+    get_media_cache,
+)
+from .media_pack import (
+    MediaPack,
+    MediaPackWriter,
+    configure_media_pack,
+    get_media_pack,
+)
+from .media_preprocess import (
+    MediaPreprocessor,
+    estimate_image_tokens,
+    estimate_video_tokens,
+)
+from .media_upload import (
+    GeminiFileUploader,
+    MediaUploadError,
+    MediaUploadRegistry,
+    configure_media_uploads,
+    get_media_registry,
+    referenced_file_ids,
+)
+from .metrics import (
+    Histogram,
+    LLMCallTimer,
+    MetricsRegistry,
+    get_metrics,
+    track_llm_call,
+)
+from .rate_limiter import (
+    RateLimiter,
+    aacquire_rate_limit,
+    acquire_rate_limit,
+    configure_rate_limits,
+    estimate_request_tokens,
+    get_rate_limiter,
+    rate_limit_stats,
+    settle_rate_limit,
+)
+from .singleflight import (
+    SingleFlight,
+    acoalesce,
+    coalesce,
+    configure_singleflight,
+    request_key,
+)
 from .tool import logprobs_to_softmax
+from .transcode_cache import (
+    TranscodeCache,
+    TranscodeError,
+    configure_transcode_cache,
+    get_transcode_cache,
+    transcoded,
+)
 
 __all__ = [
+    # Batch mode
+    'BatchCollector',
+    'BatchJobClient',
+    'BatchJobError',
+    'configure_batch_mode',
+    'get_batch_collector',
+    # Record / replay cassettes
+    'Cassette',
+    'CassetteBackend',
+    'CassetteMiss',
+    'CassetteToolEnv',
+    'configure_cassette',
+    'get_cassette',
+    'wrap_tool_env',
+    # Circuit breakers
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'circuit_allows',
+    'circuit_breaker_stats',
+    'circuit_guard',
+    'configure_circuit_breakers',
+    'get_circuit_breaker',
+    # Completion cache
+    'CompletionCache',
+    'completion_cache_key',
+    'configure_completion_cache',
+    'get_completion_cache',
+    'get_default_completion_cache',
+    # Adaptive concurrency
+    'AdaptiveConcurrencyController',
+    'aconcurrency_slot',
+    'add_concurrency_listener',
+    'concurrency_slot',
+    'configure_adaptive_concurrency',
+    'get_concurrency_controller',
+    # Provider-side context caching
+    'ContextCacheRegistry',
+    'split_cached_prefix',
+    'strip_cache_markers',
+    # Deadlines
+    'Deadline',
+    'DeadlineExceeded',
+    'resolve_deadline',
+    'with_deadline_timeout',
+    # Shared executor
+    'ExecutorQuota',
+    'SharedExecutor',
+    'configure_executor',
+    'get_executor',
     # Error handling
     'score_exponential_backoff',
     'info_exponential_backoff',
     'multi_info_exponential_backoff',
     'message_exponential_backoff',
+    'async_message_exponential_backoff',
     'MissingAPIKeyError',
+    # Hedged requests
+    'HedgePolicy',
+    'LatencyTracker',
+    'ahedged',
+    'configure_hedging',
+    'get_hedge_policy',
+    'hedged',
+    # API key pools
+    'APIKeyPool',
+    'api_key_id',
+    'api_key_lease',
+    'configure_key_pool',
+    'get_key_pool',
+    'key_pool_stats',
     # LiteLLM utilities
     'ask_llm_standard',
     'call_llm',
@@ -51,6 +256,12 @@ __all__ = [
     'get_model_provider',
     'get_required_api_key_name',
     'litellm_completion_request',
+    # LLM backends
+    'LiteLLMBackend',
+    'LLMBackend',
+    'MockLLMBackend',
+    'configure_llm_backend',
+    'get_llm_backend',
     # Loaders
     'load_audio',
     'load_image',
@@ -58,6 +269,37 @@ __all__ = [
     'load_images',
     'extract_audio_from_video',
     'extract_video_frames',
+    'sample_video_frames',
+    # Media encoding cache
+    'MediaEncodingCache',
+    'cached_base64',
+    'cached_data_url',
+    'configure_media_cache',
+    'encode_data_url',
+    'encode_file_base64',
+    'get_media_cache',
+    # Media packs
+    'MediaPack',
+    'MediaPackWriter',
+    'configure_media_pack',
+    'get_media_pack',
+    # Media preprocessing
+    'MediaPreprocessor',
+    'estimate_image_tokens',
+    'estimate_video_tokens',
+    # Media uploads
+    'GeminiFileUploader',
+    'MediaUploadError',
+    'MediaUploadRegistry',
+    'configure_media_uploads',
+    'get_media_registry',
+    'referenced_file_ids',
+    # Metrics
+    'Histogram',
+    'LLMCallTimer',
+    'MetricsRegistry',
+    'get_metrics',
+    'track_llm_call',
     # Logging
     'logging_ask',
     'logger',
@@ -71,6 +313,27 @@ __all__ = [
     'log_iteration',
     'log_go_up_iteration',
     'log_forward_iteration',
+    # Rate limiting
+    'RateLimiter',
+    'aacquire_rate_limit',
+    'acquire_rate_limit',
+    'configure_rate_limits',
+    'estimate_request_tokens',
+    'get_rate_limiter',
+    'rate_limit_stats',
+    'settle_rate_limit',
+    # Single-flight request coalescing
+    'SingleFlight',
+    'acoalesce',
+    'coalesce',
+    'configure_singleflight',
+    'request_key',
     # Tools
     'logprobs_to_softmax',
+    # On-disk transcode cache
+    'TranscodeCache',
+    'TranscodeError',
+    'configure_transcode_cache',
+    'get_transcode_cache',
+    'transcoded',
 ]
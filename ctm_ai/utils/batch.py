@@ -0,0 +1,280 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import logger
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Gemini serves the OpenAI files / batches API under this base URL.
+GEMINI_OPENAI_BASE = 'https://generativelanguage.googleapis.com/v1beta/openai/'
+
+# litellm-only request fields that never go into a batch line's body.
+_CLIENT_FIELDS = (
+    'model',
+    'api_key',
+    'api_base',
+    'timeout',
+    'stream',
+    'stream_options',
+    'extra_body',
+)
+
+
+class BatchJobError(RuntimeError):
+    """A batch job, or one request inside it, did not produce a completion."""
+
+
+class BatchJobClient:
+    """Runs one OpenAI-style batch job through litellm's files / batches API.
+
+    Works against any OpenAI-compatible batch endpoint (OpenAI, Gemini's
+    OpenAI compatibility layer, DashScope, or a local stand-in server).
+    """
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        custom_llm_provider: str = 'openai',
+        poll_interval_s: float = 30.0,
+        max_wait_s: float = 24 * 3600.0,
+    ) -> None:
+        self.api_base = api_base
+        self.api_key = api_key
+        self.custom_llm_provider = custom_llm_provider
+        self.poll_interval_s = poll_interval_s
+        self.max_wait_s = max_wait_s
+
+    def _auth(self) -> Dict[str, Any]:
+        auth: Dict[str, Any] = {'custom_llm_provider': self.custom_llm_provider}
+        if self.api_base:
+            auth['api_base'] = self.api_base
+        if self.api_key:
+            auth['api_key'] = self.api_key
+        return auth
+
+    def run(self, lines: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Submit ``lines`` as one job and return the result line per custom_id."""
+        import litellm
+
+        payload = '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines)
+        input_file = litellm.create_file(
+            file=('ctm_batch.jsonl', payload.encode('utf-8')),
+            purpose='batch',
+            **self._auth(),
+        )
+        batch = litellm.create_batch(
+            completion_window='24h',
+            endpoint=BATCH_ENDPOINT,
+            input_file_id=input_file.id,
+            **self._auth(),
+        )
+        logger.info(f'Batch {batch.id}: submitted {len(lines)} requests')
+
+        start = time.monotonic()
+        while batch.status not in FINAL_STATUSES:
+            if time.monotonic() - start > self.max_wait_s:
+                raise BatchJobError(f'Batch {batch.id} still {batch.status}')
+            time.sleep(self.poll_interval_s)
+            batch = litellm.retrieve_batch(batch_id=batch.id, **self._auth())
+        logger.info(
+            f'Batch {batch.id}: {batch.status} after {time.monotonic() - start:.1f}s'
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = litellm.file_content(file_id=file_id, **self._auth())
+            for raw in content.content.decode('utf-8').splitlines():
+                if raw.strip():
+                    line = json.loads(raw)
+                    results[line['custom_id']] = line
+        if not results and batch.status != 'completed':
+            raise BatchJobError(f'Batch {batch.id} {batch.status}')
+        return results
+
+
+class _PendingRequest:
+    def __init__(self, endpoint: Tuple[Optional[str], Optional[str]], body: Dict):
+        self.custom_id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.body = body
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+def batch_request_body(call_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn litellm completion kwargs into an OpenAI chat-completions body."""
+    model = call_kwargs['model']
+    body = {k: v for k, v in call_kwargs.items() if k not in _CLIENT_FIELDS}
+    body['model'] = model.split('/', 1)[1] if '/' in model else model
+    body.update(call_kwargs.get('extra_body') or {})
+    return body
+
+
+class BatchCollector:
+    """Gathers completion requests from many CTM instances into batch jobs.
+
+    Callers block in :meth:`complete` while their request waits in the queue.
+    Once no new request has arrived for ``flush_idle_s`` (every instance is
+    waiting on the current phase) or ``max_batch_size`` requests are queued,
+    the queue is submitted as one batch job per endpoint and model. Each
+    instance resumes when its answer arrives, so a shard of instances moves
+    through the CTM phases together.
+    """
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        custom_llm_provider: str = 'openai',
+        flush_idle_s: float = 2.0,
+        max_batch_size: int = 50000,
+        poll_interval_s: float = 30.0,
+        max_wait_s: float = 24 * 3600.0,
+    ) -> None:
+        self.api_base = api_base
+        self.api_key = api_key
+        self.custom_llm_provider = custom_llm_provider
+        self.flush_idle_s = flush_idle_s
+        self.max_batch_size = max_batch_size
+        self.poll_interval_s = poll_interval_s
+        self.max_wait_s = max_wait_s
+        self.jobs_submitted = 0
+        self.requests_submitted = 0
+        self._pending: List[_PendingRequest] = []
+        self._last_enqueue = 0.0
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._jobs = concurrent.futures.ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix='ctm-batch'
+        )
+
+    def _endpoint(
+        self, call_kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        api_base = self.api_base or call_kwargs.get('api_base')
+        api_key = self.api_key or call_kwargs.get('api_key')
+        if api_base is None and call_kwargs['model'].startswith('gemini/'):
+            api_base = GEMINI_OPENAI_BASE
+            api_key = api_key or os.getenv('GEMINI_API_KEY')
+        return api_base, api_key
+
+    def complete(self, call_kwargs: Dict[str, Any]) -> Any:
+        """Queue one completion request and block until its batch returns."""
+        request = _PendingRequest(
+            self._endpoint(call_kwargs), batch_request_body(call_kwargs)
+        )
+        with self._cond:
+            self._pending.append(request)
+            self._last_enqueue = time.monotonic()
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name='ctm-batch-dispatch', daemon=True
+                )
+                self._dispatcher.start()
+            self._cond.notify_all()
+        return request.future.result()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                while len(self._pending) < self.max_batch_size:
+                    idle = time.monotonic() - self._last_enqueue
+                    if idle >= self.flush_idle_s:
+                        break
+                    self._cond.wait(self.flush_idle_s - idle)
+                requests, self._pending = self._pending, []
+            self._flush(requests)
+
+    def _flush(self, requests: List[_PendingRequest]) -> None:
+        groups: Dict[Tuple[Any, ...], List[_PendingRequest]] = {}
+        for request in requests:
+            key = (*request.endpoint, request.body['model'])
+            groups.setdefault(key, []).append(request)
+        for (api_base, api_key, _), group in groups.items():
+            self.jobs_submitted += 1
+            self.requests_submitted += len(group)
+            self._jobs.submit(self._run_job, api_base, api_key, group)
+
+    def _run_job(
+        self,
+        api_base: Optional[str],
+        api_key: Optional[str],
+        group: List[_PendingRequest],
+    ) -> None:
+        client = BatchJobClient(
+            api_base=api_base,
+            api_key=api_key,
+            custom_llm_provider=self.custom_llm_provider,
+            poll_interval_s=self.poll_interval_s,
+            max_wait_s=self.max_wait_s,
+        )
+        lines = [
+            {
+                'custom_id': r.custom_id,
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': r.body,
+            }
+            for r in group
+        ]
+        try:
+            results = client.run(lines)
+        except Exception as e:
+            logger.error(f'Batch job of {len(group)} requests failed: {e}')
+            for request in group:
+                request.future.set_exception(e)
+            return
+        for request in group:
+            self._resolve(request, results.get(request.custom_id))
+
+    @staticmethod
+    def _resolve(request: _PendingRequest, line: Optional[Dict[str, Any]]) -> None:
+        from litellm import ModelResponse
+
+        response = (line or {}).get('response') or {}
+        if response.get('status_code') == 200 and response.get('body'):
+            request.future.set_result(ModelResponse(**response['body']))
+            return
+        error = (line or {}).get('error') or response.get('body') or 'no result line'
+        request.future.set_exception(
+            BatchJobError(f'Batch request {request.custom_id} failed: {error}')
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'jobs_submitted': self.jobs_submitted,
+            'requests_submitted': self.requests_submitted,
+            'pending': len(self._pending),
+        }
+
+
+# Batch mode is process-wide and off until configured; while it is on every
+# processor and parse call goes through the collector instead of litellm.
+_collector: Optional[BatchCollector] = None
+_collector_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_batch_mode(
+    settings: Optional[Dict[str, Any]],
+) -> Optional[BatchCollector]:
+    """Enable batch mode with :class:`BatchCollector` kwargs, or disable with None."""
+    global _collector, _collector_settings
+    if settings is None:
+        _collector, _collector_settings = None, None
+    elif _collector is None or settings != _collector_settings:
+        _collector, _collector_settings = BatchCollector(**settings), dict(settings)
+    return _collector
+
+
+def get_batch_collector() -> Optional[BatchCollector]:
+    return _collector
@@ -0,0 +1,428 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .llm_backend import (
+    LLMBackend,
+    _aiter,
+    configure_llm_backend,
+    get_llm_backend,
+)
+from .logger import logger
+from .singleflight import request_key
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+CASSETTE_VERSION = 1
+
+# Stands in for a provider-side reference while replaying, when nothing is
+# created on the provider.
+REPLAY_REFERENCE_PREFIX = 'cassette:'
+
+# Context cache names and uploaded file URIs differ from run to run, so
+# requests mentioning them are keyed on the content they refer to instead.
+_references: Dict[str, str] = {}
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a request the cassette never recorded."""
+
+
+def serialize_response(response: Any) -> Dict[str, Any]:
+    """Keep the parts of an OpenAI-style response the CTM reads."""
+    choices = []
+    for choice in getattr(response, 'choices', None) or []:
+        message = choice.message
+        tool_calls = getattr(message, 'tool_calls', None)
+        choices.append(
+            {
+                'content': getattr(message, 'content', None),
+                'tool_calls': [
+                    {
+                        'id': getattr(call, 'id', None),
+                        'name': call.function.name,
+                        'arguments': call.function.arguments,
+                    }
+                    for call in tool_calls
+                ]
+                if tool_calls
+                else None,
+            }
+        )
+    return {
+        'model': getattr(response, 'model', None),
+        'choices': choices,
+        'usage': _serialize_usage(getattr(response, 'usage', None)),
+    }
+
+
+def _serialize_usage(usage: Any) -> Optional[Dict[str, int]]:
+    if not usage:
+        return None
+    return {
+        field: getattr(usage, field, 0) or 0
+        for field in ('prompt_tokens', 'completion_tokens', 'total_tokens')
+    }
+
+
+def _usage(data: Optional[Dict[str, int]]) -> Any:
+    return SimpleNamespace(**data) if data else None
+
+
+def deserialize_response(data: Dict[str, Any]) -> Any:
+    choices = []
+    for choice in data['choices']:
+        tool_calls = choice.get('tool_calls')
+        message = SimpleNamespace(
+            role='assistant',
+            content=choice.get('content'),
+            tool_calls=[
+                SimpleNamespace(
+                    id=call['id'],
+                    type='function',
+                    function=SimpleNamespace(
+                        name=call['name'], arguments=call['arguments']
+                    ),
+                )
+                for call in tool_calls
+            ]
+            if tool_calls
+            else None,
+        )
+        choices.append(SimpleNamespace(message=message, finish_reason='stop'))
+    return SimpleNamespace(
+        model=data.get('model'), choices=choices, usage=_usage(data.get('usage'))
+    )
+
+
+def _stream_chunks(entry: Dict[str, Any]) -> List[Any]:
+    chunks = [
+        SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))],
+            usage=None,
+        )
+        for piece in entry['chunks']
+    ]
+    if entry.get('usage'):
+        chunks.append(SimpleNamespace(choices=[], usage=_usage(entry['usage'])))
+    return chunks
+
+
+def _stream_piece(chunk: Any) -> Optional[str]:
+    choices = getattr(chunk, 'choices', None)
+    if not choices:
+        return None
+    return getattr(choices[0].delta, 'content', None)
+
+
+def register_reference(reference: str, content_id: str) -> None:
+    """Key requests that mention ``reference`` by ``content_id`` instead."""
+    _references[reference] = content_id
+
+
+def replay_reference(content_id: str) -> str:
+    """Reference to use in place of creating ``content_id`` on the provider."""
+    reference = f'{REPLAY_REFERENCE_PREFIX}{content_id}'
+    register_reference(reference, content_id)
+    return reference
+
+
+def normalize_references(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """``messages`` with registered file references replaced by their content."""
+    normalized = []
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            parts = []
+            for part in content:
+                file = part.get('file') if isinstance(part, dict) else None
+                if isinstance(file, dict) and file.get('file_id') in _references:
+                    file = {**file, 'file_id': _references[file['file_id']]}
+                    part = {**part, 'file': file}
+                parts.append(part)
+            message = {**message, 'content': parts}
+        normalized.append(message)
+    return normalized
+
+
+def cassette_key(kwargs: Dict[str, Any]) -> str:
+    """:func:`request_key` with provider-side references replaced by content."""
+    normalized = dict(kwargs)
+    name = normalized.get('cached_content')
+    if name is not None:
+        normalized['cached_content'] = _references.get(name, name)
+    if normalized.get('messages'):
+        normalized['messages'] = normalize_references(normalized['messages'])
+    return request_key(normalized)
+
+
+def tool_key(action: str, input_str: Any) -> str:
+    serialized = json.dumps([action, input_str], ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """Recorded LLM responses and tool observations for whole CTM forwards.
+
+    In ``record`` mode every call is added to the cassette, which is written
+    to ``path`` by :meth:`save` (gzip-compressed when it ends in ``.gz``). In
+    ``replay`` mode calls are answered from the file: requests are matched by
+    content (:func:`cassette_key` for LLM calls, action and input for tools),
+    repeated requests get their recorded responses in order, and each reply
+    waits ``latency_scale`` times its recorded latency (0 replays instantly).
+    """
+
+    def __init__(
+        self, path: str, mode: str = REPLAY, latency_scale: float = 1.0
+    ) -> None:
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f'Unknown cassette mode: {mode!r}')
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries: List[Dict[str, Any]] = []
+        self._queues: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self.load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    def _open(self, mode: str) -> Any:
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode + 't', encoding='utf-8')
+        return open(self.path, mode, encoding='utf-8')
+
+    def load(self) -> None:
+        with self._open('r') as f:
+            data = json.load(f)
+        self.entries = data['entries']
+        for entry in self.entries:
+            self._queues[(entry['kind'], entry['key'])].append(entry)
+
+    def save(self) -> None:
+        if not self.recording:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {'version': CASSETTE_VERSION, 'entries': list(self.entries)}
+        with self._open('w') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    def record(self, kind: str, key: str, started: float, **fields: Any) -> None:
+        entry = {
+            'kind': kind,
+            'key': key,
+            'latency_s': round(time.monotonic() - started, 4),
+            **fields,
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+    def take(self, kind: str, key: str) -> Dict[str, Any]:
+        """Next recorded entry for a request; the last one repeats once used up."""
+        with self._lock:
+            queue = self._queues.get((kind, key))
+            if queue:
+                entry = queue.popleft()
+                self._last[(kind, key)] = entry
+                return entry
+            if (kind, key) in self._last:
+                return self._last[(kind, key)]
+        raise CassetteMiss(f'No {kind} entry in {self.path} for request {key[:12]}')
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        return entry.get('latency_s', 0.0) * self.latency_scale
+
+
+class CassetteBackend(LLMBackend):
+    """Records calls to ``inner`` into a cassette, or replays them from it."""
+
+    def __init__(self, cassette: Cassette, inner: Optional[LLMBackend] = None) -> None:
+        self.cassette = cassette
+        self.inner = inner
+
+    def _replay(self, kind: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return self.cassette.take(kind, cassette_key(kwargs))
+
+    def complete(self, **kwargs: Any) -> Any:
+        if not self.cassette.recording:
+            entry = self._replay('llm', kwargs)
+            time.sleep(self.cassette.delay(entry))
+            return deserialize_response(entry['response'])
+        started = time.monotonic()
+        response = self.inner.complete(**kwargs)
+        self._record_response(kwargs, started, response)
+        return response
+
+    async def acomplete(self, **kwargs: Any) -> Any:
+        if not self.cassette.recording:
+            entry = self._replay('llm', kwargs)
+            await asyncio.sleep(self.cassette.delay(entry))
+            return deserialize_response(entry['response'])
+        started = time.monotonic()
+        response = await self.inner.acomplete(**kwargs)
+        self._record_response(kwargs, started, response)
+        return response
+
+    def _record_response(
+        self, kwargs: Dict[str, Any], started: float, response: Any
+    ) -> None:
+        self.cassette.record(
+            'llm',
+            cassette_key(kwargs),
+            started,
+            model=kwargs.get('model'),
+            response=serialize_response(response),
+        )
+
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        if not self.cassette.recording:
+            entry = self._replay('stream', kwargs)
+            time.sleep(self.cassette.delay(entry))
+            return iter(_stream_chunks(entry))
+        return self._record_stream(kwargs, self.inner.stream(**kwargs))
+
+    async def astream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        if not self.cassette.recording:
+            entry = self._replay('stream', kwargs)
+            await asyncio.sleep(self.cassette.delay(entry))
+            return _aiter(_stream_chunks(entry))
+        return self._arecord_stream(kwargs, await self.inner.astream(**kwargs))
+
+    def _record_stream(self, kwargs: Dict[str, Any], stream: Any) -> Iterator[Any]:
+        # Only the chunks the caller consumed are kept, so a stream closed early
+        # replays to the same stopping point.
+        started = time.monotonic()
+        pieces: List[str] = []
+        usage = None
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, 'usage', None) or usage
+                piece = _stream_piece(chunk)
+                if piece:
+                    pieces.append(piece)
+                yield chunk
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+            self._record_chunks(kwargs, started, pieces, usage)
+
+    async def _arecord_stream(
+        self, kwargs: Dict[str, Any], stream: Any
+    ) -> AsyncIterator[Any]:
+        started = time.monotonic()
+        pieces: List[str] = []
+        usage = None
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, 'usage', None) or usage
+                piece = _stream_piece(chunk)
+                if piece:
+                    pieces.append(piece)
+                yield chunk
+        finally:
+            if hasattr(stream, 'aclose'):
+                await stream.aclose()
+            self._record_chunks(kwargs, started, pieces, usage)
+
+    def _record_chunks(
+        self, kwargs: Dict[str, Any], started: float, pieces: List[str], usage: Any
+    ) -> None:
+        self.cassette.record(
+            'stream',
+            cassette_key(kwargs),
+            started,
+            model=kwargs.get('model'),
+            chunks=pieces,
+            usage=_serialize_usage(usage),
+        )
+
+
+class CassetteToolEnv:
+    """Tool environment proxy that records or replays :meth:`step` results.
+
+    Everything except ``step`` (function lists, tool metadata) is read from
+    the wrapped environment, e.g. a ``rapidapi_wrapper``.
+    """
+
+    def __init__(self, env: Any, cassette: Cassette) -> None:
+        self.env = env
+        self.cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.env, name)
+
+    def step(self, action: str, input_str: Any) -> Tuple[str, int]:
+        key = tool_key(action, input_str)
+        if not self.cassette.recording:
+            entry = self.cassette.take('tool', key)
+            time.sleep(self.cassette.delay(entry))
+            return entry['observation'], entry['status']
+        started = time.monotonic()
+        observation, status = self.env.step(action, input_str)
+        self.cassette.record(
+            'tool',
+            key,
+            started,
+            action=action,
+            observation=observation,
+            status=status,
+        )
+        return observation, status
+
+
+# Process-wide like the LLM backend it wraps; off until configured.
+_cassette: Optional[Cassette] = None
+_cassette_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_cassette(settings: Optional[Dict[str, Any]]) -> Optional[Cassette]:
+    """Record or replay every LLM and tool call, e.g. ``{"path": ..., "mode":
+    "record"}``; see :class:`Cassette`. None restores the wrapped backend.
+    """
+    global _cassette, _cassette_settings
+    backend = get_llm_backend()
+    inner = backend.inner if isinstance(backend, CassetteBackend) else backend
+    if settings is None:
+        _cassette, _cassette_settings = None, None
+        configure_llm_backend(inner)
+        return None
+    if settings != _cassette_settings:
+        _cassette = Cassette(**settings)
+        _cassette_settings = dict(settings)
+        logger.info(f'Cassette {_cassette.mode}: {_cassette.path}')
+    # Re-wrap when a new backend was installed since the cassette was set up.
+    if not isinstance(backend, CassetteBackend) or backend.cassette is not _cassette:
+        configure_llm_backend(CassetteBackend(_cassette, inner))
+    return _cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    return _cassette
+
+
+def replaying() -> bool:
+    """Whether LLM calls are answered from a cassette, so nothing reaches the
+    provider (context caches and uploads included)."""
+    return _cassette is not None and not _cassette.recording
+
+
+def wrap_tool_env(env: Any) -> Any:
+    """Route ``env.step`` through the active cassette, if any."""
+    if _cassette is None or env is None or isinstance(env, CassetteToolEnv):
+        return env
+    return CassetteToolEnv(env, _cassette)
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from .deadline import Deadline, DeadlineExceeded
+from .logger import logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Client errors say nothing about the model's health; timeouts and rate
+# limits do.
+_HEALTH_STATUS_CODES = (408, 429)
+
+# A timeout capped at the time left before a deadline fires at (about) the
+# deadline; one this close to it is the caller's budget, not the model.
+_DEADLINE_SLACK_S = 1.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit is open."""
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the model (not the request) is failing."""
+    if isinstance(error, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in _HEALTH_STATUS_CODES
+    return True
+
+
+def caused_by_deadline(error: BaseException, deadline: Optional[Deadline]) -> bool:
+    """Whether ``error`` came from the caller's own ``deadline`` running out."""
+    if deadline is None:
+        return False
+    if deadline.expired():
+        return True
+    timed_out = isinstance(error, TimeoutError) or (
+        getattr(error, 'status_code', None) == 408
+    )
+    return timed_out and deadline.remaining() < _DEADLINE_SLACK_S
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one model.
+
+    The circuit opens once ``failure_threshold`` failures happen within
+    ``window_s``. While open, :meth:`allow` refuses calls; after
+    ``cooldown_s`` it lets a single probe call through (half-open) and
+    closes again after ``probe_successes`` successful probes. A failed probe
+    reopens it for another cooldown. A probe that never reports back is
+    replaced by a new one after ``cooldown_s``.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        failure_threshold: int = 5,
+        window_s: float = 30.0,
+        cooldown_s: float = 30.0,
+        probe_successes: int = 1,
+    ) -> None:
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.window_s = window_s
+        self.cooldown_s = cooldown_s
+        self.probe_successes = probe_successes
+        self.state = CLOSED
+        self.times_opened = 0
+        self._failures: Deque[float] = deque()
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the model now (may start a probe)."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now - self._opened_at < self.cooldown_s:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_successes = 0
+                logger.info(f'Circuit for {self.model} half-open; probing')
+            elif (
+                self._probe_started is not None
+                and now - self._probe_started < self.cooldown_s
+            ):
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != HALF_OPEN:
+                return
+            self._probe_started = None
+            self._probe_successes += 1
+            if self._probe_successes >= self.probe_successes:
+                self.state = CLOSED
+                self._failures.clear()
+                logger.info(f'Circuit for {self.model} closed')
+
+    def record_failure(self, error: BaseException) -> None:
+        if not counts_as_failure(error):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open(now)
+                return
+            if self.state == OPEN:
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window_s:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.times_opened += 1
+        self._opened_at = now
+        self._probe_started = None
+        logger.warning(f'Circuit for {self.model} opened for {self.cooldown_s}s')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'times_opened': self.times_opened,
+            'recent_failures': len(self._failures),
+        }
+
+
+# Breakers are process-wide so every processor and CTM instance calling a
+# model sees the same health; off until configured.
+_breakers: Dict[str, CircuitBreaker] = {}
+_breaker_settings: Optional[Dict[str, Any]] = None
+_breakers_lock = threading.Lock()
+
+
+def configure_circuit_breakers(settings: Optional[Dict[str, Any]]) -> None:
+    """Enable per-model breakers with :class:`CircuitBreaker` kwargs, or disable."""
+    global _breaker_settings
+    with _breakers_lock:
+        if settings != _breaker_settings:
+            _breakers.clear()
+        _breaker_settings = dict(settings) if settings is not None else None
+
+
+def get_circuit_breaker(model: Optional[str]) -> Optional[CircuitBreaker]:
+    if _breaker_settings is None or not model:
+        return None
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(model, **_breaker_settings)
+            _breakers[model] = breaker
+        return breaker
+
+
+def circuit_allows(model: str) -> bool:
+    breaker = get_circuit_breaker(model)
+    return breaker is None or breaker.allow()
+
+
+@contextmanager
+def circuit_guard(model: str, deadline: Optional[Deadline] = None) -> Iterator[None]:
+    """Report the outcome of the enclosed provider call to ``model``'s breaker.
+
+    Failures caused by the request's ``deadline`` (a timeout shortened to the
+    time left) are not held against the model.
+    """
+    breaker = get_circuit_breaker(model)
+    try:
+        yield
+    except Exception as e:
+        if breaker is not None and not caused_by_deadline(e, deadline):
+            breaker.record_failure(e)
+        raise
+    if breaker is not None:
+        breaker.record_success()
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        return {model: b.stats() for model, b in _breakers.items()}
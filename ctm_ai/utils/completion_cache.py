@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .logger import logger
+
+# Request fields that determine a completion's output. Anything else in the
+# call kwargs (api_key, api_base, timeouts) must not affect the cache key.
+CACHE_KEY_FIELDS = ('model', 'messages', 'temperature', 'max_tokens', 'extra_body', 'n')
+
+DEFAULT_CACHE_MAX_MB = 1024.0
+
+
+def completion_cache_key(call_kwargs: Dict[str, Any]) -> str:
+    """Return a content hash identifying a completion request."""
+    payload = {field: call_kwargs.get(field) for field in CACHE_KEY_FIELDS}
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """Content-addressed on-disk cache of LLM completions.
+
+    Entries live in a single SQLite file inside ``cache_dir`` so that several
+    worker threads (and processes) can share one cache. When the total payload
+    size exceeds ``max_size_mb`` the least recently used entries are evicted.
+
+    In ``read_only`` mode the cache is a pure replay source: hits are served,
+    but nothing is written, touched or evicted, so a golden cache can be shared
+    across concurrent sweeps without being modified.
+    """
+
+    DB_FILENAME = 'completions.sqlite3'
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size_mb: float = DEFAULT_CACHE_MAX_MB,
+        read_only: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.read_only = read_only
+        self.db_path = os.path.join(cache_dir, self.DB_FILENAME)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if read_only:
+            if not os.path.exists(self.db_path):
+                raise FileNotFoundError(
+                    f'Read-only completion cache not found: {self.db_path}'
+                )
+            self._conn = sqlite3.connect(
+                f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False
+            )
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)'
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not self.read_only:
+                self._conn.execute(
+                    'UPDATE entries SET last_access = ? WHERE key = ?',
+                    (time.time(), key),
+                )
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        if self.read_only:
+            return
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode('utf-8'))
+        if size > self.max_size_bytes:
+            logger.warning(
+                f'Completion of {size} bytes exceeds cache size cap; not cached.'
+            )
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, last_access) '
+                'VALUES (?, ?, ?, ?)',
+                (key, serialized, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the size cap is respected."""
+        total = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        rows = self._conn.execute(
+            'SELECT key, size FROM entries ORDER BY last_access ASC'
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()[0]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {'cache_hits': self.hits, 'cache_misses': self.misses}
+
+
+# Caches are shared process-wide per directory so that every CTM instance and
+# processor in a dataset run reads and writes the same SQLite connection.
+_caches: Dict[str, CompletionCache] = {}
+_caches_lock = threading.Lock()
+_default_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache(
+    cache_dir: str,
+    max_size_mb: float = DEFAULT_CACHE_MAX_MB,
+    read_only: bool = False,
+) -> CompletionCache:
+    """Return the shared cache for ``cache_dir``, creating it on first use."""
+    key = os.path.abspath(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None or cache.read_only != read_only:
+            cache = CompletionCache(cache_dir, max_size_mb, read_only)
+            _caches[key] = cache
+        return cache
+
+
+def configure_completion_cache(
+    cache_dir: Optional[str],
+    max_size_mb: float = DEFAULT_CACHE_MAX_MB,
+    read_only: bool = False,
+) -> Optional[CompletionCache]:
+    """Set the process-wide default cache used when a CTM config has none.
+
+    Passing ``cache_dir=None`` disables the default cache again.
+    """
+    global _default_cache
+    _default_cache = (
+        get_completion_cache(cache_dir, max_size_mb, read_only) if cache_dir else None
+    )
+    return _default_cache
+
+
+def get_default_completion_cache() -> Optional[CompletionCache]:
+    return _default_cache
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .litellm_utils import get_model_provider
+from .logger import logger
+
+# HTTP statuses that mean "the provider is overloaded, back off".
+OVERLOAD_STATUS_CODES = (429, 503, 529)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Whether ``error`` signals provider overload (rate limit / unavailable)."""
+    status = getattr(error, 'status_code', None)
+    if status in OVERLOAD_STATUS_CODES:
+        return True
+    name = type(error).__name__
+    return name in ('RateLimitError', 'ServiceUnavailableError')
+
+
+class AdaptiveConcurrencyController:
+    """AIMD limit on the number of in-flight requests to one provider.
+
+    The window grows by ``1 / window`` per successful call (about +1 per
+    window of successes) up to ``max_limit``. It is cut by ``backoff_factor``
+    when the provider answers 429 / 503 or when the p95 of recent latencies
+    exceeds ``latency_tolerance`` times the best p95 seen so far. Cuts are
+    rate-limited by ``cooldown_s`` so one burst of failures from requests
+    that were already in flight counts as a single congestion signal.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_factor: float = 0.5,
+        latency_window: int = 50,
+        latency_tolerance: float = 2.0,
+        cooldown_s: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown_s = cooldown_s
+        self._window = float(min(max(initial, min_limit), max_limit))
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._baseline_p95: Optional[float] = None
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[str, int], None]] = []
+
+    @property
+    def limit(self) -> int:
+        return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def add_listener(self, callback: Callable[[str, int], None]) -> None:
+        """Register ``callback(name, limit)``, called whenever the limit changes."""
+        self._listeners.append(callback)
+
+    def _try_acquire(self) -> bool:
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def aacquire(self, poll_s: float = 0.01) -> None:
+        # Waiting on the threading condition would block the event loop, so
+        # async callers poll instead.
+        while not self._try_acquire():
+            await asyncio.sleep(poll_s)
+
+    def release(self, latency_s: float, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            before = self.limit
+            if error is not None:
+                if is_overload_error(error):
+                    self._decrease(f'{type(error).__name__}')
+            else:
+                self._latencies.append(latency_s)
+                if not self._latency_degraded():
+                    self._window = min(
+                        self.max_limit, self._window + 1.0 / self._window
+                    )
+            after = self.limit
+            self._cond.notify_all()
+        if after != before:
+            self._notify(after)
+
+    def _latency_degraded(self) -> bool:
+        if len(self._latencies) < self._latencies.maxlen:
+            return False
+        ordered = sorted(self._latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        if self._baseline_p95 is None or p95 < self._baseline_p95:
+            self._baseline_p95 = p95
+            return False
+        if p95 > self.latency_tolerance * self._baseline_p95:
+            if self._decrease(f'p95 latency {p95:.2f}s'):
+                self._latencies.clear()
+            return True
+        return False
+
+    def _decrease(self, reason: str) -> bool:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_s:
+            return False
+        self._last_decrease = now
+        self._window = max(self.min_limit, self._window * self.backoff_factor)
+        logger.info(f'Concurrency {self.name}: backing off ({reason})')
+        return True
+
+    def _notify(self, limit: int) -> None:
+        logger.info(f'Concurrency {self.name}: window={limit}')
+        for callback in self._listeners:
+            callback(self.name, limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one in-flight slot for the duration of a provider call."""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release(time.monotonic() - start, e)
+            raise
+        self.release(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.aacquire()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release(time.monotonic() - start, e)
+            raise
+        self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'limit': self.limit, 'in_flight': self._in_flight}
+
+
+# One controller per provider, created lazily from the process-wide settings.
+# Disabled (no controllers) until configure_adaptive_concurrency is called.
+_settings: Optional[Dict[str, Any]] = None
+_controllers: Dict[str, AdaptiveConcurrencyController] = {}
+_controllers_lock = threading.Lock()
+_listeners: List[Callable[[str, int], None]] = []
+
+
+def configure_adaptive_concurrency(settings: Optional[Dict[str, Any]]) -> None:
+    """Enable AIMD concurrency control for every provider.
+
+    ``settings`` holds :class:`AdaptiveConcurrencyController` keyword
+    arguments (``initial``, ``min_limit``, ``max_limit``, ...); ``{}`` enables
+    it with defaults and ``None`` disables it. Re-applying the current
+    settings keeps the existing controllers and their learned windows.
+    """
+    global _settings
+    with _controllers_lock:
+        if settings == _settings:
+            return
+        _settings = dict(settings) if settings is not None else None
+        _controllers.clear()
+
+
+def add_concurrency_listener(callback: Callable[[str, int], None]) -> None:
+    """Register a metrics hook ``callback(provider, limit)`` on all controllers."""
+    with _controllers_lock:
+        _listeners.append(callback)
+        for controller in _controllers.values():
+            controller.add_listener(callback)
+
+
+def get_concurrency_controller(
+    model: Optional[str],
+) -> Optional[AdaptiveConcurrencyController]:
+    """Return the controller for ``model``'s provider, or None when disabled."""
+    if _settings is None or not model:
+        return None
+    provider = get_model_provider(model)
+    with _controllers_lock:
+        controller = _controllers.get(provider)
+        if controller is None:
+            controller = AdaptiveConcurrencyController(provider, **_settings)
+            for callback in _listeners:
+                controller.add_listener(callback)
+            _controllers[provider] = controller
+        return controller
+
+
+@contextmanager
+def concurrency_slot(model: Optional[str]) -> Iterator[None]:
+    """Hold a slot on ``model``'s controller; a no-op when disabled."""
+    controller = get_concurrency_controller(model)
+    if controller is None:
+        yield
+        return
+    with controller.slot():
+        yield
+
+
+@asynccontextmanager
+async def aconcurrency_slot(model: Optional[str]) -> AsyncIterator[None]:
+    controller = get_concurrency_controller(model)
+    if controller is None:
+        yield
+        return
+    async with controller.aslot():
+        yield
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .cassette import (
+    REPLAY_REFERENCE_PREFIX,
+    normalize_references,
+    register_reference,
+    replay_reference,
+    replaying,
+)
+from .logger import logger
+
+GEMINI_API_BASE = 'https://generativelanguage.googleapis.com/v1beta'
+
+# Renew a cache this long before its TTL runs out rather than risk a call
+# referencing an entry that expires in flight.
+EXPIRY_MARGIN_S = 30.0
+
+
+def split_cached_prefix(
+    messages: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split off the leading system / ``cache_control`` messages.
+
+    Returns ``(prefix, rest)``; the prefix is empty unless at least one of
+    its messages is marked with ``cache_control``.
+    """
+    n = 0
+    while n < len(messages) and (
+        messages[n].get('role') == 'system' or 'cache_control' in messages[n]
+    ):
+        n += 1
+    if not any('cache_control' in m for m in messages[:n]):
+        return [], messages
+    return messages[:n], messages[n:]
+
+
+def strip_cache_markers(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {k: v for k, v in m.items() if k != 'cache_control'}
+        if 'cache_control' in m
+        else m
+        for m in messages
+    ]
+
+
+def _only_images(prefix: List[Dict[str, Any]]) -> bool:
+    """Whether the prefix's media are all images.
+
+    An image costs ~258 tokens, far below the provider's minimum cacheable
+    size, so such prefixes are not worth a registration round trip.
+    """
+    for message in prefix:
+        content = message.get('content')
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if part.get('type') == 'text':
+                continue
+            url = (part.get('image_url') or {}).get('url', '')
+            if part.get('type') != 'image_url' or not url.startswith('data:image/'):
+                return False
+    return True
+
+
+class ContextCacheRegistry:
+    """Provider-side caches for the stable message prefixes of one processor.
+
+    A prefix (system prompt + media) is registered with Gemini's
+    ``cachedContents`` API the first time it is seen and later calls send
+    only the remaining messages plus the cache name. Entries live for
+    ``ttl_s`` on the provider and are deleted by :meth:`release`, which the
+    CTM calls at the end of every forward pass. Prefixes the provider
+    refuses to cache (e.g. too small) are remembered and sent inline. While
+    a cassette replays, nothing is registered and calls carry a stand-in
+    name that the cassette matches by prefix content.
+    """
+
+    def __init__(self, ttl_s: float = 600.0, api_base: str = GEMINI_API_BASE) -> None:
+        self.ttl_s = ttl_s
+        self.api_base = api_base.rstrip('/')
+        self.created = 0
+        self.reused = 0
+        self._entries: Dict[str, Tuple[Optional[str], float, Optional[str]]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, call_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ``call_kwargs`` with its cached prefix replaced by a reference."""
+        messages = call_kwargs.get('messages') or []
+        model = call_kwargs.get('model', '')
+        prefix, rest = split_cached_prefix(messages)
+        if (
+            not prefix
+            or not rest
+            or not model.startswith('gemini/')
+            or _only_images(prefix)
+        ):
+            return {**call_kwargs, 'messages': strip_cache_markers(messages)}
+
+        api_key = call_kwargs.get('api_key') or os.getenv('GEMINI_API_KEY')
+        name = self._get_or_create(model, strip_cache_markers(prefix), api_key)
+        if name is None:
+            return {**call_kwargs, 'messages': strip_cache_markers(messages)}
+        return {**call_kwargs, 'messages': rest, 'cached_content': name}
+
+    def _get_or_create(
+        self, model: str, prefix: List[Dict[str, Any]], api_key: Optional[str]
+    ) -> Optional[str]:
+        # Cached contents belong to the key that created them.
+        serialized = json.dumps([model, api_key, prefix], sort_keys=True)
+        key = hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent calls sharing a prefix wait for a single registration;
+        # calls with other prefixes are not held up by it.
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    name, expires_at, _ = entry
+                    if name is None or time.monotonic() < expires_at - EXPIRY_MARGIN_S:
+                        self.reused += name is not None
+                        return name
+            # The same prefix, whatever its uploaded files were named this run.
+            serialized = json.dumps(
+                [model, normalize_references(prefix)], sort_keys=True
+            )
+            content_id = hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+            if replaying():
+                name = replay_reference(f'context:{content_id}')
+            else:
+                name = self._create(model, prefix, key, api_key)
+                if name is not None:
+                    register_reference(name, f'context:{content_id}')
+                    with self._lock:
+                        self.created += 1
+            with self._lock:
+                self._entries[key] = (name, time.monotonic() + self.ttl_s, api_key)
+            return name
+
+    def _create(
+        self,
+        model: str,
+        prefix: List[Dict[str, Any]],
+        display_name: str,
+        api_key: Optional[str],
+    ) -> Optional[str]:
+        from litellm.llms.vertex_ai.context_caching.transformation import (
+            transform_openai_messages_to_gemini_context_caching,
+        )
+
+        body = transform_openai_messages_to_gemini_context_caching(
+            model=model.split('/', 1)[1],
+            messages=prefix,
+            custom_llm_provider='gemini',
+            cache_key=display_name,
+            vertex_project=None,
+            vertex_location=None,
+        )
+        body['ttl'] = f'{int(self.ttl_s)}s'
+        try:
+            response = requests.post(
+                f'{self.api_base}/cachedContents',
+                headers={'x-goog-api-key': api_key or ''},
+                json=body,
+                timeout=120,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f'Context cache not created, sending media inline: {e}')
+            return None
+        return response.json()['name']
+
+    def release(self) -> None:
+        """Delete every cache this registry created."""
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+            self._key_locks = {}
+        for name, _, api_key in entries:
+            if name is None or name.startswith(REPLAY_REFERENCE_PREFIX):
+                continue
+            try:
+                requests.delete(
+                    f'{self.api_base}/{name}',
+                    headers={'x-goog-api-key': api_key or ''},
+                    timeout=30,
+                )
+            except requests.RequestException as e:
+                # The TTL removes it eventually.
+                logger.warning(f'Could not delete context cache {name}: {e}')
+
+    def stats(self) -> Dict[str, int]:
+        return {'created': self.created, 'reused': self.reused}
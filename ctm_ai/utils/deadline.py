@@ -0,0 +1,71 @@
+import time
+from typing import Any, Dict, Optional, Union
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting a call once its deadline has passed."""
+
+
+class Deadline:
+    """A point in time by which a forward pass must produce its answer.
+
+    Stored on the monotonic clock so wall-clock adjustments cannot stretch or
+    shrink the budget.
+    """
+
+    def __init__(self, timeout_s: float) -> None:
+        self.timeout_s = float(timeout_s)
+        self.expires_at = time.monotonic() + self.timeout_s
+
+    @classmethod
+    def at(cls, timestamp: float) -> 'Deadline':
+        """Deadline at a wall-clock ``time.time()`` timestamp."""
+        return cls(timestamp - time.time())
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def __repr__(self) -> str:
+        return f'Deadline(remaining={self.remaining():.2f}s)'
+
+
+def resolve_deadline(
+    deadline: Union[None, float, Deadline] = None,
+    timeout_s: Optional[float] = None,
+) -> Optional[Deadline]:
+    """Combine an absolute ``deadline`` and a relative ``timeout_s``.
+
+    ``deadline`` is either a :class:`Deadline` or a ``time.time()`` timestamp.
+    When both are given the earlier one wins; with neither there is no limit.
+    """
+    if isinstance(deadline, (int, float)):
+        deadline = Deadline.at(deadline)
+    if timeout_s is None:
+        return deadline
+    relative = Deadline(timeout_s)
+    if deadline is None or relative.expires_at < deadline.expires_at:
+        return relative
+    return deadline
+
+
+def with_deadline_timeout(
+    call_kwargs: Dict[str, Any], deadline: Optional[Deadline]
+) -> Dict[str, Any]:
+    """Cap a completion request's ``timeout`` at the time left before ``deadline``.
+
+    Raises :class:`DeadlineExceeded` rather than starting a request that
+    could not finish in time.
+    """
+    if deadline is None:
+        return call_kwargs
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded('deadline passed before the request was sent')
+    timeout = call_kwargs.get('timeout')
+    if timeout is not None:
+        remaining = min(remaining, float(timeout))
+    return {**call_kwargs, 'timeout': remaining}
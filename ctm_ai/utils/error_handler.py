@@ -1,13 +1,50 @@
+import asyncio
 import math
 import time
 from functools import wraps
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
+from .cassette import CassetteMiss
+from .circuit_breaker import CircuitOpenError
+from .deadline import Deadline, DeadlineExceeded
 from .logger import logger
+from .metrics import get_metrics
 
 INF = float(math.inf)
 
 
+def _not_retryable(
+    deadline: Optional[Deadline], wait_time: float, error: Exception
+) -> Optional[str]:
+    """Why a failed call should not be retried after ``wait_time``, if so."""
+    if isinstance(error, CircuitOpenError):
+        return 'Circuit open'
+    if isinstance(error, CassetteMiss):
+        return 'Not in cassette'
+    if _out_of_time(deadline, wait_time, error):
+        return 'Deadline reached'
+    return None
+
+
+def _record_retry(args: Any, kwargs: Dict[str, Any]) -> None:
+    """Count a retry of a processor method under its metric labels."""
+    processor = args[0] if args else None
+    get_metrics().record_retry(
+        getattr(processor, 'name', ''),
+        getattr(processor, 'model', ''),
+        kwargs.get('phase') or 'initial',
+    )
+
+
+def _out_of_time(
+    deadline: Optional[Deadline], wait_time: float, error: Exception
+) -> bool:
+    """Whether a retry after ``wait_time`` could no longer meet ``deadline``."""
+    if isinstance(error, DeadlineExceeded):
+        return True
+    return deadline is not None and deadline.remaining() <= wait_time
+
+
 def multi_info_exponential_backoff(
     retries: int = 5, base_wait_time: int = 1
 ) -> Callable[
@@ -97,12 +134,60 @@ def message_exponential_backoff(
                 except Exception as e:
                     wait_time = base_wait_time * (2**attempts)
                     logger.error(f'Attempt {attempts + 1} failed: {e}')
+                    reason = _not_retryable(kwargs.get('deadline'), wait_time, e)
+                    if reason is not None:
+                        logger.error(f'{reason}; not retrying.')
+                        break
                     logger.error(f'Waiting {wait_time} seconds before retrying...')
+                    _record_retry(args, kwargs)
                     time.sleep(wait_time)
                     attempts += 1
-            logger.error(
-                f"Failed to execute '{func.__name__}' after {retries} retries.",
-            )
+            else:
+                logger.error(
+                    f"Failed to execute '{func.__name__}' after {retries} retries.",
+                )
+            return {'response': None, 'additional_questions': []}
+
+        return wrapper
+
+    return decorator
+
+
+def async_message_exponential_backoff(
+    retries: int = 5, base_wait_time: int = 1
+) -> Callable[
+    [Callable[..., Awaitable[Dict[str, Any]]]], Callable[..., Awaitable[Dict[str, Any]]]
+]:
+    """
+    Async variant of ``message_exponential_backoff`` that sleeps on the event loop.
+    :param retries: Maximum number of retries.
+    :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    """
+
+    def decorator(
+        func: Callable[..., Awaitable[Dict[str, Any]]],
+    ) -> Callable[..., Awaitable[Dict[str, Any]]]:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            attempts = 0
+            while attempts < retries:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    wait_time = base_wait_time * (2**attempts)
+                    logger.error(f'Attempt {attempts + 1} failed: {e}')
+                    reason = _not_retryable(kwargs.get('deadline'), wait_time, e)
+                    if reason is not None:
+                        logger.error(f'{reason}; not retrying.')
+                        break
+                    logger.error(f'Waiting {wait_time} seconds before retrying...')
+                    _record_retry(args, kwargs)
+                    await asyncio.sleep(wait_time)
+                    attempts += 1
+            else:
+                logger.error(
+                    f"Failed to execute '{func.__name__}' after {retries} retries.",
+                )
             return {'response': None, 'additional_questions': []}
 
         return wrapper
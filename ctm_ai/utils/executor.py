@@ -0,0 +1,215 @@
+import concurrent.futures
+import contextvars
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+DEFAULT_MAX_WORKERS = 32
+
+# Set in threads running a SharedExecutor task, so nested submits run inline
+# instead of waiting for a worker that may never free up.
+_worker = threading.local()
+
+_Task = Tuple[concurrent.futures.Future, Callable[..., Any], tuple, dict]
+
+
+class SharedExecutor:
+    """Bounded thread pool shared by every CTM in the process.
+
+    Replaces the pool each phase used to create and tear down, so the number
+    of threads stays at ``max_workers`` however many CTM instances run at
+    once. An existing ``concurrent.futures.Executor`` may be passed instead
+    (it is used as is and never shut down here). :meth:`stats` reports the
+    queue depth and active workers; :meth:`quota` caps one CTM's share.
+    Tasks run in a copy of the submitter's context, so context variables
+    (e.g. the media cache's current forward pass) follow the work.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='ctm-worker'
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def active_workers(self) -> int:
+        return self._active
+
+    def submit(
+        self, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future:
+        """Run ``fn`` on the pool; cancelling the future drops it if still queued."""
+        if getattr(_worker, 'executor', None) is self:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            self._run(future, fn, args, kwargs, queued=False)
+            return future
+        return self.spawn(fn, *args, **kwargs)
+
+    def spawn(
+        self, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future:
+        """Queue ``fn`` even when called from one of the pool's own workers.
+
+        For callers that wait with a timeout and take the task back with
+        ``future.cancel()`` if no worker has picked it up, so a full pool
+        cannot deadlock them.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            self._queued += 1
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, future, fn, args, kwargs)
+        return future
+
+    def _run(
+        self,
+        future: concurrent.futures.Future,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        queued: bool = True,
+    ) -> None:
+        with self._lock:
+            self._queued -= int(queued)
+        if not future.set_running_or_notify_cancel():
+            return
+        with self._lock:
+            self._active += 1
+        outer, _worker.executor = getattr(_worker, 'executor', None), self
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            _worker.executor = outer
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def quota(self, limit: Optional[int]) -> 'ExecutorQuota':
+        return ExecutorQuota(self, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': self._queued,
+                'active_workers': self._active,
+                'completed': self._completed,
+            }
+
+
+class ExecutorQuota:
+    """One CTM's view of the shared executor, with at most ``limit`` tasks in it.
+
+    Tasks past the limit wait here, outside the shared queue, so a CTM
+    fanning out many calls cannot hold every worker while other instances
+    wait. ``limit=None`` passes tasks straight through.
+    """
+
+    def __init__(self, executor: SharedExecutor, limit: Optional[int] = None) -> None:
+        if limit is not None and limit < 1:
+            raise ValueError(f'executor quota must be at least 1, got {limit}')
+        self.executor = executor
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._waiting: Deque[_Task] = deque()
+        self._running = 0
+
+    def submit(
+        self, fn: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> concurrent.futures.Future:
+        # Nested submits from the pool's own workers run inline, unthrottled.
+        if self.limit is None or getattr(_worker, 'executor', None) is self.executor:
+            return self.executor.submit(fn, *args, **kwargs)
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        # Queued tasks are dispatched from whichever worker frees a slot, so
+        # pin the submitter's context now.
+        args = (fn, *args)
+        fn = contextvars.copy_context().run
+        with self._lock:
+            if self._running >= self.limit:
+                self._waiting.append((future, fn, args, kwargs))
+                return future
+            self._running += 1
+        self._dispatch((future, fn, args, kwargs))
+        return future
+
+    def _dispatch(self, task: _Task) -> None:
+        future, fn, args, kwargs = task
+        inner = self.executor.submit(fn, *args, **kwargs)
+        # Cancelling the caller's future drops the task while still queued.
+        future.add_done_callback(lambda f: f.cancelled() and inner.cancel())
+        inner.add_done_callback(lambda f: self._finish(future, f))
+
+    def _finish(
+        self, future: concurrent.futures.Future, inner: concurrent.futures.Future
+    ) -> None:
+        if not inner.cancelled() and future.set_running_or_notify_cancel():
+            if inner.exception() is not None:
+                future.set_exception(inner.exception())
+            else:
+                future.set_result(inner.result())
+        with self._lock:
+            while self._waiting:
+                task = self._waiting.popleft()
+                if not task[0].cancelled():
+                    break
+            else:
+                self._running -= 1
+                return
+        self._dispatch(task)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'running': self._running,
+                'waiting': len(self._waiting),
+            }
+
+
+_executor: Optional[SharedExecutor] = None
+_executor_settings: Union[Dict[str, Any], concurrent.futures.Executor, None] = None
+_executor_lock = threading.Lock()
+
+
+def configure_executor(
+    settings: Union[Dict[str, Any], concurrent.futures.Executor, None],
+) -> SharedExecutor:
+    """Set the process-wide executor.
+
+    ``settings`` holds :class:`SharedExecutor` kwargs (``{"max_workers":
+    64}``) or is an executor to use; None restores the default. Re-applying
+    the settings in force keeps the running pool. A replaced pool finishes
+    the work already queued on it.
+    """
+    global _executor, _executor_settings
+    with _executor_lock:
+        if _executor is None or settings != _executor_settings:
+            if isinstance(settings, concurrent.futures.Executor):
+                _executor = SharedExecutor(executor=settings)
+                _executor_settings = settings
+            else:
+                _executor = SharedExecutor(**(settings or {}))
+                _executor_settings = dict(settings) if settings is not None else None
+        return _executor
+
+
+def get_executor() -> SharedExecutor:
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+    return configure_executor(None)
@@ -0,0 +1,36 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+# Digests remembered by file identity; an entry is a path and 64 hex chars.
+_MAX_DIGESTS = 65536
+
+_digests: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 of the bytes of the file at ``path``.
+
+    Memoized by ``(path, mtime, size)``, so the transcode cache and media
+    uploads read each file once per process however often they key on it.
+    """
+    stat = os.stat(path)
+    identity = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _digests.get(identity)
+        if digest is not None:
+            _digests.move_to_end(identity)
+            return digest
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+    with _lock:
+        _digests[identity] = digest
+        while len(_digests) > _MAX_DIGESTS:
+            _digests.popitem(last=False)
+    return digest
@@ -0,0 +1,263 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from .executor import get_executor
+from .logger import logger
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies for one model."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float) -> None:
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgePolicy:
+    """When and how often to send a duplicate of a slow request.
+
+    A request that has not returned after the model's ``percentile`` latency
+    gets one duplicate; the first successful answer wins. Duplicates are
+    capped at ``budget`` times the number of primary requests, and no hedge
+    is sent until ``min_samples`` latencies have been observed for the model.
+    Both copies of a synchronous call run on the shared executor.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.1,
+        min_samples: int = 20,
+    ) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.primary_requests = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def tracker(self, model: str) -> LatencyTracker:
+        with self._lock:
+            if model not in self._trackers:
+                self._trackers[model] = LatencyTracker()
+            return self._trackers[model]
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging ``model`` or None to never hedge."""
+        tracker = self.tracker(model)
+        if tracker.count() < self.min_samples:
+            return None
+        return tracker.percentile(self.percentile)
+
+    def _start_primary(self) -> None:
+        with self._lock:
+            self.primary_requests += 1
+
+    def _try_spend_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged_requests + 1 > self.budget * self.primary_requests:
+                return False
+            self.hedged_requests += 1
+            return True
+
+    def call(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        on_discard: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Run ``fn``, racing a duplicate against it if it turns out slow.
+
+        The primary runs on the shared executor while the caller waits up to
+        the model's hedge delay; a primary still queued by then is taken back
+        and run on the caller's thread instead. Otherwise the hedge is
+        submitted and the first successful answer is returned at once.
+        ``on_discard`` receives the losing response when it completes, so
+        its usage can still be accounted.
+        """
+        self._start_primary()
+        delay = self.hedge_delay(model)
+        start = time.monotonic()
+        if delay is None:
+            result = fn()
+            self.tracker(model).record(time.monotonic() - start)
+            return result
+
+        executor = get_executor()
+        primary = executor.spawn(fn)
+        done, _ = concurrent.futures.wait({primary}, timeout=delay)
+        if not done and primary.cancel():
+            # No worker free to race on; don't wait for one.
+            result = fn()
+        elif done or not self._try_spend_hedge():
+            result = primary.result()
+        else:
+            logger.info(f'Hedging {model} request after {delay:.2f}s')
+            hedge = executor.spawn(fn)
+            result = self._race(primary, hedge, on_discard)
+        self.tracker(model).record(time.monotonic() - start)
+        return result
+
+    def _race(
+        self,
+        primary: concurrent.futures.Future,
+        hedge: concurrent.futures.Future,
+        on_discard: Optional[Callable[[Any], None]],
+    ) -> Any:
+        pending: Set[concurrent.futures.Future] = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    # Only wait for a copy that holds a worker.
+                    pending = {f for f in pending if not f.cancel()}
+                    continue
+                for loser in {primary, hedge} - {future}:
+                    if not loser.cancel() and on_discard is not None:
+                        loser.add_done_callback(_discard_with(on_discard))
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+        assert error is not None
+        raise error
+
+    async def acall(
+        self,
+        model: str,
+        fn: Callable[[], Awaitable[Any]],
+        on_discard: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Async counterpart of :meth:`call`; the losing request is cancelled.
+
+        A loser that already finished cannot be cancelled; its response goes
+        to ``on_discard``.
+        """
+        self._start_primary()
+        delay = self.hedge_delay(model)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(fn())
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and self._try_spend_hedge():
+                logger.info(f'Hedging {model} request after {delay:.2f}s')
+                return await self._arace(model, primary, fn, start, on_discard)
+        result = await primary
+        self.tracker(model).record(time.monotonic() - start)
+        return result
+
+    async def _arace(
+        self,
+        model: str,
+        primary: asyncio.Future,
+        fn: Callable[[], Awaitable[Any]],
+        start: float,
+        on_discard: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        hedge = asyncio.ensure_future(fn())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in {primary, hedge} - {future}:
+                    if not loser.cancel() and on_discard is not None:
+                        loser.add_done_callback(_discard_with(on_discard))
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                self.tracker(model).record(time.monotonic() - start)
+                return future.result()
+        assert error is not None
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'primary_requests': self.primary_requests,
+            'hedged_requests': self.hedged_requests,
+            'hedge_wins': self.hedge_wins,
+        }
+
+
+def _discard_with(on_discard: Callable[[Any], None]) -> Callable[[Any], None]:
+    """Done callback passing a losing copy's response, if any, to ``on_discard``."""
+
+    def callback(future: Any) -> None:
+        if not future.cancelled() and future.exception() is None:
+            on_discard(future.result())
+
+    return callback
+
+
+# Hedging is process-wide and off until configured.
+_policy: Optional[HedgePolicy] = None
+_policy_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_hedging(settings: Optional[Dict[str, Any]]) -> Optional[HedgePolicy]:
+    """Enable hedging with :class:`HedgePolicy` kwargs, or disable with None.
+
+    Re-applying the settings already in force keeps the learned latencies.
+    """
+    global _policy, _policy_settings
+    if settings is None:
+        _policy, _policy_settings = None, None
+    elif _policy is None or settings != _policy_settings:
+        _policy, _policy_settings = HedgePolicy(**settings), dict(settings)
+    return _policy
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    return _policy
+
+
+def hedged(
+    model: Optional[str],
+    fn: Callable[[], Any],
+    on_discard: Optional[Callable[[Any], None]] = None,
+) -> Any:
+    """Run ``fn`` under the hedging policy, or directly when it is disabled."""
+    policy = _policy
+    if policy is None or not model:
+        return fn()
+    return policy.call(model, fn, on_discard)
+
+
+async def ahedged(
+    model: Optional[str],
+    fn: Callable[[], Awaitable[Any]],
+    on_discard: Optional[Callable[[Any], None]] = None,
+) -> Any:
+    policy = _policy
+    if policy is None or not model:
+        return await fn()
+    return await policy.acall(model, fn, on_discard)
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .litellm_utils import get_model_provider, get_required_api_key_name
+from .logger import logger
+
+AUTH_STATUS_CODES = (401, 403)
+QUOTA_STATUS_CODES = (429,)
+
+
+def _classify_key_error(error: BaseException) -> Optional[str]:
+    """Return 'auth' or 'quota' when ``error`` is the key's fault, else None."""
+    status = getattr(error, 'status_code', None)
+    name = type(error).__name__
+    if status in AUTH_STATUS_CODES or name in (
+        'AuthenticationError',
+        'PermissionDeniedError',
+    ):
+        return 'auth'
+    if status in QUOTA_STATUS_CODES or name == 'RateLimitError':
+        return 'quota'
+    return None
+
+
+def api_key_id(key: str) -> str:
+    """Short, non-secret identifier of an API key."""
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+class _KeyState:
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.quarantined_until = 0.0
+
+
+class APIKeyPool:
+    """Thread-safe pool of API keys for one provider.
+
+    Each call leases the healthy key with the fewest in-flight requests (ties
+    broken by total requests). A key that fails with an auth error is
+    quarantined for ``auth_quarantine_s``; one that hits its quota for
+    ``quota_quarantine_s``. If every key is quarantined, the one whose
+    quarantine ends first is used rather than failing outright.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        keys: Sequence[str],
+        quota_quarantine_s: float = 60.0,
+        auth_quarantine_s: float = 3600.0,
+    ) -> None:
+        keys = [k.strip() for k in keys if k and k.strip()]
+        if not keys:
+            raise ValueError(f'APIKeyPool({provider}): no non-empty keys provided')
+        self.provider = provider
+        self.quota_quarantine_s = quota_quarantine_s
+        self.auth_quarantine_s = auth_quarantine_s
+        self._states = [_KeyState(k) for k in dict.fromkeys(keys)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _choose(self) -> _KeyState:
+        now = time.monotonic()
+        healthy = [s for s in self._states if s.quarantined_until <= now]
+        if healthy:
+            return min(healthy, key=lambda s: (s.in_flight, s.requests))
+        return min(self._states, key=lambda s: s.quarantined_until)
+
+    def preferred_key(self) -> str:
+        """The key :meth:`acquire` would lease now, without leasing it."""
+        with self._lock:
+            return self._choose().key
+
+    def key_by_id(self, key_id: str) -> Optional[str]:
+        return next((s.key for s in self._states if api_key_id(s.key) == key_id), None)
+
+    def acquire(self, key: Optional[str] = None) -> str:
+        """Lease the best key, or ``key`` itself when it belongs to the pool."""
+        with self._lock:
+            state = next((s for s in self._states if s.key == key), None)
+            if state is None:
+                state = self._choose()
+            state.in_flight += 1
+            state.requests += 1
+            return state.key
+
+    def release(
+        self,
+        key: str,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        with self._lock:
+            state = next((s for s in self._states if s.key == key), None)
+            if state is None:
+                return
+            state.in_flight -= 1
+            usage = getattr(response, 'usage', None)
+            if usage:
+                state.tokens += getattr(usage, 'total_tokens', 0) or 0
+            if error is None:
+                return
+            state.errors += 1
+            kind = _classify_key_error(error)
+            if kind is None:
+                return
+            duration = (
+                self.auth_quarantine_s if kind == 'auth' else self.quota_quarantine_s
+            )
+            state.quarantined_until = time.monotonic() + duration
+        logger.warning(
+            f'{self.provider} key ...{key[-4:]} quarantined for {duration:.0f}s '
+            f'({kind} error: {type(error).__name__})'
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-key usage; keys are reported by their last four characters."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'key': f'...{s.key[-4:]}',
+                    'in_flight': s.in_flight,
+                    'requests': s.requests,
+                    'errors': s.errors,
+                    'tokens': s.tokens,
+                    'healthy': s.quarantined_until <= now,
+                }
+                for s in self._states
+            ]
+
+
+class KeyLease:
+    """A key leased for one call; ``call_kwargs`` carries it as ``api_key``."""
+
+    def __init__(
+        self,
+        pool: Optional[APIKeyPool],
+        key: Optional[str],
+        call_kwargs: Dict[str, Any],
+    ) -> None:
+        self.pool = pool
+        self.key = key
+        self.call_kwargs = call_kwargs
+        self.response: Any = None
+
+    def record(self, response: Any) -> None:
+        self.response = response
+
+
+# Pools are process-wide per provider. A provider without an explicitly
+# configured pool gets one from ``<KEY_NAME>S`` (e.g. GEMINI_API_KEYS, comma
+# separated) if that variable is set; otherwise calls keep using the single
+# key litellm reads from the environment.
+_pools: Dict[str, Optional[APIKeyPool]] = {}
+_pools_lock = threading.Lock()
+
+
+def configure_key_pool(
+    provider: str, keys: Optional[Sequence[str]], **kwargs: Any
+) -> Optional[APIKeyPool]:
+    """Install (or with ``keys=None`` remove) the key pool for ``provider``."""
+    with _pools_lock:
+        _pools[provider] = APIKeyPool(provider, keys, **kwargs) if keys else None
+        return _pools[provider]
+
+
+def get_key_pool(model: Optional[str]) -> Optional[APIKeyPool]:
+    """Return the key pool serving ``model``'s provider, if any."""
+    if not model:
+        return None
+    provider = get_model_provider(model)
+    with _pools_lock:
+        if provider not in _pools:
+            env_name = get_required_api_key_name(model)
+            raw = os.getenv(f'{env_name}S', '') if env_name else ''
+            keys = [k for k in raw.split(',') if k.strip()]
+            _pools[provider] = APIKeyPool(provider, keys) if keys else None
+        return _pools[provider]
+
+
+@contextmanager
+def api_key_lease(
+    model: Optional[str],
+    call_kwargs: Dict[str, Any],
+    pin_key_id: Optional[str] = None,
+) -> Iterator[KeyLease]:
+    """Lease a pooled key for one call to ``model``.
+
+    Use ``lease.call_kwargs`` for the request and ``lease.record(response)`` on
+    success; errors raised inside the block are reported to the pool. Without
+    a pool the call kwargs pass through unchanged. ``pin_key_id`` (see
+    :func:`api_key_id`) leases that key, e.g. the one that uploaded a file the
+    request references.
+    """
+    pool = get_key_pool(model)
+    if pool is None:
+        yield KeyLease(None, None, call_kwargs)
+        return
+    key = pool.acquire(pool.key_by_id(pin_key_id) if pin_key_id else None)
+    lease = KeyLease(pool, key, {**call_kwargs, 'api_key': key})
+    try:
+        yield lease
+    except BaseException as e:
+        pool.release(key, error=e)
+        raise
+    pool.release(key, response=lease.response)
+
+
+def key_pool_stats() -> Dict[str, List[Dict[str, Any]]]:
+    with _pools_lock:
+        pools = {p: pool for p, pool in _pools.items() if pool is not None}
+    return {provider: pool.stats() for provider, pool in pools.items()}
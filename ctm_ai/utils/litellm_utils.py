@@ -1,9 +1,7 @@
 import os
-import time
 from typing import Any, Dict, List
 
 import litellm
-from litellm import completion
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
 
@@ -29,6 +27,8 @@ def get_completion_kwargs(model: str) -> dict:
 
     For Qwen models, routes through DashScope's OpenAI-compatible endpoint.
     For other providers, returns the model name as-is (handled natively by LiteLLM).
+    When a key pool is configured for the provider (see ``key_pool``), the
+    ``api_key`` here is replaced per call by the leased key.
     """
     if model.startswith('qwen/'):
         actual_model = 'openai/' + model.split('/', 1)[1]
@@ -90,7 +90,9 @@ def litellm_completion_request(
         else:
             completion_kwargs['functions'] = functions
 
-    response = completion(**completion_kwargs)
+    from .llm_backend import get_llm_backend
+
+    response = get_llm_backend().complete(**completion_kwargs)
     return response
 
 
@@ -120,8 +122,19 @@ def call_llm(
     Call LLM using LiteLLM with retry logic and error handling.
     Returns: (message_dict, error_code, total_tokens)
     """
+    from .rate_limiter import acquire_rate_limit, settle_rate_limit
+
     for attempt in range(try_times):
-        time.sleep(15)
+        # Pace attempts with the shared per-provider limiter instead of a
+        # fixed sleep; with no limit configured for ``model`` this is a no-op.
+        ticket = acquire_rate_limit(
+            model,
+            {
+                'messages': convert_messages_to_litellm_format(messages),
+                'max_tokens': max_tokens,
+                'n': n,
+            },
+        )
         try:
             response = litellm_completion_request(
                 messages,
@@ -133,6 +146,7 @@ def call_llm(
                 **kwargs,
             )
 
+            settle_rate_limit(ticket, response)
             message = response.choices[0].message
             total_tokens = response.usage.total_tokens
 
@@ -186,9 +200,11 @@ def ask_llm_standard(
     Standard LLM asking method for basic text completion using LiteLLM.
     Returns a list of generated responses.
     """
+    from .llm_backend import get_llm_backend
+
     litellm_messages = convert_messages_to_litellm_format(messages)
 
-    response = completion(
+    response = get_llm_backend().complete(
         model=model,
         messages=litellm_messages,
         max_tokens=max_tokens,
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
+
+from .rate_limiter import estimate_request_tokens
+
+# Requests the stream helpers add to every streaming call.
+STREAM_OPTIONS = {'include_usage': True}
+
+
+class LLMBackend(ABC):
+    """Client layer behind every LLM call the CTM makes.
+
+    Requests are litellm / OpenAI-style completion kwargs (``model``,
+    ``messages``, ``max_tokens``, ``tools``, ...) and responses have the
+    OpenAI shape: ``response.choices[i].message`` plus ``response.usage``.
+    Tool calls are ordinary :meth:`complete` requests that carry ``tools``;
+    the answer's ``message.tool_calls`` lists the requested calls.
+
+    Subclasses implement :meth:`complete` and :meth:`stream`; the async
+    variants default to running those in a worker thread.
+    """
+
+    @abstractmethod
+    def complete(self, **kwargs: Any) -> Any:
+        """Send one completion request and return the whole response."""
+
+    async def acomplete(self, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self.complete, **kwargs)
+
+    @abstractmethod
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        """Stream chunks with ``choices[0].delta.content``; the last has usage.
+
+        The returned iterator may have a ``close()`` method to stop
+        generation early.
+        """
+
+    async def astream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        chunks = await asyncio.to_thread(lambda: list(self.stream(**kwargs)))
+        return _aiter(chunks)
+
+
+async def _aiter(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+class LiteLLMBackend(LLMBackend):
+    """Default backend: calls ``litellm.completion`` / ``acompletion``.
+
+    ``defaults`` are merged under every request, e.g. ``api_base`` to point
+    all calls at a local OpenAI-compatible model server.
+    """
+
+    def __init__(self, **defaults: Any) -> None:
+        self.defaults = defaults
+
+    def _request(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {**self.defaults, **kwargs} if self.defaults else kwargs
+
+    def complete(self, **kwargs: Any) -> Any:
+        import litellm
+
+        return litellm.completion(**self._request(kwargs))
+
+    async def acomplete(self, **kwargs: Any) -> Any:
+        import litellm
+
+        return await litellm.acompletion(**self._request(kwargs))
+
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        import litellm
+
+        return litellm.completion(
+            **self._request(kwargs), stream=True, stream_options=STREAM_OPTIONS
+        )
+
+    async def astream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        import litellm
+
+        return await litellm.acompletion(
+            **self._request(kwargs), stream=True, stream_options=STREAM_OPTIONS
+        )
+
+
+Responder = Union[str, Dict[str, Any], Callable[[Dict[str, Any]], Any]]
+
+# Satisfies every phase's JSON format and parses as a plain answer.
+DEFAULT_MOCK_REPLY = {
+    'response': 'Mock answer.',
+    'additional_questions': [],
+    'relevance': 0.5,
+    'confidence': 0.5,
+    'surprise': 0.1,
+}
+
+
+class MockLLMBackend(LLMBackend):
+    """Deterministic offline backend for tests and dry runs.
+
+    ``responder`` is a fixed reply (a string, or a dict sent as JSON) or a
+    callable that receives the request kwargs and returns one; a callable
+    may also return a complete response object, e.g. one with tool calls.
+    ``latency_s`` simulates provider latency. Requests are kept in
+    :attr:`calls`.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Responder] = None,
+        latency_s: float = 0.0,
+        chunk_chars: int = 16,
+    ) -> None:
+        self.responder = responder if responder is not None else DEFAULT_MOCK_REPLY
+        self.latency_s = latency_s
+        self.chunk_chars = chunk_chars
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _reply(self, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            self.calls.append(kwargs)
+        reply = self.responder(kwargs) if callable(self.responder) else self.responder
+        if isinstance(reply, dict):
+            return json.dumps(reply)
+        return reply
+
+    @staticmethod
+    def _usage(kwargs: Dict[str, Any], content: str) -> SimpleNamespace:
+        prompt_tokens = estimate_request_tokens({**kwargs, 'max_tokens': 0})
+        completion_tokens = estimate_request_tokens(
+            {'messages': [{'role': 'assistant', 'content': content}]}
+        )
+        return SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def _response(self, kwargs: Dict[str, Any], reply: Any) -> Any:
+        if not isinstance(reply, str):
+            return reply
+        message = SimpleNamespace(role='assistant', content=reply, tool_calls=None)
+        return SimpleNamespace(
+            model=kwargs.get('model'),
+            choices=[SimpleNamespace(message=message, finish_reason='stop')]
+            * (kwargs.get('n') or 1),
+            usage=self._usage(kwargs, reply),
+        )
+
+    def complete(self, **kwargs: Any) -> Any:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._response(kwargs, self._reply(kwargs))
+
+    async def acomplete(self, **kwargs: Any) -> Any:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self._response(kwargs, self._reply(kwargs))
+
+    def _chunks(self, kwargs: Dict[str, Any]) -> List[Any]:
+        reply = str(self._reply(kwargs))
+        pieces = [
+            reply[i : i + self.chunk_chars]
+            for i in range(0, len(reply), self.chunk_chars)
+        ]
+        chunks = [
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))],
+                usage=None,
+            )
+            for piece in pieces
+        ]
+        chunks.append(SimpleNamespace(choices=[], usage=self._usage(kwargs, reply)))
+        return chunks
+
+    def stream(self, **kwargs: Any) -> Iterator[Any]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return iter(self._chunks(kwargs))
+
+    async def astream(self, **kwargs: Any) -> AsyncIterator[Any]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return _aiter(self._chunks(kwargs))
+
+
+_BACKENDS: Dict[str, Callable[..., LLMBackend]] = {
+    'litellm': LiteLLMBackend,
+    'mock': MockLLMBackend,
+}
+
+# Process-wide, like the other LLM call policies; litellm until configured.
+_default_backend: LLMBackend = LiteLLMBackend()
+_backend: LLMBackend = _default_backend
+
+
+def configure_llm_backend(
+    backend: Union[None, str, Dict[str, Any], LLMBackend],
+) -> LLMBackend:
+    """Install the backend every LLM call goes through.
+
+    Accepts an :class:`LLMBackend`, a registered name (``'litellm'``,
+    ``'mock'``), a dict with ``type`` plus constructor kwargs, or None to
+    restore the litellm default.
+    """
+    global _backend
+    if backend is None:
+        _backend = _default_backend
+    elif isinstance(backend, LLMBackend):
+        _backend = backend
+    else:
+        spec = {'type': backend} if isinstance(backend, str) else dict(backend)
+        name = spec.pop('type', 'litellm')
+        if name not in _BACKENDS:
+            raise ValueError(f'Unknown LLM backend: {name!r}')
+        _backend = _BACKENDS[name](**spec)
+    return _backend
+
+
+def get_llm_backend() -> LLMBackend:
+    return _backend
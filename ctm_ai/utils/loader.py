@@ -1,11 +1,14 @@
-import base64
+import json
 import os
-from typing import List, Optional, Tuple
+import subprocess
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
 from numpy.typing import NDArray
 from PIL import Image
 
+from .media_cache import encode_file_base64
+
 
 def load_audio(audio_path: str) -> Tuple[NDArray[np.float32], int]:
     import librosa
@@ -15,9 +18,7 @@ def load_audio(audio_path: str) -> Tuple[NDArray[np.float32], int]:
 
 
 def load_image(image_path: str) -> str:
-    with open(image_path, 'rb') as image_file:
-        encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-        return encoded_image
+    return encode_file_base64(image_path)
 
 
 def load_images(image_paths: List[str]) -> List[Image.Image]:
@@ -36,65 +37,204 @@ def load_images(image_paths: List[str]) -> List[Image.Image]:
     return images
 
 
-def load_video(video_path: str, frame_num: int = 5) -> List[NDArray[np.uint8]]:
+# Targets at most this many frames ahead are reached by grabbing frames
+# sequentially; further ones by seeking (which decodes from a keyframe).
+_MAX_GRAB_GAP = 32
+
+
+def _even_indices(total: int, num_frames: int) -> List[int]:
+    return sorted({int(total * i / num_frames) for i in range(num_frames)})
+
+
+def _count_frames(video_path: str) -> int:
+    """Frame count found by grabbing (without decoding) every frame."""
     import cv2
 
     cap = cv2.VideoCapture(video_path)
-    frames: List[NDArray[np.uint8]] = []
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frames.append(frame.astype(np.uint8))
+        count = 0
+        while cap.grab():
+            count += 1
+        return count
     finally:
         cap.release()
 
-    if len(frames) >= frame_num:
-        step = len(frames) // frame_num
-        frames = [frames[i] for i in range(0, len(frames), step)]
-    return frames
-
-
-def extract_video_frames(
-    video_path: str,
-    output_dir: str,
-    max_frames: Optional[int] = None,
-) -> List[str]:
-    import os
 
+def _video_frame_count(video_path: str) -> int:
+    """Frames in the video, counted when the container does not say."""
     import cv2
 
     cap = cv2.VideoCapture(video_path)
-    frame_list = []
-    os.makedirs(output_dir, exist_ok=True)
-
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # type: ignore[attr-defined]
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # type: ignore[attr-defined]
+    finally:
+        cap.release()
+    return total if total > 0 else _count_frames(video_path)
 
-    if max_frames is not None:
-        sample_indices = [int(total_frames * i / max_frames) for i in range(max_frames)]
-    else:
-        sample_indices = list(range(total_frames))
 
-    frame_index = 0
+def sample_video_frames(
+    video_path: str,
+    indices: Optional[Iterable[int]] = None,
+    num_frames: Optional[int] = None,
+    keyframes_only: bool = False,
+) -> Iterator[Tuple[int, NDArray[np.uint8]]]:
+    """Yield ``(frame_index, frame)`` for selected frames of a video, in order.
+
+    Frames are given as ``indices`` or as ``num_frames`` evenly spaced ones
+    (default: every frame). Only targets are decoded: nearby ones by
+    skipping frames, distant ones by seeking. Frames are yielded one at a
+    time, so memory stays bounded by a single frame. With
+    ``keyframes_only`` each target is replaced by the nearest keyframe and
+    ffmpeg decodes just those, which is much faster on long clips but only
+    approximately evenly spaced. Videos whose container reports no frame
+    count (some streams and WebM files) are decoded sequentially, as seeking
+    in them is unreliable too; spacing ``num_frames`` first counts them.
+    """
+    import cv2
 
+    cap = cv2.VideoCapture(video_path)
     try:
-        while True:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # type: ignore[attr-defined]
+        sequential = total <= 0
+        if indices is not None:
+            # Indices past the end of an uncounted video just end the loop.
+            targets = sorted(
+                {i for i in indices if 0 <= i and (sequential or i < total)}
+            )
+        else:
+            if sequential:
+                total = _count_frames(video_path)
+            if num_frames is not None:
+                targets = _even_indices(total, num_frames)
+            else:
+                targets = list(range(total))
+        if keyframes_only:
+            cap.release()
+            yield from _sample_keyframes(video_path, targets)
+            return
+        position = 0
+        for target in targets:
+            if sequential or 0 <= target - position <= _MAX_GRAB_GAP:
+                while position < target and cap.grab():
+                    position += 1
+                if position < target:
+                    break
+            else:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)  # type: ignore[attr-defined]
+                position = target
             ret, frame = cap.read()
-            if not ret or frame_index >= total_frames:
+            if not ret:
                 break
+            position += 1
+            yield target, frame.astype(np.uint8)
+    finally:
+        cap.release()
 
-            if frame_index in sample_indices:
-                frame_filename = os.path.join(
-                    output_dir, f'frame_{frame_index:05d}.jpg'
-                )
-                cv2.imwrite(frame_filename, frame)  # type: ignore[attr-defined]
-                frame_list.append(frame_filename)
-
-            frame_index += 1
 
+def _sample_keyframes(
+    video_path: str, targets: List[int]
+) -> Iterator[Tuple[int, NDArray[np.uint8]]]:
+    # Keyframe times come from packet flags, which ffprobe reads without
+    # decoding; ffmpeg then decodes only the chosen keyframes.
+    probe = subprocess.run(
+        [
+            'ffprobe',
+            '-v',
+            'error',
+            '-select_streams',
+            'v:0',
+            '-show_entries',
+            'stream=width,height,avg_frame_rate:packet=pts_time,flags',
+            '-of',
+            'json',
+            video_path,
+        ],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    info = json.loads(probe.stdout)
+    stream = info['streams'][0]
+    width, height = int(stream['width']), int(stream['height'])
+    num, _, den = stream['avg_frame_rate'].partition('/')
+    fps = float(num) / float(den or 1) if float(num) else 25.0
+    keyframes = sorted(
+        float(packet['pts_time'])
+        for packet in info.get('packets', [])
+        if 'K' in packet.get('flags', '') and 'pts_time' in packet
+    )
+    if not keyframes or not targets:
+        return
+    chosen = sorted(
+        {min(keyframes, key=lambda t: abs(t - target / fps)) for target in targets}
+    )
+    select = '+'.join(f'lt(abs(t-{t:.6f}),0.0005)' for t in chosen)
+    frame_bytes = width * height * 3
+    proc = subprocess.Popen(
+        [
+            'ffmpeg',
+            '-v',
+            'error',
+            '-skip_frame',
+            'nokey',
+            '-i',
+            video_path,
+            '-vf',
+            f"select='{select}'",
+            '-vsync',
+            'vfr',
+            '-f',
+            'rawvideo',
+            '-pix_fmt',
+            'bgr24',
+            'pipe:1',
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for t in chosen:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            yield int(round(t * fps)), frame
     finally:
-        cap.release()
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+def load_video(
+    video_path: str, frame_num: int = 5, keyframes_only: bool = False
+) -> List[NDArray[np.uint8]]:
+    total = _video_frame_count(video_path)
+    step = total // frame_num if total >= frame_num else 1
+    return [
+        frame
+        for _, frame in sample_video_frames(
+            video_path, range(0, total, step), keyframes_only=keyframes_only
+        )
+    ]
+
+
+def extract_video_frames(
+    video_path: str,
+    output_dir: str,
+    max_frames: Optional[int] = None,
+    keyframes_only: bool = False,
+) -> List[str]:
+    import cv2
+
+    os.makedirs(output_dir, exist_ok=True)
+    frame_list = []
+    for frame_index, frame in sample_video_frames(
+        video_path, num_frames=max_frames, keyframes_only=keyframes_only
+    ):
+        frame_filename = os.path.join(output_dir, f'frame_{frame_index:05d}.jpg')
+        cv2.imwrite(frame_filename, frame)  # type: ignore[attr-defined]
+        frame_list.append(frame_filename)
     return frame_list
 
 
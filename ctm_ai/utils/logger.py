@@ -75,8 +75,10 @@ logger = logging.getLogger('CTM-AI')
 logger.setLevel(logging.DEBUG)
 logger.addHandler(get_console_handler())
 
-log_file = 'ctm_log_output.log'
-file_handler = logging.FileHandler(log_file, encoding='utf-8')
+# Written to the working directory unless CTM_LOG_FILE points elsewhere; the
+# file is only created once something is logged.
+log_file = os.environ.get('CTM_LOG_FILE', 'ctm_log_output.log')
+file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
 file_handler.setLevel(logging.DEBUG)
 
 file_formatter = logging.Formatter(
@@ -0,0 +1,243 @@
+import binascii
+import contextvars
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .media_pack import get_media_pack
+from .singleflight import SingleFlight
+
+DEFAULT_MEDIA_CACHE_MB = 512.0
+
+FORWARD = 'forward'
+PROCESS = 'process'
+
+# Input bytes per base64 chunk; a multiple of 3 so chunks need no padding.
+_ENCODE_CHUNK = 3 * 256 * 1024
+
+# Charged for values that are not strings or lists of strings (durations, ...).
+_SMALL_VALUE_BYTES = 64
+
+
+def _value_bytes(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_value_bytes(item) for item in value)
+    return _SMALL_VALUE_BYTES
+
+
+class ForwardScope:
+    """The cache entries one forward pass has used."""
+
+    def __init__(self) -> None:
+        self.keys: Set[Tuple[Any, ...]] = set()
+        self.token: Optional[contextvars.Token] = None
+
+
+# The forward pass the current thread or task works for. The shared executor
+# runs tasks in their submitter's context, so processor threads see it too.
+_current_forward: 'contextvars.ContextVar[Optional[ForwardScope]]' = (
+    contextvars.ContextVar('media_cache_forward', default=None)
+)
+
+
+def encode_file_base64(path: str, prefix: str = '') -> str:
+    """Base64 of the file at ``path``, preceded by ``prefix``.
+
+    The file is memory-mapped and encoded chunk by chunk into one buffer
+    sized for the result, so the only full-size copies are that buffer and
+    the returned string (instead of the raw bytes, the encoded bytes, their
+    decoded string and any string built from it).
+    """
+    head = prefix.encode('ascii')
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        out = bytearray(len(head) + 4 * ((size + 2) // 3))
+        out[: len(head)] = head
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                pos = len(head)
+                for start in range(0, size, _ENCODE_CHUNK):
+                    chunk = binascii.b2a_base64(
+                        data[start : start + _ENCODE_CHUNK], newline=False
+                    )
+                    out[pos : pos + len(chunk)] = chunk
+                    pos += len(chunk)
+    return out.decode('ascii')
+
+
+def encode_data_url(path: str, mime_type: str) -> str:
+    """``data:`` URL of the file at ``path``, built in a single buffer."""
+    return encode_file_base64(path, prefix=f'data:{mime_type};base64,')
+
+
+class MediaEncodingCache:
+    """Bounded in-memory LRU of encoded media shared by all processors.
+
+    Entries are keyed by ``(path, mtime, size, fmt)`` so an edited file is
+    re-encoded; ``fmt`` names the encoding (``'base64'``, a transcode, ...).
+    Concurrent requests for the same entry encode it once. With ``scope``
+    ``'forward'`` an entry is dropped when the last running forward pass
+    that used it ends, so CTM instances running side by side keep the media
+    they share; with ``'process'`` entries live until evicted once
+    ``max_mb`` is exceeded.
+    Entries found in the configured media pack are served from it without
+    reading the source file. ``recorder(path, fmt, value)``, when set, is
+    called with every newly encoded entry (used to build packs).
+    """
+
+    def __init__(
+        self, max_mb: float = DEFAULT_MEDIA_CACHE_MB, scope: str = FORWARD
+    ) -> None:
+        if scope not in (FORWARD, PROCESS):
+            raise ValueError(f'Unknown media cache scope: {scope!r}')
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.scope = scope
+        self._entries: 'OrderedDict[Tuple[Any, ...], Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pack_hits = 0
+        self.recorder: Optional[Callable[[str, str, Any], None]] = None
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._forwards: List[ForwardScope] = []
+
+    @staticmethod
+    def key(path: str, fmt: str) -> Tuple[Any, ...]:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, fmt)
+
+    def get_or_encode(self, path: str, fmt: str, encode: Callable[[], Any]) -> Any:
+        """Return the cached ``fmt`` encoding of ``path``, running ``encode`` once."""
+        key = self.key(path, fmt)
+        forward = _current_forward.get()
+        with self._lock:
+            if forward is not None:
+                forward.keys.add(key)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        pack = get_media_pack()
+        if pack is not None:
+            value = pack.get(path, fmt, size=key[2])
+            if value is not None:
+                with self._lock:
+                    self.pack_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        value, _ = self._flight.do(repr(key), lambda: self._encode(key, encode))
+        return value
+
+    def _encode(self, key: Tuple[Any, ...], encode: Callable[[], Any]) -> Any:
+        value = encode()
+        if self.recorder is not None:
+            self.recorder(key[0], key[3], value)
+        size = _value_bytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def begin_forward(self) -> ForwardScope:
+        """Start tracking the entries the calling forward pass uses."""
+        forward = ForwardScope()
+        forward.token = _current_forward.set(forward)
+        with self._lock:
+            self._forwards.append(forward)
+        return forward
+
+    def end_forward(self, forward: Optional[ForwardScope] = None) -> None:
+        """Called after each forward pass.
+
+        In ``'forward'`` scope, drops the entries ``forward`` used that no
+        other running forward pass uses; without ``forward``, drops every
+        entry no running forward pass uses.
+        """
+        if forward is not None and forward.token is not None:
+            try:
+                _current_forward.reset(forward.token)
+            except ValueError:  # ended from another context
+                pass
+            forward.token = None
+        with self._lock:
+            if forward in self._forwards:
+                self._forwards.remove(forward)
+            if self.scope != FORWARD:
+                return
+            in_use = set().union(*(f.keys for f in self._forwards))
+            candidates = forward.keys if forward is not None else list(self._entries)
+            for key in candidates:
+                if key not in in_use and key in self._entries:
+                    _, size = self._entries.pop(key)
+                    self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'pack_hits': self.pack_hits,
+            }
+
+
+# On by default: entries are keyed by file identity, so sharing them is
+# always safe, and the forward scope bounds memory to the media of the
+# forward passes currently running.
+_media_cache = MediaEncodingCache()
+_media_cache_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_media_cache(settings: Optional[Dict[str, Any]]) -> MediaEncodingCache:
+    """Replace the shared cache, e.g. ``{"max_mb": 2048, "scope": "process"}``.
+
+    None restores the default (512MB, entries dropped when the forward
+    passes using them end).
+    Unchanged settings keep the current cache and its entries.
+    """
+    global _media_cache, _media_cache_settings
+    if settings != _media_cache_settings:
+        _media_cache = MediaEncodingCache(**(settings or {}))
+        _media_cache_settings = dict(settings) if settings is not None else None
+    return _media_cache
+
+
+def get_media_cache() -> MediaEncodingCache:
+    return _media_cache
+
+
+def cached_base64(path: str) -> str:
+    """Base64 of the file at ``path``, through the shared media cache."""
+    return _media_cache.get_or_encode(path, 'base64', lambda: encode_file_base64(path))
+
+
+def cached_data_url(path: str, mime_type: str) -> str:
+    """``data:`` URL of the file at ``path``, through the shared media cache."""
+    return _media_cache.get_or_encode(
+        path, f'data_url:{mime_type}', lambda: encode_data_url(path, mime_type)
+    )
@@ -0,0 +1,133 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .logger import logger
+
+PACK_MAGIC = b'CTMPACK1'
+PACK_VERSION = 1
+
+# Magic, then the offset and length of the JSON index at the end of the file.
+_HEADER = struct.Struct('<8sQQ')
+
+# Payload types: text stored as UTF-8, anything else as JSON.
+_TEXT = 's'
+_JSON = 'j'
+
+
+def pack_key(path: str, fmt: str) -> str:
+    return f'{fmt}\x00{os.path.abspath(path)}'
+
+
+class MediaPackWriter:
+    """Writes encoded media payloads and their offset index to a pack file.
+
+    Payloads are keyed like the shared media cache, by source path and
+    ``fmt`` (``'data_url:video/mp4'``, ``'jpeg_frames_4'``, ...), and record
+    the source's size so a pack built from other files is not used.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._partial = path + '.partial'
+        self._file = open(self._partial, 'wb')
+        self._file.write(_HEADER.pack(PACK_MAGIC, 0, 0))
+        self._index: Dict[str, Tuple[int, int, str, int]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'MediaPackWriter':
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.unlink(self._partial)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, path: str, fmt: str, value: Any) -> None:
+        key = pack_key(path, fmt)
+        if isinstance(value, str):
+            kind, data = _TEXT, value.encode('utf-8')
+        else:
+            kind, data = _JSON, json.dumps(value).encode('utf-8')
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._index:
+                return
+            offset = self._file.tell()
+            self._file.write(data)
+            self._index[key] = (offset, len(data), kind, size)
+
+    def close(self) -> None:
+        index = json.dumps({'version': PACK_VERSION, 'entries': self._index})
+        offset = self._file.tell()
+        data = index.encode('utf-8')
+        self._file.write(data)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(PACK_MAGIC, offset, len(data)))
+        self._file.close()
+        os.replace(self._partial, self.path)
+
+
+class MediaPack:
+    """Read-only, memory-mapped view of a pack written by MediaPackWriter.
+
+    Only the index is parsed on open; payloads are paged in from the mapping
+    when looked up, so every worker process shares one copy in the page
+    cache and nothing is re-read or re-encoded from the source files.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f'{path} is not a media pack')
+        index = json.loads(self._mmap[offset : offset + length])
+        self._index: Dict[str, Any] = index['entries']
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, path: str, fmt: str, size: Optional[int] = None) -> Optional[Any]:
+        """Packed ``fmt`` payload for ``path``, or None if absent or stale."""
+        entry = self._index.get(pack_key(path, fmt))
+        if entry is None or (size is not None and entry[3] != size):
+            self.misses += 1
+            return None
+        offset, length, kind, _ = entry
+        self.hits += 1
+        data = self._mmap[offset : offset + length]
+        return data.decode('utf-8') if kind == _TEXT else json.loads(data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses}
+
+
+# Off until configured; a pack is only useful for the dataset it was built from.
+_media_pack: Optional[MediaPack] = None
+
+
+def configure_media_pack(path: Optional[str]) -> Optional[MediaPack]:
+    """Serve encoded media from the pack at ``path``; None stops using it."""
+    global _media_pack
+    if path is None:
+        _media_pack = None
+    elif _media_pack is None or _media_pack.path != path:
+        _media_pack = MediaPack(path)
+        logger.info(f'Media pack {path}: {len(_media_pack)} payloads')
+    return _media_pack
+
+
+def get_media_pack() -> Optional[MediaPack]:
+    return _media_pack
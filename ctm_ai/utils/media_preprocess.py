@@ -0,0 +1,310 @@
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from .media_cache import cached_data_url, encode_data_url, get_media_cache
+from .transcode_cache import TranscodeError, transcoded
+
+# Approximate prompt tokens per image / sampled video frame. Gemini bills
+# 258 tokens per 768px tile (one tile up to 384px on both sides); Qwen-VL
+# one token per 28x28 patch. Video is sampled at 1 (Gemini) or 2 (Qwen) fps.
+_GEMINI_TILE = 768
+_GEMINI_TILE_TOKENS = 258
+_QWEN_PATCH = 28
+_VIDEO_SAMPLE_FPS = {'gemini': 1.0, 'qwen': 2.0}
+
+# ffmpeg / ffprobe missing, failing, or printing output we cannot parse.
+_FFMPEG_ERRORS = (
+    TranscodeError,
+    OSError,
+    subprocess.SubprocessError,
+    KeyError,
+    ValueError,
+)
+
+# Shrunk in-memory images (screenshots, PIL inputs) kept per preprocessor.
+_MAX_MEMORY_ENTRIES = 16
+
+
+def estimate_image_tokens(width: int, height: int, provider: str) -> int:
+    if provider == 'qwen':
+        return math.ceil(width / _QWEN_PATCH) * math.ceil(height / _QWEN_PATCH)
+    if width <= _GEMINI_TILE / 2 and height <= _GEMINI_TILE / 2:
+        return _GEMINI_TILE_TOKENS
+    tiles = math.ceil(width / _GEMINI_TILE) * math.ceil(height / _GEMINI_TILE)
+    return tiles * _GEMINI_TILE_TOKENS
+
+
+def estimate_video_tokens(
+    width: int, height: int, duration: float, fps: float, provider: str
+) -> int:
+    sampled = duration * min(fps, _VIDEO_SAMPLE_FPS.get(provider, 1.0))
+    if provider == 'qwen':
+        frame_tokens = estimate_image_tokens(width, height, provider)
+    else:
+        frame_tokens = _GEMINI_TILE_TOKENS  # fixed per frame at default resolution
+    return int(sampled * frame_tokens)
+
+
+def _fit(width: int, height: int, max_long_edge: Optional[int]) -> Tuple[int, int]:
+    if not max_long_edge or max(width, height) <= max_long_edge:
+        return width, height
+    scale = max_long_edge / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _probe_video(path: str) -> Tuple[int, int, float, float]:
+    """``(width, height, duration, fps)`` of a video's first stream."""
+    result = subprocess.run(
+        [
+            'ffprobe',
+            '-v',
+            'error',
+            '-select_streams',
+            'v:0',
+            '-show_entries',
+            'stream=width,height,avg_frame_rate:format=duration',
+            '-of',
+            'json',
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        timeout=30,
+        check=True,
+    )
+    info = json.loads(result.stdout)
+    stream = info['streams'][0]
+    num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+    fps = float(num) / float(den) if float(den or 0) else 0.0
+    return (
+        int(stream['width']),
+        int(stream['height']),
+        float(info['format']['duration']),
+        fps,
+    )
+
+
+class MediaPreprocessor:
+    """Shrinks images and videos before they are encoded into a prompt.
+
+    Configured per processor through ``media_preprocess`` in its
+    ``processors_config`` entry, e.g. ``{"max_long_edge": 768,
+    "jpeg_quality": 80, "fps": 1, "max_duration_s": 30}``. Images are
+    downscaled and re-encoded as JPEG; videos are re-encoded by ffmpeg at
+    the reduced size, frame rate and length. Each input is processed once:
+    results are cached by content hash in the transcode cache (when one is
+    configured) and by file identity in the shared media cache. Inputs the
+    settings would not shrink are sent unchanged. :meth:`stats` reports the
+    bytes and estimated prompt tokens saved by each input prepared; reusing
+    a cached result is not counted again.
+    """
+
+    def __init__(
+        self,
+        max_long_edge: Optional[int] = None,
+        jpeg_quality: Optional[int] = None,
+        fps: Optional[float] = None,
+        max_duration_s: Optional[float] = None,
+        video_crf: int = 28,
+    ) -> None:
+        self.max_long_edge = max_long_edge
+        self.jpeg_quality = jpeg_quality
+        self.fps = fps
+        self.max_duration_s = max_duration_s
+        self.video_crf = video_crf
+        self._memory: 'OrderedDict[str, Tuple[str, Dict[str, int]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'inputs': 0,
+            'shrunk': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'tokens_in': 0,
+            'tokens_out': 0,
+        }
+
+    @property
+    def image_recipe(self) -> str:
+        return f'image_jpeg_e{self.max_long_edge}_q{self.jpeg_quality}_v1'
+
+    @property
+    def video_recipe(self) -> str:
+        return (
+            f'video_x264_e{self.max_long_edge}_f{self.fps}_'
+            f'd{self.max_duration_s}_crf{self.video_crf}_v1'
+        )
+
+    def _record(self, sizes: Dict[str, int]) -> None:
+        with self._lock:
+            self._stats['inputs'] += 1
+            self._stats['shrunk'] += int(sizes['bytes_out'] < sizes['bytes_in'])
+            for field, value in sizes.items():
+                self._stats[field] += value
+
+    def data_url(self, path: str, mime_type: str, provider: str) -> str:
+        """``data:`` URL of the file at ``path``, shrunk if its type allows."""
+        if mime_type.startswith('image/'):
+            fmt, prepare = self.image_recipe, self._prepare_image
+        elif mime_type.startswith('video/'):
+            fmt, prepare = self.video_recipe, self._prepare_video
+        else:
+            return cached_data_url(path, mime_type)
+
+        def prepare_and_record() -> Tuple[str, Dict[str, int]]:
+            url, sizes = prepare(path, mime_type, provider)
+            self._record(sizes)
+            return url, sizes
+
+        url, _ = get_media_cache().get_or_encode(
+            path, f'preprocessed:{fmt}:{provider}', prepare_and_record
+        )
+        return url
+
+    def _shrink_image(self, image: Image.Image) -> Image.Image:
+        width, height = _fit(image.width, image.height, self.max_long_edge)
+        if (width, height) != image.size:
+            image = image.resize((width, height), Image.LANCZOS)
+        return image.convert('RGB') if image.mode != 'RGB' else image
+
+    def _jpeg_bytes(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        self._shrink_image(image).save(
+            buffer, format='JPEG', quality=self.jpeg_quality or 75
+        )
+        return buffer.getvalue()
+
+    def _write_image(self, source: str, output: str) -> bool:
+        with Image.open(source) as image:
+            data = self._jpeg_bytes(image)
+        with open(output, 'wb') as f:
+            f.write(data)
+        return True
+
+    def _prepare_image(
+        self, path: str, mime_type: str, provider: str
+    ) -> Tuple[str, Dict[str, int]]:
+        with Image.open(path) as image:
+            size = image.size
+        shrunk = _fit(*size, self.max_long_edge)
+        sizes = {
+            'bytes_in': os.path.getsize(path),
+            'tokens_in': estimate_image_tokens(*size, provider),
+            'tokens_out': estimate_image_tokens(*shrunk, provider),
+        }
+        with transcoded(path, self.image_recipe, self._write_image, '.jpg') as out:
+            sizes['bytes_out'] = os.path.getsize(out)
+            if sizes['bytes_out'] < sizes['bytes_in']:
+                return encode_data_url(out, 'image/jpeg'), sizes
+        sizes['bytes_out'], sizes['tokens_out'] = sizes['bytes_in'], sizes['tokens_in']
+        return encode_data_url(path, mime_type), sizes
+
+    def _write_video(self, source: str, output: str) -> bool:
+        filters = []
+        if self.fps:
+            filters.append(f'fps={self.fps}')
+        if self.max_long_edge:
+            edge = self.max_long_edge
+            filters.append(
+                f"scale='min(iw,{edge})':'min(ih,{edge})'"
+                ':force_original_aspect_ratio=decrease:force_divisible_by=2'
+            )
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', source]
+        if self.max_duration_s:
+            cmd += ['-t', str(self.max_duration_s)]
+        if filters:
+            cmd += ['-vf', ','.join(filters)]
+        cmd += [
+            '-c:v',
+            'libx264',
+            '-preset',
+            'veryfast',
+            '-crf',
+            str(self.video_crf),
+            '-pix_fmt',
+            'yuv420p',
+            '-c:a',
+            'aac',
+            '-movflags',
+            '+faststart',
+            output,
+        ]
+        return subprocess.run(cmd, capture_output=True).returncode == 0
+
+    def _prepare_video(
+        self, path: str, mime_type: str, provider: str
+    ) -> Tuple[str, Dict[str, int]]:
+        sizes = {'bytes_in': os.path.getsize(path), 'tokens_in': 0, 'tokens_out': 0}
+        try:
+            width, height, duration, fps = _probe_video(path)
+            sizes['tokens_in'] = estimate_video_tokens(
+                width, height, duration, fps, provider
+            )
+            sizes['tokens_out'] = estimate_video_tokens(
+                *_fit(width, height, self.max_long_edge),
+                min(duration, self.max_duration_s or duration),
+                min(fps, self.fps or fps),
+                provider,
+            )
+            with transcoded(path, self.video_recipe, self._write_video) as out:
+                sizes['bytes_out'] = os.path.getsize(out)
+                if sizes['bytes_out'] < sizes['bytes_in']:
+                    return encode_data_url(out, 'video/mp4'), sizes
+        except _FFMPEG_ERRORS:
+            pass  # send the original
+        sizes['bytes_out'], sizes['tokens_out'] = sizes['bytes_in'], sizes['tokens_in']
+        return encode_data_url(path, mime_type), sizes
+
+    def image_base64(self, image: Any, provider: str) -> str:
+        """Shrunk JPEG base64 of a PIL image or of base64-encoded image bytes."""
+        if isinstance(image, str):
+            raw: Optional[bytes] = base64.b64decode(image)
+            image = Image.open(io.BytesIO(raw))
+            key = hashlib.sha256(raw).hexdigest()
+        else:
+            raw = None
+            digest = hashlib.sha256(repr((image.mode, image.size)).encode('utf-8'))
+            digest.update(image.tobytes())
+            key = digest.hexdigest()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            if raw is None:  # what would be sent unprocessed: a default JPEG
+                buffer = io.BytesIO()
+                image.convert('RGB').save(buffer, format='JPEG')
+                raw = buffer.getvalue()
+            data = self._jpeg_bytes(image)
+            shrunk = _fit(image.width, image.height, self.max_long_edge)
+            entry = (
+                base64.b64encode(data).decode('utf-8'),
+                {
+                    'bytes_in': len(raw),
+                    'bytes_out': len(data),
+                    'tokens_in': estimate_image_tokens(*image.size, provider),
+                    'tokens_out': estimate_image_tokens(*shrunk, provider),
+                },
+            )
+            with self._lock:
+                self._memory[key] = entry
+                while len(self._memory) > _MAX_MEMORY_ENTRIES:
+                    self._memory.popitem(last=False)
+            self._record(entry[1])
+        return entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        stats['tokens_saved'] = stats['tokens_in'] - stats['tokens_out']
+        return stats
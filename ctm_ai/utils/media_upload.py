@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from .cassette import register_reference, replay_reference, replaying
+from .file_hash import file_sha256
+from .key_pool import api_key_id
+from .logger import logger
+
+GEMINI_UPLOAD_BASE = 'https://generativelanguage.googleapis.com'
+
+# The resumable upload protocol requires every chunk but the last to be a
+# multiple of 256 KiB.
+DEFAULT_CHUNK_SIZE = 32 * 256 * 1024
+
+# Gemini deletes uploaded files after 48 hours; stop handing out a URI an
+# hour before that so no request references an expired file.
+DEFAULT_TTL_S = 47 * 3600.0
+
+
+class MediaUploadError(RuntimeError):
+    """A media file could not be uploaded to the provider's file API."""
+
+
+def referenced_file_ids(messages: List[Dict[str, Any]]) -> List[str]:
+    """``file_id`` URIs of the file blocks in ``messages``."""
+    file_ids = []
+    for message in messages:
+        content = message.get('content')
+        if not isinstance(content, list):
+            continue
+        for block in content:
+            if isinstance(block, dict) and block.get('type') == 'file':
+                file_id = (block.get('file') or {}).get('file_id')
+                if file_id:
+                    file_ids.append(file_id)
+    return file_ids
+
+
+class GeminiFileUploader:
+    """Chunked, resumable uploads to the Gemini Files API.
+
+    A failed chunk is retried from the offset the server reports as received,
+    so an interrupted upload never resends the bytes already stored.
+    """
+
+    def __init__(
+        self,
+        api_base: str = GEMINI_UPLOAD_BASE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = 5,
+        poll_interval_s: float = 2.0,
+        max_wait_s: float = 600.0,
+    ) -> None:
+        self.api_base = api_base.rstrip('/')
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.poll_interval_s = poll_interval_s
+        self.max_wait_s = max_wait_s
+
+    def upload(self, path: str, mime_type: str, api_key: str) -> Dict[str, Any]:
+        """Upload ``path`` and return the file resource once it is ACTIVE."""
+        size = os.path.getsize(path)
+        upload_url = self._start(path, size, mime_type, api_key)
+        offset, retries, resource = 0, 0, None
+        with open(path, 'rb') as f:
+            while resource is None:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                last = offset + len(chunk) >= size
+                try:
+                    response = requests.post(
+                        upload_url,
+                        headers={
+                            'X-Goog-Upload-Command': (
+                                'upload, finalize' if last else 'upload'
+                            ),
+                            'X-Goog-Upload-Offset': str(offset),
+                        },
+                        data=chunk,
+                        timeout=300,
+                    )
+                    response.raise_for_status()
+                except requests.RequestException as e:
+                    retries += 1
+                    if retries > self.max_retries:
+                        raise MediaUploadError(f'Upload of {path} failed: {e}')
+                    offset = self._received(upload_url)
+                    logger.warning(f'Resuming upload of {path} at byte {offset}: {e}')
+                    continue
+                if last:
+                    resource = response.json()['file']
+                else:
+                    offset += len(chunk)
+        return self._wait_until_active(resource, api_key)
+
+    def _start(self, path: str, size: int, mime_type: str, api_key: str) -> str:
+        response = requests.post(
+            f'{self.api_base}/upload/v1beta/files',
+            headers={
+                'x-goog-api-key': api_key,
+                'X-Goog-Upload-Protocol': 'resumable',
+                'X-Goog-Upload-Command': 'start',
+                'X-Goog-Upload-Header-Content-Length': str(size),
+                'X-Goog-Upload-Header-Content-Type': mime_type,
+            },
+            json={'file': {'display_name': os.path.basename(path)}},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.headers['X-Goog-Upload-URL']
+
+    def _received(self, upload_url: str) -> int:
+        """Bytes the server already holds for an interrupted upload."""
+        response = requests.post(
+            upload_url, headers={'X-Goog-Upload-Command': 'query'}, timeout=60
+        )
+        response.raise_for_status()
+        return int(response.headers['X-Goog-Upload-Size-Received'])
+
+    def _wait_until_active(
+        self, resource: Dict[str, Any], api_key: str
+    ) -> Dict[str, Any]:
+        # Videos are processed server-side before they can be referenced.
+        start = time.monotonic()
+        while resource.get('state') == 'PROCESSING':
+            if time.monotonic() - start > self.max_wait_s:
+                raise MediaUploadError(f'{resource["name"]} still PROCESSING')
+            time.sleep(self.poll_interval_s)
+            response = requests.get(
+                f'{self.api_base}/v1beta/{resource["name"]}',
+                headers={'x-goog-api-key': api_key},
+                timeout=60,
+            )
+            response.raise_for_status()
+            resource = response.json()
+        if resource.get('state') == 'FAILED':
+            raise MediaUploadError(f'{resource["name"]} failed processing')
+        return resource
+
+
+class MediaUploadRegistry:
+    """Uploads each media file once and hands out its provider file URI.
+
+    Entries are keyed by provider, content hash and API key (uploaded files
+    belong to the key's project) and expire after ``ttl_s``. With
+    ``index_path`` the URIs are also persisted as JSON so later runs over the
+    same dataset reuse them. Providers without an uploader return None and
+    their processors keep sending the media inline. While a cassette
+    replays, nothing is uploaded and blocks carry a stand-in URI.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = DEFAULT_TTL_S,
+        index_path: Optional[str] = None,
+        **uploader_kwargs: Any,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.index_path = index_path
+        self.uploaders: Dict[str, Any] = {
+            'gemini': GeminiFileUploader(**uploader_kwargs)
+        }
+        self.uploads = 0
+        self.reused = 0
+        self._entries: Dict[str, Dict[str, Any]] = self._load_index()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def file_block(
+        self,
+        path: str,
+        mime_type: str,
+        provider: str,
+        api_key: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Content block referencing the uploaded ``path``, or None if unsupported."""
+        uploader = self.uploaders.get(provider)
+        if uploader is None:
+            return None
+        api_key = api_key or os.getenv(f'{provider.upper()}_API_KEY') or ''
+        digest = file_sha256(path)
+        if replaying():
+            file_id = replay_reference(f'file:{digest}')
+            return {'type': 'file', 'file': {'file_id': file_id, 'format': mime_type}}
+        key = f'{provider}:{api_key_id(api_key)}:{digest}'
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent requests for one file wait for a single upload.
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry['expires_at']:
+                self.reused += 1
+            else:
+                resource = uploader.upload(path, mime_type, api_key)
+                entry = {
+                    'uri': resource['uri'],
+                    'mime_type': resource.get('mimeType') or mime_type,
+                    'expires_at': time.time() + self.ttl_s,
+                }
+                with self._lock:
+                    self.uploads += 1
+                    self._entries[key] = entry
+                    self._save_index()
+        register_reference(entry['uri'], f'file:{digest}')
+        return {
+            'type': 'file',
+            'file': {'file_id': entry['uri'], 'format': entry['mime_type']},
+        }
+
+    def upload_key_id(self, file_id: str) -> Optional[str]:
+        """:func:`api_key_id` of the key that uploaded ``file_id``.
+
+        Files belong to the uploading key's project, so requests referencing
+        one must be sent with that key.
+        """
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry['uri'] == file_id:
+                    return key.split(':')[1]
+        return None
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, encoding='utf-8') as f:
+            entries = json.load(f)
+        now = time.time()
+        return {k: v for k, v in entries.items() if v['expires_at'] > now}
+
+    def _save_index(self) -> None:
+        if not self.index_path:
+            return
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def stats(self) -> Dict[str, int]:
+        return {'uploads': self.uploads, 'reused': self.reused}
+
+
+# Uploads are process-wide (processors and CTM instances share the same
+# media files) and off until configured.
+_registry: Optional[MediaUploadRegistry] = None
+_registry_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_media_uploads(
+    settings: Optional[Dict[str, Any]],
+) -> Optional[MediaUploadRegistry]:
+    """Enable uploads with :class:`MediaUploadRegistry` kwargs, or disable with None."""
+    global _registry, _registry_settings
+    if settings is None:
+        _registry, _registry_settings = None, None
+    elif _registry is None or settings != _registry_settings:
+        _registry, _registry_settings = MediaUploadRegistry(**settings), dict(settings)
+    return _registry
+
+
+def get_media_registry() -> Optional[MediaUploadRegistry]:
+    return _registry
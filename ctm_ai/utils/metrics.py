@@ -0,0 +1,222 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans cache-fast replies up to multi-minute video calls.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CALL_LABELS = ('processor', 'model', 'phase')
+
+Labels = Tuple[str, ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running, out = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            out.append((repr(float(bound)), running))
+        out.append(('+Inf', self.count))
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict(self.cumulative()),
+        }
+
+
+class MetricsRegistry:
+    """Process-wide LLM call metrics labeled by processor, model and phase.
+
+    Unlike the per-forward ``_usage_stats`` counters, these accumulate for
+    the life of the process. They export as Prometheus text (for a scrape
+    endpoint) or as JSON (for experiment runners).
+    """
+
+    COUNTERS = {
+        'ctm_llm_calls_total': 'Provider calls that returned a response.',
+        'ctm_llm_prompt_tokens_total': 'Prompt tokens reported by the provider.',
+        'ctm_llm_completion_tokens_total': 'Completion tokens reported by the model.',
+        'ctm_llm_errors_total': 'Provider calls that raised, by error type.',
+        'ctm_llm_retries_total': 'Calls retried after a failed attempt.',
+    }
+    HISTOGRAMS = {
+        'ctm_llm_call_latency_seconds': 'Provider call latency, excluding queueing.',
+        'ctm_llm_queue_wait_seconds': 'Time spent waiting for rate limits and '
+        'concurrency slots.',
+    }
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters: Dict[str, Dict[Labels, float]] = {
+                name: {} for name in self.COUNTERS
+            }
+            self._histograms: Dict[str, Dict[Labels, Histogram]] = {
+                name: {} for name in self.HISTOGRAMS
+            }
+
+    def _inc(self, name: str, labels: Labels, value: float = 1) -> None:
+        series = self._counters[name]
+        series[labels] = series.get(labels, 0) + value
+
+    def _observe(self, name: str, labels: Labels, value: float) -> None:
+        series = self._histograms[name]
+        if labels not in series:
+            series[labels] = Histogram(self.buckets)
+        series[labels].observe(value)
+
+    def observe_call(
+        self,
+        processor: str,
+        model: str,
+        phase: str,
+        latency_s: float,
+        queue_wait_s: float = 0.0,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        labels = (processor, model, phase)
+        usage = getattr(response, 'usage', None)
+        with self._lock:
+            self._observe('ctm_llm_queue_wait_seconds', labels, queue_wait_s)
+            if error is not None:
+                self._inc('ctm_llm_errors_total', (*labels, type(error).__name__))
+                return
+            self._observe('ctm_llm_call_latency_seconds', labels, latency_s)
+            self._inc('ctm_llm_calls_total', labels)
+            if usage:
+                prompt = getattr(usage, 'prompt_tokens', 0) or 0
+                completion = getattr(usage, 'completion_tokens', 0) or 0
+                self._inc('ctm_llm_prompt_tokens_total', labels, prompt)
+                self._inc('ctm_llm_completion_tokens_total', labels, completion)
+
+    def record_retry(self, processor: str, model: str, phase: str) -> None:
+        with self._lock:
+            self._inc('ctm_llm_retries_total', (processor, model, phase))
+
+    @staticmethod
+    def _label_names(name: str) -> Tuple[str, ...]:
+        if name == 'ctm_llm_errors_total':
+            return (*CALL_LABELS, 'error')
+        return CALL_LABELS
+
+    @staticmethod
+    def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+        pairs = []
+        for key, value in zip(names, values):
+            escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+            pairs.append(f'{key}="{escaped}"')
+        return ','.join(pairs)
+
+    def to_prometheus(self) -> str:
+        """Render every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, help_text in self.COUNTERS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for values, value in sorted(self._counters[name].items()):
+                    labels = self._format_labels(self._label_names(name), values)
+                    lines.append(f'{name}{{{labels}}} {value:g}')
+            for name, help_text in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for values, hist in sorted(self._histograms[name].items()):
+                    labels = self._format_labels(CALL_LABELS, values)
+                    for bound, count in hist.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {hist.sum:g}')
+                    lines.append(f'{name}_count{{{labels}}} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Series as ``{metric: [{labels..., value or histogram}]}``."""
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for name, series in self._counters.items():
+                names = self._label_names(name)
+                out[name] = [
+                    {**dict(zip(names, values)), 'value': value}
+                    for values, value in sorted(series.items())
+                ]
+            for name, hist_series in self._histograms.items():
+                out[name] = [
+                    {**dict(zip(CALL_LABELS, values)), **hist.to_dict()}
+                    for values, hist in sorted(hist_series.items())
+                ]
+        return out
+
+    def dump_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class LLMCallTimer:
+    """Times one provider call and reports it to the metrics registry.
+
+    Call :meth:`started` once the request leaves the queue (rate limiter,
+    concurrency slot) and :meth:`done` with the response; exceptions are
+    counted as errors on exit.
+    """
+
+    def __init__(self, processor: str, model: str, phase: Optional[str]) -> None:
+        self.labels = (processor, model or '', phase or 'initial')
+        self._response: Any = None
+
+    def __enter__(self) -> 'LLMCallTimer':
+        self._queued_at = self._started_at = time.monotonic()
+        return self
+
+    def started(self) -> None:
+        self._started_at = time.monotonic()
+
+    def done(self, response: Any) -> Any:
+        self._response = response
+        return response
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if isinstance(exc, Exception) or exc is None:
+            _metrics.observe_call(
+                *self.labels,
+                latency_s=time.monotonic() - self._started_at,
+                queue_wait_s=self._started_at - self._queued_at,
+                response=self._response,
+                error=exc,
+            )
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _metrics
+
+
+def track_llm_call(
+    processor: str, model: str, phase: Optional[str] = None
+) -> LLMCallTimer:
+    return LLMCallTimer(processor, model, phase)
@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .litellm_utils import get_model_provider
+from .logger import logger
+
+# Rough characters-per-token ratio used to reserve TPM budget before a call.
+# The reservation is corrected with the provider-reported usage afterwards.
+CHARS_PER_TOKEN = 4
+
+
+class RateLimiter:
+    """Token-bucket limiter enforcing requests- and tokens-per-minute quotas.
+
+    Each call reserves one request and an estimate of its tokens. Buckets
+    refill continuously at ``rpm / 60`` and ``tpm / 60`` per second, so a burst
+    up to the full quota is allowed after an idle period, after which callers
+    are paced to the configured rate. Once the provider reports actual usage,
+    :meth:`settle` returns over-reserved tokens (or charges the shortfall).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.rpm = float(rpm) if rpm else None
+        self.tpm = float(tpm) if tpm else None
+        self._requests = self.rpm or 0.0
+        self._tokens = self.tpm or 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_wait_s = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_reserve(self, tokens: int) -> float:
+        """Reserve capacity if available; otherwise return seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0
+            if self.rpm and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+            if self.tpm:
+                # A single request larger than the whole quota can never fit;
+                # let it through once the bucket is full.
+                needed = min(tokens, self.tpm)
+                if self._tokens < needed:
+                    wait = max(wait, (needed - self._tokens) * 60 / self.tpm)
+            if wait > 0:
+                return wait
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request and ``tokens`` tokens are available.
+
+        Returns the total time spent waiting, in seconds.
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_reserve(tokens)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        self._note_wait(waited)
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Async counterpart of :meth:`acquire`."""
+        waited = 0.0
+        while True:
+            wait = self._try_reserve(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        self._note_wait(waited)
+        return waited
+
+    def settle(self, reserved: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if not self.tpm or actual is None:
+            return
+        with self._lock:
+            self._tokens = min(self.tpm, self._tokens + reserved - actual)
+
+    def _note_wait(self, waited: float) -> None:
+        if waited > 0:
+            self.total_wait_s += waited
+            logger.info(f'Rate limiter {self.name}: waited {waited:.2f}s for quota')
+
+
+# Limits are configured per provider ("gemini") or per model
+# ("gemini/gemini-2.5-flash-lite"); a model entry takes precedence. Limiters
+# are shared process-wide so every CTM instance and thread draws from the
+# same quota.
+_limits: Dict[str, Dict[str, float]] = {}
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def configure_rate_limits(limits: Optional[Dict[str, Dict[str, float]]]) -> None:
+    """Set process-wide RPM / TPM limits.
+
+    ``limits`` maps a provider or model name to ``{'rpm': ..., 'tpm': ...}``.
+    Passing ``None`` or an empty dict removes all limits. Re-applying the
+    current limits keeps the existing buckets, so every CTM instance of a run
+    may call this with the same config.
+    """
+    with _limiters_lock:
+        if (limits or {}) == _limits:
+            return
+        _limits.clear()
+        _limiters.clear()
+        _limits.update(limits or {})
+
+
+def get_rate_limiter(model: Optional[str]) -> Optional[RateLimiter]:
+    """Return the limiter governing ``model``, or None if it is unlimited."""
+    if not model or not _limits:
+        return None
+    key = model if model in _limits else get_model_provider(model)
+    limit = _limits.get(key)
+    if not limit:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(key, rpm=limit.get('rpm'), tpm=limit.get('tpm'))
+            _limiters[key] = limiter
+        return limiter
+
+
+def estimate_request_tokens(call_kwargs: Dict[str, Any]) -> int:
+    """Estimate the tokens a completion request will consume.
+
+    Only text parts are counted; media parts are charged once the provider
+    reports actual usage via :meth:`RateLimiter.settle`.
+    """
+    chars = 0
+    for message in call_kwargs.get('messages') or []:
+        content = message.get('content') if isinstance(message, dict) else None
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get('type') == 'text':
+                    chars += len(part.get('text') or '')
+    max_tokens = call_kwargs.get('max_tokens') or 0
+    return chars // CHARS_PER_TOKEN + max_tokens * (call_kwargs.get('n') or 1)
+
+
+def _response_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, 'usage', None)
+    if not usage:
+        return None
+    return getattr(usage, 'total_tokens', None)
+
+
+def acquire_rate_limit(
+    model: Optional[str], call_kwargs: Dict[str, Any]
+) -> Tuple[Optional[RateLimiter], int]:
+    """Wait for quota for a request; returns a ticket for :func:`settle_rate_limit`."""
+    limiter = get_rate_limiter(model)
+    if limiter is None:
+        return None, 0
+    tokens = estimate_request_tokens(call_kwargs)
+    limiter.acquire(tokens)
+    return limiter, tokens
+
+
+async def aacquire_rate_limit(
+    model: Optional[str], call_kwargs: Dict[str, Any]
+) -> Tuple[Optional[RateLimiter], int]:
+    """Async counterpart of :func:`acquire_rate_limit`."""
+    limiter = get_rate_limiter(model)
+    if limiter is None:
+        return None, 0
+    tokens = estimate_request_tokens(call_kwargs)
+    await limiter.aacquire(tokens)
+    return limiter, tokens
+
+
+def settle_rate_limit(ticket: Tuple[Optional[RateLimiter], int], response: Any) -> None:
+    limiter, reserved = ticket
+    if limiter is not None:
+        limiter.settle(reserved, _response_tokens(response))
+
+
+def rate_limit_stats() -> List[Dict[str, Any]]:
+    """Snapshot of every active limiter, for logging at the end of a run."""
+    with _limiters_lock:
+        return [
+            {
+                'name': limiter.name,
+                'rpm': limiter.rpm,
+                'tpm': limiter.tpm,
+                'total_wait_s': round(limiter.total_wait_s, 3),
+            }
+            for limiter in _limiters.values()
+        ]
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Fields that never change what a request returns and must not split a key:
+# credentials, and the per-call timeout derived from each caller's deadline.
+_IGNORED_FIELDS = ('api_key', 'timeout')
+
+
+def request_key(call_kwargs: Dict[str, Any]) -> str:
+    """Hash every request field except credentials and the timeout.
+
+    Stricter than the completion cache key: any extra kwarg (tools, response
+    format, ...) separates otherwise identical requests.
+    """
+    payload = {k: v for k, v in call_kwargs.items() if k not in _IGNORED_FIELDS}
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running wait for and share its result, or its
+    exception. Nothing is remembered once the call finishes, so this only
+    dedupes work that overlaps in time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight ``key``; returns ``(result, shared)``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async counterpart of :meth:`do`, coalescing within one event loop."""
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_calls[loop_key] = future
+
+        if not leader:
+            # Shield so a cancelled follower does not cancel the shared call.
+            return await asyncio.shield(future), True
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when no follower is waiting on it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._async_calls.pop(loop_key, None)
+        return result, False
+
+
+# Disabled by default: coalescing hands every waiter the same sample, which
+# is only wanted when identical requests are meant to be interchangeable.
+_singleflight: Optional[SingleFlight] = None
+
+
+def configure_singleflight(enabled: bool) -> None:
+    """Turn process-wide coalescing of identical in-flight requests on or off."""
+    global _singleflight
+    if enabled and _singleflight is None:
+        _singleflight = SingleFlight()
+    elif not enabled:
+        _singleflight = None
+
+
+def coalesce(call_kwargs: Dict[str, Any], fn: Callable[[], Any]) -> Tuple[Any, bool]:
+    """Run ``fn`` for a request, sharing the provider call with identical ones.
+
+    Returns ``(result, shared)``; ``shared`` is True when the result came from
+    another caller's in-flight request.
+    """
+    flight = _singleflight
+    if flight is None:
+        return fn(), False
+    return flight.do(request_key(call_kwargs), fn)
+
+
+async def acoalesce(
+    call_kwargs: Dict[str, Any], fn: Callable[[], Awaitable[Any]]
+) -> Tuple[Any, bool]:
+    flight = _singleflight
+    if flight is None:
+        return await fn(), False
+    return await flight.ado(request_key(call_kwargs), fn)
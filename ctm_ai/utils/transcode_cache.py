@@ -0,0 +1,200 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .file_hash import file_sha256
+from .logger import logger
+from .singleflight import SingleFlight
+
+DEFAULT_TRANSCODE_CACHE_MB = 4096.0
+
+# Opt-in: transcodes are written to disk only when a cache directory is
+# configured here or through configure_transcode_cache.
+TRANSCODE_CACHE_DIR_ENV = 'CTM_TRANSCODE_CACHE_DIR'
+
+# In-progress outputs; ignored by eviction and stats.
+_PARTIAL_PREFIX = '.partial-'
+
+# ``run(source_path, output_path)`` returns whether the transcode succeeded.
+Transcoder = Callable[[str, str], bool]
+
+
+class TranscodeError(RuntimeError):
+    """Raised when a transcode command fails."""
+
+
+class TranscodeCache:
+    """Content-addressed on-disk cache of transcoded media files.
+
+    Outputs are named by the SHA-256 of the source file's bytes and a
+    ``recipe`` naming the transcode (its command and settings), so renamed
+    or copied inputs share one entry. Each output is produced once:
+    concurrent requests in the process wait for the first, and files are
+    moved into place atomically so other processes never see partial
+    output. Once the directory exceeds ``max_mb`` the least recently used
+    outputs are deleted, except those this process is reading through
+    :meth:`use`.
+    """
+
+    def __init__(
+        self, cache_dir: str, max_mb: float = DEFAULT_TRANSCODE_CACHE_MB
+    ) -> None:
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._in_use: Dict[str, int] = {}
+
+    def output_path(self, source_path: str, recipe: str, suffix: str = '.mp4') -> str:
+        key = hashlib.sha256(
+            f'{file_sha256(source_path)}:{recipe}'.encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def transcode(
+        self, source_path: str, recipe: str, run: Transcoder, suffix: str = '.mp4'
+    ) -> str:
+        """Path of ``source_path`` transcoded by ``run``, producing it if needed."""
+        output = self.output_path(source_path, recipe, suffix)
+        if os.path.exists(output):
+            with self._lock:
+                self.hits += 1
+            os.utime(output)
+            return output
+        with self._lock:
+            self.misses += 1
+        self._flight.do(output, lambda: self._produce(source_path, output, run))
+        return output
+
+    @contextmanager
+    def use(
+        self, source_path: str, recipe: str, run: Transcoder, suffix: str = '.mp4'
+    ) -> Iterator[str]:
+        """:meth:`transcode`, keeping the output from eviction until exit."""
+        output = self.output_path(source_path, recipe, suffix)
+        with self._lock:
+            self._in_use[output] = self._in_use.get(output, 0) + 1
+        try:
+            yield self.transcode(source_path, recipe, run, suffix)
+        finally:
+            with self._lock:
+                self._in_use[output] -= 1
+                if not self._in_use[output]:
+                    del self._in_use[output]
+
+    def _produce(self, source_path: str, output: str, run: Transcoder) -> None:
+        if os.path.exists(output):
+            return
+        suffix = os.path.splitext(output)[1]
+        fd, partial = tempfile.mkstemp(
+            prefix=_PARTIAL_PREFIX, suffix=suffix, dir=self.cache_dir
+        )
+        os.close(fd)
+        try:
+            if not run(source_path, partial) or not os.path.getsize(partial):
+                raise TranscodeError(f'Transcoding {source_path} failed')
+            os.replace(partial, output)
+        finally:
+            if os.path.exists(partial):
+                os.unlink(partial)
+        self._evict(keep=output)
+
+    def _outputs(self) -> List[str]:
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if not name.startswith(_PARTIAL_PREFIX)
+        ]
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for path in self._outputs():
+            if path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = os.path.getsize(keep) + sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                if path in self._in_use:
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        outputs = self._outputs()
+        return {
+            'files': len(outputs),
+            'bytes': sum(os.path.getsize(path) for path in outputs),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+_transcode_cache: Optional[TranscodeCache] = None
+_transcode_settings: Optional[Dict[str, Any]] = None
+
+
+def configure_transcode_cache(
+    settings: Optional[Dict[str, Any]],
+) -> Optional[TranscodeCache]:
+    """Cache transcodes on disk, e.g. ``{"cache_dir": ..., "max_mb": 4096}``.
+
+    None disables the cache (unless ``CTM_TRANSCODE_CACHE_DIR`` is set).
+    """
+    global _transcode_cache, _transcode_settings
+    if settings != _transcode_settings:
+        _transcode_cache = TranscodeCache(**settings) if settings else None
+        _transcode_settings = dict(settings) if settings is not None else None
+    return _transcode_cache
+
+
+def get_transcode_cache() -> Optional[TranscodeCache]:
+    global _transcode_cache
+    if _transcode_cache is None and _transcode_settings is None:
+        cache_dir = os.environ.get(TRANSCODE_CACHE_DIR_ENV)
+        if cache_dir:
+            _transcode_cache = TranscodeCache(cache_dir)
+            logger.info(f'Caching transcodes in {cache_dir}')
+    return _transcode_cache
+
+
+@contextmanager
+def transcoded(
+    source_path: str, recipe: str, run: Transcoder, suffix: str = '.mp4'
+) -> Iterator[str]:
+    """Yield the path of ``source_path`` transcoded by ``run``.
+
+    The output comes from the transcode cache when one is configured;
+    otherwise it is a temporary file deleted on exit. ``recipe`` must change
+    whenever ``run`` would produce different output.
+    """
+    cache = get_transcode_cache()
+    if cache is not None:
+        with cache.use(source_path, recipe, run, suffix) as output:
+            yield output
+        return
+    fd, output = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        if not run(source_path, output):
+            raise TranscodeError(f'Transcoding {source_path} failed')
+        yield output
+    finally:
+        if os.path.exists(output):
+            os.unlink(output)
@@ -10,18 +10,19 @@ Supports both Gemini and Qwen providers with 4 agent types:
 Shared across debate, query augmentation, voting, and baseline experiments.
 """
 
-import base64
 import json
 import os
 import statistics
 import subprocess
-import tempfile
 import threading
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import litellm
 from dataset_configs import get_dataset_config
 
+from ctm_ai.utils import TranscodeError, encode_data_url, transcoded
+from ctm_ai.utils import encode_file_base64 as _encode_file_base64
+
 # ============================================================================
 # Constants
 # ============================================================================
@@ -33,6 +34,9 @@ DEFAULT_MODELS = {
 
 QWEN_API_BASE = 'https://dashscope-intl.aliyuncs.com/compatible-mode/v1'
 
+# Transcode cache name for make_black_video_with_audio; bump when it changes.
+QWEN_AUDIO_VIDEO_RECIPE = 'black_video_320x240_r1_x264_aac_v1'
+
 
 # ============================================================================
 # Environment Setup
@@ -159,9 +163,8 @@ def get_full_video_path(test_file: str, dataset_name: str) -> str:
 
 
 def encode_file_base64(file_path: str) -> str:
-    """Read file and return base64-encoded string"""
-    with open(file_path, 'rb') as f:
-        return base64.b64encode(f.read()).decode('utf-8')
+    """Read file and return base64-encoded string (memory-mapped, chunked)"""
+    return _encode_file_base64(file_path)
 
 
 def make_black_video_with_audio(audio_path: str, output_path: str) -> bool:
@@ -242,31 +245,20 @@ def build_audio_content(audio_path: str, provider: str = 'gemini') -> List[Dict]
         return []
 
     if provider == 'qwen':
-        tmp_video = tempfile.mktemp(suffix='.mp4')
         try:
-            if not make_black_video_with_audio(audio_path, tmp_video):
-                print(f'Warning: ffmpeg failed for {audio_path}')
-                return []
-            encoded = encode_file_base64(tmp_video)
-        finally:
-            if os.path.exists(tmp_video):
-                os.unlink(tmp_video)
-        return [
-            {
-                'type': 'video_url',
-                'video_url': {'url': f'data:video/mp4;base64,{encoded}'},
-            }
-        ]
+            with transcoded(
+                audio_path, QWEN_AUDIO_VIDEO_RECIPE, make_black_video_with_audio
+            ) as video_path:
+                data_url = encode_data_url(video_path, 'video/mp4')
+        except TranscodeError:
+            print(f'Warning: ffmpeg failed for {audio_path}')
+            return []
+        return [{'type': 'video_url', 'video_url': {'url': data_url}}]
     else:
         # Gemini: use 'file' type for audio (matches processor_audio.py implementation)
         mime_type = get_audio_mime_type(audio_path)
-        encoded = encode_file_base64(audio_path)
-        return [
-            {
-                'type': 'file',
-                'file': {'file_data': f'data:{mime_type};base64,{encoded}'},
-            }
-        ]
+        data_url = encode_data_url(audio_path, mime_type)
+        return [{'type': 'file', 'file': {'file_data': data_url}}]
 
 
 def build_video_content(video_path: str, provider: str = 'gemini') -> List[Dict]:
@@ -279,8 +271,7 @@ def build_video_content(video_path: str, provider: str = 'gemini') -> List[Dict]
         return []
 
     mime_type = get_video_mime_type(video_path)
-    encoded = encode_file_base64(video_path)
-    data_url = f'data:{mime_type};base64,{encoded}'
+    data_url = encode_data_url(video_path, mime_type)
 
     if provider == 'qwen':
         return [{'type': 'video_url', 'video_url': {'url': data_url}}]
@@ -0,0 +1,111 @@
+"""
+Pre-pack a dataset's encoded media into one memory-mapped pack file
+
+Runs every processor of a CTM over each sample's audio and muted video and
+stores whatever they encode (base64 data URLs, Qwen audio transcodes,
+extracted frames, preprocessed media) with an offset index. Experiments
+started with --media_pack (or the CTM config's "media_pack" entry) then
+serve those payloads from the pack instead of reading and re-encoding the
+source files for every instance.
+"""
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_configs import get_dataset_config
+from llm_utils import get_audio_path, get_muted_video_path, load_data
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.utils import MediaPackWriter, configure_media_cache, configure_media_pack
+
+
+def pack_sample(ctm, test_file, sample, dataset_name):
+    config = get_dataset_config(dataset_name)
+    inputs = {
+        'text': config.get_text_field(sample),
+        'audio_path': get_audio_path(test_file, dataset_name),
+        'video_path': get_muted_video_path(test_file, dataset_name),
+    }
+    for name in ('audio_path', 'video_path'):
+        if not os.path.exists(inputs[name]):
+            print(f'[{test_file}] Missing {name}: {inputs[name]}')
+            inputs[name] = None
+    for processor in ctm.processor_graph.nodes:
+        try:
+            processor.build_executor_messages(config.get_task_query(), **inputs)
+        except Exception as e:
+            print(f'[{test_file}] {processor.name} failed: {e}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Pre-encode dataset media into a memory-mapped pack file'
+    )
+    parser.add_argument(
+        '--dataset_name',
+        type=str,
+        default='urfunny',
+        choices=['urfunny', 'mustard'],
+        help='Dataset name (default: urfunny)',
+    )
+    parser.add_argument(
+        '--dataset',
+        type=str,
+        default=None,
+        help='Path to dataset JSON file (default: auto based on dataset_name)',
+    )
+    parser.add_argument(
+        '--ctm_name',
+        type=str,
+        default=None,
+        help='CTM whose processors encode the media (default: auto)',
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Pack file path (default: <dataset_name>_media.pack)',
+    )
+    parser.add_argument(
+        '--max_workers',
+        type=int,
+        default=4,
+        help='Samples encoded in parallel (default: 4)',
+    )
+    args = parser.parse_args()
+
+    config = get_dataset_config(args.dataset_name)
+    if args.dataset is None:
+        args.dataset = config.get_default_dataset_path()
+    if args.ctm_name is None:
+        ctm_names = {
+            'urfunny': 'urfunny_test',
+            'mustard': 'sarcasm_ctm',
+        }
+        args.ctm_name = ctm_names.get(args.dataset_name, f'{args.dataset_name}_ctm')
+    output = args.output or f'{args.dataset_name}_media.pack'
+
+    dataset = load_data(args.dataset)
+    ctm = ConsciousTuringMachine(args.ctm_name)
+    # Encode from the source files, never from an older pack.
+    configure_media_pack(None)
+    # Every newly encoded entry is written to the pack; the process-scoped
+    # cache keeps processors from encoding the same source twice.
+    media_cache = configure_media_cache({'scope': 'process'})
+
+    print(f'Dataset: {args.dataset_name} ({len(dataset)} samples)')
+    print(f'CTM: {args.ctm_name}')
+    with MediaPackWriter(output) as writer:
+        media_cache.recorder = writer.add
+        with ThreadPoolExecutor(max_workers=args.max_workers) as pool:
+            list(
+                pool.map(
+                    lambda test_file: pack_sample(
+                        ctm, test_file, dataset[test_file], args.dataset_name
+                    ),
+                    dataset,
+                )
+            )
+        media_cache.recorder = None
+        print(f'Packed {len(writer)} payloads into {output}')
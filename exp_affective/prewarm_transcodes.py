@@ -0,0 +1,122 @@
+"""
+Pre-warm the on-disk transcode cache for a dataset
+
+Converts every sample's audio into the black-screen videos Qwen needs, so
+experiments read them from the cache instead of running ffmpeg per call.
+Run the experiments with the same cache directory, via
+CTM_TRANSCODE_CACHE_DIR or the CTM config's "transcode_cache" entry.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_configs import get_dataset_config
+from llm_utils import (
+    QWEN_AUDIO_VIDEO_RECIPE,
+    get_audio_path,
+    make_black_video_with_audio,
+)
+
+from ctm_ai.processors.processor_audio import QWEN_AUDIO_VIDEO_RECIPE as CTM_RECIPE
+from ctm_ai.processors.processor_audio import AudioProcessor
+from ctm_ai.utils import TranscodeCache, TranscodeError
+
+RECIPES = {
+    'ctm': (CTM_RECIPE, AudioProcessor._make_black_video_with_audio),
+    'baseline': (QWEN_AUDIO_VIDEO_RECIPE, make_black_video_with_audio),
+}
+
+
+def prewarm(
+    cache: TranscodeCache, audio_paths: list, recipes: list, workers: int
+) -> int:
+    """Transcode every audio file with every recipe; returns the failure count."""
+
+    def run(job):
+        audio_path, name = job
+        recipe, transcoder = RECIPES[name]
+        try:
+            cache.transcode(audio_path, recipe, transcoder)
+            return True
+        except TranscodeError:
+            print(f'Warning: ffmpeg failed for {audio_path} ({name})')
+            return False
+
+    jobs = [(path, name) for path in audio_paths for name in recipes]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, jobs))
+    return results.count(False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Pre-warm the Qwen audio transcode cache for a dataset'
+    )
+    parser.add_argument(
+        '--dataset_name',
+        type=str,
+        required=True,
+        choices=['urfunny', 'mustard'],
+        help='Dataset name',
+    )
+    parser.add_argument(
+        '--dataset_file',
+        type=str,
+        default=None,
+        help='Path to dataset JSON file (default: auto)',
+    )
+    parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=os.environ.get('CTM_TRANSCODE_CACHE_DIR'),
+        help='Transcode cache directory (default: $CTM_TRANSCODE_CACHE_DIR)',
+    )
+    parser.add_argument(
+        '--max_mb',
+        type=float,
+        default=4096,
+        help='Cache size cap in MB (default: 4096)',
+    )
+    parser.add_argument(
+        '--recipes',
+        nargs='+',
+        choices=sorted(RECIPES),
+        default=sorted(RECIPES),
+        help='Transcodes to prepare: ctm (AudioProcessor), baseline (llm_utils)',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Concurrent ffmpeg processes (default: 4)',
+    )
+    args = parser.parse_args()
+    if not args.cache_dir:
+        parser.error('--cache_dir or CTM_TRANSCODE_CACHE_DIR is required')
+
+    config = get_dataset_config(args.dataset_name)
+    if args.dataset_file is None:
+        args.dataset_file = config.get_default_dataset_path()
+    with open(args.dataset_file, 'r', encoding='utf-8') as f:
+        sample_list = json.load(f)
+
+    audio_paths = []
+    for test_file in sample_list:
+        audio_path = get_audio_path(test_file, args.dataset_name)
+        if os.path.exists(audio_path):
+            audio_paths.append(audio_path)
+        else:
+            print(f'Warning: missing audio for {test_file}: {audio_path}')
+
+    print(f'Dataset: {args.dataset_name} ({len(audio_paths)} audio files)')
+    print(f'Cache: {args.cache_dir}')
+    cache = TranscodeCache(args.cache_dir, max_mb=args.max_mb)
+    failures = prewarm(cache, audio_paths, args.recipes, args.workers)
+    stats = cache.stats()
+    print(
+        f'Done: {stats["misses"]} transcoded, {stats["hits"]} already cached, '
+        f'{failures} failed; {stats["files"]} files, '
+        f'{stats["bytes"] / 1024 / 1024:.1f}MB'
+    )
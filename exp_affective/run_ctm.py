@@ -6,6 +6,7 @@ Use CTM framework for affective computing (humor detection, sarcasm detection, e
 Examples:
 python run_ctm.py --dataset_name urfunny --max_workers 8
 python run_ctm.py --dataset_name mustard --max_workers 8
+python run_ctm.py --dataset_name mustard --batch_mode --batch_shard_size 500
 """
 
 import argparse
@@ -19,7 +20,17 @@ from threading import Lock
 from dataset_configs import get_dataset_config
 from llm_utils import get_audio_path, get_muted_video_path, load_data
 
+from ctm_ai.configs import ConsciousTuringMachineConfig
 from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.utils import (
+    configure_adaptive_concurrency,
+    configure_batch_mode,
+    configure_completion_cache,
+    configure_executor,
+    configure_media_pack,
+    configure_singleflight,
+    get_metrics,
+)
 
 sys.path.append('..')
 
@@ -212,8 +223,99 @@ if __name__ == '__main__':
         default=None,
         help='Directory for per-instance trajectory JSON files (default: detailed_info/)',
     )
+    parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help='Directory of the on-disk completion cache (default: disabled)',
+    )
+    parser.add_argument(
+        '--cache_max_mb',
+        type=float,
+        default=1024.0,
+        help='Size cap of the completion cache in MB (default: 1024)',
+    )
+    parser.add_argument(
+        '--cache_read_only',
+        action='store_true',
+        help='Replay cached completions without writing new entries',
+    )
+    parser.add_argument(
+        '--adaptive_concurrency',
+        action='store_true',
+        help='Let an AIMD controller bound in-flight LLM calls per provider, '
+        'starting from --max_workers',
+    )
+    parser.add_argument(
+        '--singleflight',
+        action='store_true',
+        help='Share one LLM call between identical requests in flight at once',
+    )
+    parser.add_argument(
+        '--batch_mode',
+        action='store_true',
+        help='Run a shard of instances in lockstep, sending each phase of LLM '
+        'calls as one provider batch job',
+    )
+    parser.add_argument(
+        '--batch_shard_size',
+        type=int,
+        default=500,
+        help='Instances run together in batch mode (default: 500)',
+    )
+    parser.add_argument(
+        '--batch_api_base',
+        type=str,
+        default=None,
+        help='OpenAI-compatible batch endpoint (default: per provider)',
+    )
+    parser.add_argument(
+        '--metrics_out',
+        type=str,
+        default=None,
+        help='Write per-processor/model/phase latency and token metrics as JSON',
+    )
+    parser.add_argument(
+        '--media_pack',
+        type=str,
+        default=None,
+        help='Serve encoded media from a pack built by pack_media.py',
+    )
+    parser.add_argument(
+        '--executor_workers',
+        type=int,
+        default=None,
+        help='Threads of the shared pool running processor calls '
+        '(default: workers x processors)',
+    )
+    parser.add_argument(
+        '--batch_poll_s',
+        type=float,
+        default=30.0,
+        help='Seconds between batch status polls (default: 30)',
+    )
     args = parser.parse_args()
 
+    if args.cache_dir:
+        configure_completion_cache(
+            args.cache_dir,
+            max_size_mb=args.cache_max_mb,
+            read_only=args.cache_read_only,
+        )
+    if args.adaptive_concurrency:
+        configure_adaptive_concurrency({'initial': args.max_workers})
+    if args.singleflight:
+        configure_singleflight(True)
+    if args.media_pack:
+        configure_media_pack(args.media_pack)
+    if args.batch_mode:
+        configure_batch_mode(
+            {'api_base': args.batch_api_base, 'poll_interval_s': args.batch_poll_s}
+        )
+        # Every instance of the shard must be in flight for its phase's
+        # requests to land in the same batch job.
+        args.max_workers = args.batch_shard_size
+
     # Get dataset configuration
     config = get_dataset_config(args.dataset_name)
 
@@ -229,6 +331,16 @@ if __name__ == '__main__':
         }
         args.ctm_name = ctm_names.get(args.dataset_name, f'{args.dataset_name}_ctm')
 
+    # Processor calls of every instance run on the shared executor; size it so
+    # each in-flight instance can ask all its processors at once (in batch
+    # mode, so a whole shard's phase lands in one batch job).
+    if args.executor_workers is None:
+        n_processors = len(
+            ConsciousTuringMachineConfig.from_ctm(args.ctm_name).processors_config
+        )
+        args.executor_workers = args.max_workers * max(1, n_processors)
+    configure_executor({'max_workers': args.executor_workers})
+
     output_file = args.output or f'ctm_{args.dataset_name}.jsonl'
 
     print(f'Dataset: {args.dataset_name} ({config.task_type})')
@@ -244,3 +356,6 @@ if __name__ == '__main__':
         output_file=output_file,
         detailed_log_dir=args.detailed_log_dir,
     )
+    if args.metrics_out:
+        get_metrics().dump_json(args.metrics_out)
+        print(f'Metrics written to {args.metrics_out}')
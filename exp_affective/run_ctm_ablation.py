@@ -42,6 +42,12 @@ from dataset_configs import get_dataset_config
 from llm_utils import get_audio_path, get_muted_video_path, load_data
 
 from ctm_ai.ctms.ctm_ablation import AblationCTM
+from ctm_ai.utils import (
+    configure_adaptive_concurrency,
+    configure_completion_cache,
+    configure_singleflight,
+    get_metrics,
+)
 
 ABLATION_CHOICES = [
     'no_fusion',
@@ -399,8 +405,53 @@ if __name__ == '__main__':
         action='store_true',
         help='Include winner in link_form (winner answers its own follow-up questions and may link to itself).',
     )
+    parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help='Directory of the on-disk completion cache (default: disabled)',
+    )
+    parser.add_argument(
+        '--cache_max_mb',
+        type=float,
+        default=1024.0,
+        help='Size cap of the completion cache in MB (default: 1024)',
+    )
+    parser.add_argument(
+        '--cache_read_only',
+        action='store_true',
+        help='Replay cached completions without writing new entries',
+    )
+    parser.add_argument(
+        '--adaptive_concurrency',
+        action='store_true',
+        help='Let an AIMD controller bound in-flight LLM calls per provider, '
+        'starting from --max_workers',
+    )
+    parser.add_argument(
+        '--singleflight',
+        action='store_true',
+        help='Share one LLM call between identical requests in flight at once',
+    )
+    parser.add_argument(
+        '--metrics_out',
+        type=str,
+        default=None,
+        help='Write per-processor/model/phase latency and token metrics as JSON',
+    )
     args = parser.parse_args()
 
+    if args.cache_dir:
+        configure_completion_cache(
+            args.cache_dir,
+            max_size_mb=args.cache_max_mb,
+            read_only=args.cache_read_only,
+        )
+    if args.adaptive_concurrency:
+        configure_adaptive_concurrency({'initial': args.max_workers})
+    if args.singleflight:
+        configure_singleflight(True)
+
     config = get_dataset_config(args.dataset_name)
 
     if args.dataset is None:
@@ -482,3 +533,7 @@ if __name__ == '__main__':
             )
     else:
         _run(threshold_kwargs)
+
+    if args.metrics_out:
+        get_metrics().dump_json(args.metrics_out)
+        print(f'Metrics written to {args.metrics_out}')
@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+import pytest
+
+# Keep the CTM file log out of the source tree while the tests run.
+os.environ.setdefault(
+    'CTM_LOG_FILE', os.path.join(tempfile.mkdtemp(), 'ctm_log_output.log')
+)
+
+
+@pytest.fixture
+def mock_backend():
+    """Send every LLM call to a ``MockLLMBackend(*args, **kwargs)``.
+
+    The backend is returned so tests can inspect :attr:`calls`; the litellm
+    default is restored afterwards.
+    """
+    from ctm_ai.utils import MockLLMBackend, configure_llm_backend
+
+    def install(*args, **kwargs):
+        return configure_llm_backend(MockLLMBackend(*args, **kwargs))
+
+    yield install
+    configure_llm_backend(None)
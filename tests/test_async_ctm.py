@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+
+
+def _build_ctm() -> ConsciousTuringMachine:
+    ctm = ConsciousTuringMachine()
+    ctm.config.max_iter_num = 2
+    ctm.config.output_threshold = 10.0
+    ctm.config.processors_config = {
+        'language_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        'code_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+    }
+    ctm.load_ctm()
+    return ctm
+
+
+def test_aforward_runs_every_phase_concurrently(monkeypatch, mock_backend) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    payload = {
+        'response': 'Yes, it is.',
+        'additional_questions': ['What is the tone?'],
+        'relevance': 0.95,
+        'confidence': 0.9,
+        'surprise': 0.1,
+    }
+    finished = []
+    backend = mock_backend(
+        lambda request: finished.append(time.monotonic()) or payload, latency_s=0.1
+    )
+    calls = backend.calls
+
+    ctm = _build_ctm()
+    answer, weight, parsed = asyncio.run(
+        ctm.aforward(query='Is this sarcastic?', text='Great, just great.')
+    )
+
+    assert answer == 'Yes, it is.'
+    assert weight > 0
+    assert 'Yes' in parsed
+    assert len(ctm.iteration_history) == 2
+    # Calls of one phase overlap, so some finish together rather than 0.1s apart.
+    assert min(b - a for a, b in zip(finished, finished[1:])) < 0.05
+    assert ctm.processor_graph.get_neighbor_names('language_processor') or (
+        ctm.processor_graph.get_neighbor_names('code_processor')
+    )
+    usage = ctm.get_usage_stats()
+    assert usage['api_calls'] == len(calls) - 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
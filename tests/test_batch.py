@@ -0,0 +1,163 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.utils import configure_batch_mode
+
+
+class StandInBatchServer:
+    """Minimal OpenAI-compatible files / batches endpoint answering locally."""
+
+    def __init__(self) -> None:
+        self.files = {}
+        self.batches = {}
+        self.batch_sizes = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _reply(self, payload, raw: bool = False) -> None:
+                body = payload if raw else json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                data = self.rfile.read(int(self.headers['Content-Length']))
+                if self.path.endswith('/files'):
+                    lines = re.findall(rb'\{"custom_id".*', data)
+                    self._reply(server.add_file(b'\n'.join(lines)))
+                elif self.path.endswith('/batches'):
+                    self._reply(server.create_batch(json.loads(data)))
+
+            def do_GET(self) -> None:
+                parts = self.path.rstrip('/').split('/')
+                if parts[-1] == 'content':
+                    self._reply(server.files[parts[-2]], raw=True)
+                else:
+                    self._reply(server.batches[parts[-1]])
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.api_base = f'http://127.0.0.1:{self.httpd.server_port}/v1'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def add_file(self, content: bytes) -> dict:
+        file_id = f'file-{len(self.files)}'
+        self.files[file_id] = content
+        return {
+            'id': file_id,
+            'object': 'file',
+            'bytes': len(content),
+            'created_at': int(time.time()),
+            'filename': 'batch.jsonl',
+            'purpose': 'batch',
+            'status': 'processed',
+        }
+
+    def create_batch(self, request: dict) -> dict:
+        lines = self.files[request['input_file_id']].splitlines()
+        self.batch_sizes.append(len(lines))
+        output = b'\n'.join(
+            json.dumps(self.answer(json.loads(line))).encode() for line in lines
+        )
+        batch_id = f'batch-{len(self.batches)}'
+        self.batches[batch_id] = {
+            'id': batch_id,
+            'object': 'batch',
+            'endpoint': request['endpoint'],
+            'input_file_id': request['input_file_id'],
+            'completion_window': '24h',
+            'status': 'completed',
+            'output_file_id': self.add_file(output)['id'],
+            'created_at': int(time.time()),
+        }
+        return {**self.batches[batch_id], 'status': 'in_progress'}
+
+    @staticmethod
+    def answer(line: dict) -> dict:
+        content = json.dumps(
+            {
+                'response': 'Yes, it is.',
+                'additional_questions': [],
+                'relevance': 0.9,
+                'confidence': 0.9,
+                'surprise': 0.1,
+            }
+        )
+        body = {
+            'id': f'chatcmpl-{line["custom_id"]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': line['body']['model'],
+            'choices': [
+                {
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop',
+                }
+            ],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+        }
+        return {
+            'id': f'req-{line["custom_id"]}',
+            'custom_id': line['custom_id'],
+            'response': {'status_code': 200, 'body': body},
+            'error': None,
+        }
+
+
+@pytest.fixture
+def batch_server():
+    server = StandInBatchServer()
+    configure_batch_mode(
+        {
+            'api_base': server.api_base,
+            'api_key': 'test-key',
+            'flush_idle_s': 0.3,
+            'poll_interval_s': 0.05,
+        }
+    )
+    yield server
+    configure_batch_mode(None)
+    server.httpd.shutdown()
+
+
+def test_instances_move_through_phases_in_shared_batches(
+    batch_server, monkeypatch
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    results = {}
+
+    def run(instance: int) -> None:
+        ctm = ConsciousTuringMachine()
+        ctm.config.max_iter_num = 1
+        ctm.config.processors_config = {
+            'language_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+            'code_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        }
+        ctm.load_ctm()
+        results[instance] = ctm.forward(query='Is this sarcastic?', text='Great.')
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert len(results) == 3
+    assert all(answer == 'Yes, it is.' for answer, _, _ in results.values())
+    # One job for the initial phase of every instance, one for their parses.
+    assert batch_server.batch_sizes == [6, 3]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,183 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    Cassette,
+    CassetteMiss,
+    CassetteToolEnv,
+    ContextCacheRegistry,
+    MediaUploadRegistry,
+    MockLLMBackend,
+    configure_cassette,
+    configure_llm_backend,
+    get_llm_backend,
+)
+
+MODEL = 'gemini/gemini-2.5-flash-lite'
+REPLY = {
+    'response': 'Yes, it is sarcastic.',
+    'additional_questions': [],
+    'relevance': 0.9,
+    'confidence': 0.9,
+    'surprise': 0.1,
+}
+
+
+class FakeToolEnv:
+    function_names = ['get_weather']
+
+    def __init__(self) -> None:
+        self.steps = 0
+
+    def step(self, action, input_str):
+        self.steps += 1
+        return f'{{"response": "sunny in {input_str}"}}', 0
+
+
+def _offline_backend() -> MockLLMBackend:
+    def responder(request):
+        raise AssertionError('replay must not reach the backend')
+
+    return MockLLMBackend(responder)
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    yield
+    configure_cassette(None)
+    configure_llm_backend(None)
+
+
+def _forward(backend, cassette) -> tuple:
+    ctm = ConsciousTuringMachine()
+    ctm.config.max_iter_num = 1
+    ctm.config.llm_backend = backend
+    ctm.config.cassette = cassette
+    ctm.config.processors_config = {
+        'language_processor': {'model': MODEL},
+        'code_processor': {'model': MODEL},
+    }
+    ctm.load_ctm()
+    return ctm.forward(query='Is this sarcastic?', text='Great.')
+
+
+def test_forward_replays_from_cassette_with_scaled_latency(
+    monkeypatch, tmp_path
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    path = str(tmp_path / 'forward.json.gz')
+
+    recorded = _forward(
+        MockLLMBackend(REPLY, latency_s=0.1), {'path': path, 'mode': 'record'}
+    )
+    assert len(Cassette(path).entries) == 3  # two processors + parse
+
+    start = time.monotonic()
+    replayed = _forward(
+        _offline_backend(), {'path': path, 'mode': 'replay', 'latency_scale': 0}
+    )
+    assert replayed == recorded
+    assert time.monotonic() - start < 0.1
+
+    start = time.monotonic()
+    _forward(_offline_backend(), {'path': path, 'mode': 'replay', 'latency_scale': 1})
+    assert time.monotonic() - start >= 0.2  # processors in parallel, then parse
+
+
+def test_aborted_recording_keeps_its_entries(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    path = str(tmp_path / 'aborted.json')
+
+    def fail(self, chunks):
+        raise RuntimeError('competition failed')
+
+    monkeypatch.setattr(ConsciousTuringMachine, 'uptree_competition', fail)
+    with pytest.raises(RuntimeError):
+        _forward(MockLLMBackend(REPLY), {'path': path, 'mode': 'record'})
+    assert len(Cassette(path).entries) == 2  # both processors, no parse
+
+
+def test_streams_and_tool_steps_round_trip(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    path = str(tmp_path / 'stream.json')
+    reply = {'response': 'yes', 'relevance': 0.9, 'padding': 'x' * 200}
+    messages = [{'role': 'user', 'content': 'q'}]
+    env = FakeToolEnv()
+
+    configure_llm_backend(MockLLMBackend(reply))
+    cassette = configure_cassette({'path': path, 'mode': 'record'})
+    processor = BaseProcessor(name='language_processor', stream=True)
+    recorded = processor.ask_executor(messages=messages, phase='link_form')
+    tool_env = CassetteToolEnv(env, cassette)
+    assert tool_env.step('get_weather', 'Paris')[0] == '{"response": "sunny in Paris"}'
+    assert tool_env.function_names == ['get_weather']
+    cassette.save()
+
+    configure_llm_backend(_offline_backend())
+    cassette = configure_cassette({'path': path, 'mode': 'replay'})
+    assert processor.ask_executor(messages=messages, phase='link_form') == recorded
+    assert CassetteToolEnv(env, cassette).step('get_weather', 'Paris')[1] == 0
+    assert env.steps == 1
+    stream = [e for e in cassette.entries if e['kind'] == 'stream'][0]
+    assert 'x' * 32 not in ''.join(stream['chunks'])  # stopped early
+
+    with pytest.raises(CassetteMiss):
+        CassetteToolEnv(env, cassette).step('get_weather', 'Rome')
+
+
+def test_cached_contents_and_uploads_replay_offline(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    path = str(tmp_path / 'refs.json')
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'\x00' * 64)
+    run = {'id': 'run1'}
+
+    class FakeUploader:
+        def upload(self, path, mime_type, api_key):
+            return {'uri': f'files/{run["id"]}', 'mimeType': mime_type}
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        if run['id'] == 'replay':
+            raise AssertionError('replay must not create context caches')
+        return SimpleNamespace(
+            raise_for_status=lambda: None,
+            json=lambda: {'name': f'cachedContents/{run["id"]}'},
+        )
+
+    monkeypatch.setattr('ctm_ai.utils.context_cache.requests.post', fake_post)
+
+    def request():
+        uploads = MediaUploadRegistry()
+        uploads.uploaders['gemini'] = FakeUploader()
+        prefix = {
+            'role': 'system',
+            'content': [uploads.file_block(str(video), 'video/mp4', 'gemini')],
+            'cache_control': {'type': 'ephemeral'},
+        }
+        question = {'role': 'user', 'content': 'Is it sarcastic?'}
+        return ContextCacheRegistry().apply(
+            {'model': MODEL, 'messages': [prefix, question]}
+        )
+
+    configure_llm_backend(MockLLMBackend(REPLY))
+    cassette = configure_cassette({'path': path, 'mode': 'record'})
+    recorded = request()
+    assert recorded['cached_content'] == 'cachedContents/run1'
+    content = get_llm_backend().complete(**recorded).choices[0].message.content
+    cassette.save()
+
+    run['id'] = 'replay'
+    FakeUploader.upload = None  # nothing is uploaded either
+    configure_llm_backend(_offline_backend())
+    configure_cassette({'path': path, 'mode': 'replay'})
+    replayed = request()
+    assert replayed['cached_content'].startswith('cassette:')
+    assert get_llm_backend().complete(**replayed).choices[0].message.content == content
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
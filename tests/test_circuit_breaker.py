@@ -0,0 +1,179 @@
+import time
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    CircuitBreaker,
+    Deadline,
+    circuit_breaker_stats,
+    configure_circuit_breakers,
+)
+
+PRIMARY = 'gemini/gemini-2.0-flash'
+FALLBACK = 'gemini/gemini-2.5-flash-lite'
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class RequestTimeout(Exception):
+    status_code = 408
+
+
+@pytest.fixture
+def breakers():
+    configure_circuit_breakers({'failure_threshold': 2, 'cooldown_s': 60})
+    yield
+    configure_circuit_breakers(None)
+
+
+def test_breaker_opens_probes_and_closes() -> None:
+    breaker = CircuitBreaker(PRIMARY, failure_threshold=2, cooldown_s=0.05)
+    breaker.record_failure(BadRequest('malformed request'))
+    breaker.record_failure(ServiceUnavailable('overloaded'))
+    assert breaker.allow()
+    breaker.record_failure(ServiceUnavailable('overloaded'))
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()
+    breaker.record_failure(ServiceUnavailable('still overloaded'))
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.stats()['times_opened'] == 2
+
+
+def test_failing_model_is_routed_to_fallback_and_logged(
+    breakers, monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    calls = []
+
+    def responder(request):
+        calls.append(request['model'])
+        if request['model'] == PRIMARY:
+            raise ServiceUnavailable('model overloaded')
+        return {
+            'response': 'Yes, it is.',
+            'additional_questions': [],
+            'relevance': 0.9,
+            'confidence': 0.9,
+            'surprise': 0.1,
+        }
+
+    mock_backend(responder)
+
+    ctm = ConsciousTuringMachine()
+    ctm.config.max_iter_num = 1
+    ctm.config.processors_config = {
+        'language_processor': {'model': PRIMARY, 'fallback_model': FALLBACK},
+        'code_processor': {'model': PRIMARY, 'fallback_model': FALLBACK},
+    }
+    ctm.load_ctm()
+
+    start = time.monotonic()
+    answer, _, _ = ctm.forward(query='Is this sarcastic?', text='Great.')
+
+    # One failed attempt per processor opens the circuit; the retry after the
+    # first backoff step goes to the fallback.
+    assert time.monotonic() - start < 5
+    assert answer == 'Yes, it is.'
+    assert calls.count(PRIMARY) == 2
+    assert circuit_breaker_stats()[PRIMARY]['state'] == 'open'
+    initial = ctm.detailed_log['iterations'][0]['initial_phase']
+    assert {entry['model'] for entry in initial} == {FALLBACK}
+
+
+def test_open_circuit_without_fallback_fails_fast(
+    breakers, monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    calls = []
+
+    def responder(request):
+        calls.append(request['model'])
+        raise ServiceUnavailable('model overloaded')
+
+    mock_backend(responder)
+    processor = BaseProcessor(name='language_processor', model=PRIMARY)
+    messages = [{'role': 'user', 'content': 'q'}]
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailable):
+            processor._complete({'model': PRIMARY, 'messages': messages})
+
+    start = time.monotonic()
+    assert processor.ask_executor(messages=messages)['response'] is None
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+
+
+def test_fallback_must_share_the_provider_and_a_closed_circuit(
+    breakers, monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    with pytest.raises(ValueError, match='same provider'):
+        BaseProcessor(
+            name='language_processor', model=PRIMARY, fallback_model='openai/gpt-4o'
+        )
+
+    calls = []
+
+    def responder(request):
+        calls.append(request['model'])
+        raise ServiceUnavailable('model overloaded')
+
+    mock_backend(responder)
+    processor = BaseProcessor(
+        name='language_processor', model=PRIMARY, fallback_model=FALLBACK
+    )
+    messages = [{'role': 'user', 'content': 'q'}]
+    for model in (PRIMARY, PRIMARY, FALLBACK, FALLBACK):
+        with pytest.raises(ServiceUnavailable):
+            processor._complete({'model': model, 'messages': messages}, model=model)
+    assert processor.ask_executor(messages=messages)['response'] is None
+    assert len(calls) == 4  # both circuits open: nothing more is sent
+
+
+def test_timeouts_from_the_callers_deadline_do_not_count(
+    breakers, monkeypatch, mock_backend
+):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+
+    def responder(request):
+        time.sleep(request['timeout'])
+        raise RequestTimeout('request timed out')
+
+    mock_backend(responder)
+    processor = BaseProcessor(name='language_processor', model=PRIMARY)
+    messages = [{'role': 'user', 'content': 'q'}]
+    for _ in range(3):
+        with pytest.raises(RequestTimeout):
+            processor._complete(
+                {'model': PRIMARY, 'messages': messages, 'timeout': 0.01},
+                deadline=Deadline(0.01),
+            )
+    assert circuit_breaker_stats()[PRIMARY]['recent_failures'] == 0
+
+    # The same timeouts without a deadline are the model's.
+    for _ in range(2):
+        with pytest.raises(RequestTimeout):
+            processor._complete(
+                {'model': PRIMARY, 'messages': messages, 'timeout': 0.01}
+            )
+    assert circuit_breaker_stats()[PRIMARY]['state'] == 'open'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,58 @@
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import CompletionCache, completion_cache_key
+
+
+def test_cache_key_ignores_credentials() -> None:
+    call = {'model': 'gemini/x', 'messages': [{'role': 'user', 'content': 'hi'}]}
+    assert completion_cache_key(call) == completion_cache_key(
+        {**call, 'api_key': 'secret', 'api_base': 'http://example'}
+    )
+    assert completion_cache_key(call) != completion_cache_key(
+        {**call, 'temperature': 0.5}
+    )
+
+
+def test_cache_lru_eviction(tmp_path) -> None:
+    cache = CompletionCache(str(tmp_path), max_size_mb=250 / (1024 * 1024))
+    for i in range(3):
+        cache.put(f'k{i}', {'contents': ['x' * 60]})
+    cache.get('k0')
+    cache.put('k3', {'contents': ['x' * 60]})
+    assert cache.get('k0') is not None
+    assert cache.get('k1') is None
+    assert cache.size_bytes() <= 250
+
+
+def test_read_only_cache_does_not_write(tmp_path) -> None:
+    CompletionCache(str(tmp_path)).put('k', {'contents': ['hello']})
+    replay = CompletionCache(str(tmp_path), read_only=True)
+    replay.put('other', {'contents': ['ignored']})
+    assert replay.get('k') == {'contents': ['hello']}
+    assert replay.get('other') is None
+    assert replay.stats() == {'cache_hits': 1, 'cache_misses': 1}
+
+
+def test_processor_serves_repeat_calls_from_cache(
+    tmp_path, monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    calls = mock_backend({'response': '2', 'relevance': 0.9}).calls
+    processor = BaseProcessor(
+        name='language_processor', completion_cache=CompletionCache(str(tmp_path))
+    )
+    messages = [{'role': 'user', 'content': 'what is 1+1?'}]
+
+    first = processor.ask_executor(messages=messages)
+    second = processor.ask_executor(messages=messages)
+
+    assert len(calls) == 1
+    assert first == second
+    assert processor._usage_stats['cache_hits'] == 1
+    assert processor._usage_stats['cache_misses'] == 1
+    assert processor._usage_stats['api_calls'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from ctm_ai.utils import AdaptiveConcurrencyController
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+def test_window_grows_on_success_and_halves_on_overload() -> None:
+    changes = []
+    controller = AdaptiveConcurrencyController('gemini', initial=4, max_limit=8)
+    controller.add_listener(lambda name, limit: changes.append(limit))
+
+    for _ in range(40):
+        with controller.slot():
+            pass
+    assert controller.limit == 8
+
+    with pytest.raises(_RateLimited):
+        with controller.slot():
+            raise _RateLimited()
+    assert controller.limit == 4
+    assert changes[-1] == 4
+
+    # A second overload inside the cooldown is the same congestion event.
+    with pytest.raises(_RateLimited):
+        with controller.slot():
+            raise _RateLimited()
+    assert controller.limit == 4
+
+
+def test_non_overload_errors_do_not_shrink_window() -> None:
+    controller = AdaptiveConcurrencyController('gemini', initial=4)
+    with pytest.raises(ValueError):
+        with controller.slot():
+            raise ValueError('bad json')
+    assert controller.limit == 4
+
+
+def test_in_flight_never_exceeds_window() -> None:
+    controller = AdaptiveConcurrencyController('gemini', initial=2, max_limit=2)
+    peak = 0
+    lock = threading.Lock()
+
+    def call() -> None:
+        nonlocal peak
+        with controller.slot():
+            with lock:
+                peak = max(peak, controller.in_flight)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert controller.in_flight == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,162 @@
+import concurrent.futures
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import ContextCacheRegistry, split_cached_prefix
+
+MODEL = 'gemini/gemini-2.5-flash-lite'
+VIDEO = {'type': 'image_url', 'image_url': {'url': 'data:video/mp4;base64,AAAA'}}
+IMAGE = {'type': 'image_url', 'image_url': {'url': 'data:image/jpeg;base64,AAAA'}}
+
+
+class FakeCachedContents:
+    """Records cachedContents create / delete requests."""
+
+    def __init__(self) -> None:
+        self.created = []
+        self.deleted = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.created.append(json)
+        name = f'cachedContents/c{len(self.created)}'
+        return SimpleNamespace(
+            raise_for_status=lambda: None, json=lambda: {'name': name}
+        )
+
+    def delete(self, url, headers=None, timeout=None):
+        self.deleted.append(url.rsplit('/', 2)[-2:])
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = FakeCachedContents()
+    monkeypatch.setattr('ctm_ai.utils.context_cache.requests.post', fake.post)
+    monkeypatch.setattr('ctm_ai.utils.context_cache.requests.delete', fake.delete)
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    return fake
+
+
+def test_unmarked_messages_have_no_cached_prefix() -> None:
+    messages = [
+        {'role': 'system', 'content': 's'},
+        {'role': 'user', 'content': 'q'},
+    ]
+    assert split_cached_prefix(messages) == ([], messages)
+
+
+def test_media_prefix_is_registered_once_and_reused_across_phases(
+    provider, monkeypatch
+) -> None:
+    sent = []
+
+    def fake_completion(**kwargs):
+        sent.append(kwargs)
+        payload = {'response': 'ok', 'relevance': 0.9, 'confidence': 0.9}
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))
+            ],
+            usage=None,
+        )
+
+    monkeypatch.setattr('litellm.completion', fake_completion)
+    processor = BaseProcessor(
+        name='video_processor', model=MODEL, context_cache={'ttl_s': 300}
+    )
+
+    for question in ('What happens?', 'Is the speaker sarcastic?'):
+        messages = processor.build_media_messages([VIDEO], question)
+        processor.ask_executor(messages=messages)
+
+    assert len(provider.created) == 1
+    assert provider.created[0]['ttl'] == '300s'
+    assert processor._context_cache.stats() == {'created': 1, 'reused': 1}
+    for kwargs, question in zip(sent, ('What happens?', 'Is the speaker sarcastic?')):
+        assert kwargs['cached_content'] == 'cachedContents/c1'
+        assert kwargs['messages'] == [{'role': 'user', 'content': question}]
+
+    processor.release_context_cache()
+    assert provider.deleted == [['cachedContents', 'c1']]
+    processor.release_context_cache()
+    assert len(provider.deleted) == 1
+
+
+def test_image_prefixes_and_other_providers_are_sent_inline(provider) -> None:
+    registry = ContextCacheRegistry()
+    marked = {'role': 'user', 'content': [IMAGE], 'cache_control': {'type': 'x'}}
+    question = {'role': 'user', 'content': 'q'}
+
+    for model in (MODEL, 'openai/gpt-4o'):
+        request = registry.apply({'model': model, 'messages': [marked, question]})
+        assert 'cached_content' not in request
+        assert request['messages'] == [{'role': 'user', 'content': [IMAGE]}, question]
+    assert provider.created == []
+
+
+def test_slow_registration_does_not_block_other_prefixes(provider, monkeypatch) -> None:
+    registry = ContextCacheRegistry()
+    release = threading.Event()
+    post = provider.post
+
+    def slow_post(url, headers=None, json=None, timeout=None):
+        if 'first' in str(json):
+            assert release.wait(5), 'the other prefix waited for this request'
+        return post(url, headers=headers, json=json, timeout=timeout)
+
+    monkeypatch.setattr('ctm_ai.utils.context_cache.requests.post', slow_post)
+
+    def request(label):
+        marked = {
+            'role': 'system',
+            'content': [{'type': 'text', 'text': label}, VIDEO],
+            'cache_control': {'type': 'ephemeral'},
+        }
+        return {'model': MODEL, 'messages': [marked, {'role': 'user', 'content': 'q'}]}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as pool:
+        firsts = [pool.submit(registry.apply, request('first')) for _ in range(2)]
+        second = registry.apply(request('second'))
+        release.set()
+        names = {f.result(timeout=5)['cached_content'] for f in firsts}
+
+    assert second['cached_content'] == 'cachedContents/c1'
+    assert names == {'cachedContents/c2'}  # one registration for both callers
+    assert registry.stats() == {'created': 2, 'reused': 1}
+
+
+def test_caches_are_deleted_when_a_forward_raises(provider, monkeypatch) -> None:
+    payload = {'response': 'ok', 'relevance': 0.9, 'confidence': 0.9}
+    monkeypatch.setattr(
+        'litellm.completion',
+        lambda **kwargs: SimpleNamespace(
+            choices=[
+                SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))
+            ],
+            usage=None,
+        ),
+    )
+    ctm = ConsciousTuringMachine()
+    ctm.config.processors_config = {
+        'video_processor': {'model': MODEL, 'context_cache': {'ttl_s': 300}},
+    }
+    ctm.load_ctm()
+    processor = ctm.processor_graph.get_node('video_processor')
+
+    def ask(query, *args, **kwargs):
+        processor.ask_executor(messages=processor.build_media_messages([VIDEO], query))
+        raise RuntimeError('processor failed mid-forward')
+
+    processor.ask = ask
+    with pytest.raises(RuntimeError):
+        ctm.forward('What happens?')
+    assert len(provider.created) == 1
+    assert provider.deleted == [['cachedContents', 'c1']]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import WeatherProcessor
+from ctm_ai.processors.rapidapi_processors import processor_weather
+from ctm_ai.utils import (
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    message_exponential_backoff,
+    resolve_deadline,
+    with_deadline_timeout,
+)
+
+FAST_MODEL = 'gemini/gemini-2.5-flash-lite'
+SLOW_MODEL = 'gemini/gemini-2.0-flash'
+
+
+def test_resolve_deadline_takes_the_earlier_limit() -> None:
+    assert resolve_deadline() is None
+    assert resolve_deadline(timeout_s=5).remaining() == pytest.approx(5, abs=0.1)
+    wall = resolve_deadline(time.time() + 60, timeout_s=1)
+    assert wall.remaining() == pytest.approx(1, abs=0.1)
+    assert resolve_deadline(time.time() + 1, timeout_s=60).remaining() < 2
+
+
+def test_call_timeout_is_capped_and_expired_calls_are_not_sent() -> None:
+    kwargs = with_deadline_timeout({'timeout': 600}, Deadline(2))
+    assert 1 < kwargs['timeout'] <= 2
+    with pytest.raises(DeadlineExceeded):
+        with_deadline_timeout({}, Deadline(0))
+
+
+def test_backoff_stops_retrying_at_the_deadline() -> None:
+    attempts = []
+
+    @message_exponential_backoff(retries=5, base_wait_time=1)
+    def flaky(deadline=None):
+        attempts.append(1)
+        raise RuntimeError('boom')
+
+    start = time.monotonic()
+    assert flaky(deadline=Deadline(0.5))['response'] is None
+    assert len(attempts) == 1
+    assert time.monotonic() - start < 0.5
+
+
+def test_forward_returns_best_answer_when_a_processor_misses_the_deadline(
+    monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    timeouts = []
+
+    def responder(request):
+        if request['model'] == SLOW_MODEL:
+            time.sleep(request['timeout'] + 0.1)
+            raise TimeoutError('request timed out')
+        timeouts.append(request.get('timeout'))
+        return {
+            'response': 'Yes, it is.',
+            'additional_questions': ['What is the tone?'],
+            'relevance': 0.9,
+            'confidence': 0.9,
+            'surprise': 0.1,
+        }
+
+    mock_backend(responder)
+
+    ctm = ConsciousTuringMachine()
+    ctm.config.max_iter_num = 5
+    ctm.config.output_threshold = 10.0
+    ctm.config.processors_config = {
+        'language_processor': {'model': FAST_MODEL},
+        'code_processor': {'model': SLOW_MODEL},
+    }
+    ctm.load_ctm()
+
+    start = time.monotonic()
+    answer, _, parsed = ctm.forward(
+        query='Is this sarcastic?', text='Great, just great.', timeout_s=0.5
+    )
+
+    assert time.monotonic() - start < 2
+    assert answer == 'Yes, it is.'
+    assert 'Yes' in parsed
+    assert ctm.detailed_log['timed_out']
+    assert ctm.iteration_history[0]['winning_processor'] == 'language_processor'
+    # The processor call carries the remaining budget; the final parse, past
+    # the deadline, is not sent and the raw answer is returned.
+    assert 0 < timeouts[0] <= 0.5
+    assert None not in timeouts
+
+
+def test_parse_is_capped_by_the_deadline_and_not_retried_past_it(
+    monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    calls = []
+
+    def failing(request):
+        calls.append(request.get('timeout'))
+        raise CircuitOpenError(f'Circuit open for {FAST_MODEL}')
+
+    mock_backend(failing)
+    ctm = ConsciousTuringMachine()
+
+    start = time.monotonic()
+    assert ctm.parse_answer('raw', 'q', deadline=Deadline(5)) == 'raw'
+    assert time.monotonic() - start < 1
+    assert len(calls) == 1 and 0 < calls[0] <= 5
+
+    mock_backend(lambda request: calls.append(request) or 1 / 0)
+    assert ctm.parse_answer('raw', 'q', deadline=Deadline(0.5)) == 'raw'
+    assert ctm.parse_answer('raw', 'q', deadline=Deadline(0)) == 'raw'
+    assert len(calls) == 2  # one attempt; the 1s backoff would overrun
+
+
+def test_rapidapi_processor_gives_no_answer_past_the_deadline(
+    monkeypatch, mock_backend
+) -> None:
+    monkeypatch.setenv('RAPIDAPI_KEY', 'test-key')
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    timeouts = []
+    mock_backend(lambda request: timeouts.append(request.get('timeout')) or 'Tokyo')
+
+    async def slow_run(self, prompt):
+        await asyncio.sleep(5)
+        return 'sunny'
+
+    agent = processor_weather.WeatherMCPAgent
+    monkeypatch.setattr(agent, '__aenter__', lambda self: asyncio.sleep(0, self))
+    monkeypatch.setattr(agent, '__aexit__', lambda self, *args: asyncio.sleep(0))
+    monkeypatch.setattr(agent, 'run', slow_run)
+    processor = WeatherProcessor(name='weather_processor', model=FAST_MODEL)
+
+    start = time.monotonic()
+    assert processor.ask('Weather in Tokyo?', deadline=Deadline(0.3)) is None
+    assert time.monotonic() - start < 1
+    assert len(timeouts) == 1 and 0 < timeouts[0] <= 0.3  # no second LLM call
+    assert processor.ask('Weather in Tokyo?', deadline=Deadline(0)) is None
+    assert len(timeouts) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.utils import SharedExecutor, configure_executor, get_executor
+
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    configure_executor(None)
+
+
+def test_quota_caps_one_ctm_and_gauges_track_the_pool() -> None:
+    executor = SharedExecutor(max_workers=4)
+    quota = executor.quota(2)
+    release = threading.Event()
+    running = []
+    lock = threading.Lock()
+
+    def task(i):
+        with lock:
+            running.append(i)
+        release.wait(5)
+        return i * 10
+
+    futures = [quota.submit(task, i) for i in range(5)]
+    time.sleep(0.1)
+    assert len(running) == 2
+    assert quota.stats() == {'limit': 2, 'running': 2, 'waiting': 3}
+    assert executor.stats()['active_workers'] == 2
+
+    # Another CTM's quota still gets the free workers.
+    other = executor.quota(None).submit(lambda: 'other')
+    assert other.result(timeout=5) == 'other'
+
+    futures[4].cancel()  # still waiting: never runs
+    release.set()
+    assert [f.result(timeout=5) for f in futures[:4]] == [0, 10, 20, 30]
+    assert futures[4].cancelled() and 4 not in running
+    time.sleep(0.05)
+    assert executor.stats()['queue_depth'] == 0
+    assert executor.stats()['active_workers'] == 0
+
+
+def test_nested_submit_runs_inline_and_errors_propagate() -> None:
+    executor = SharedExecutor(max_workers=1)
+    quota = executor.quota(1)
+    outer = quota.submit(lambda: quota.submit(lambda: 'inner').result(timeout=1))
+    assert outer.result(timeout=5) == 'inner'
+
+    failed = quota.submit(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failed.result(timeout=5)
+
+
+def test_ctm_phases_share_the_configured_pool(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    ctm = ConsciousTuringMachine()
+    ctm.config.executor = pool
+    ctm.config.executor_quota = 1
+    ctm.config.processors_config = {
+        'language_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        'code_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+    }
+    ctm.load_ctm()
+    assert get_executor()._executor is pool
+    threads = set()
+
+    for processor in ctm.processor_graph.nodes:
+
+        def ask(query, *args, _name=processor.name, **kwargs):
+            threads.add(threading.current_thread().name)
+            return None
+
+        processor.ask = ask
+
+    ctm.ask_processors('q')
+    assert threads and all(name.startswith('ThreadPoolExecutor') for name in threads)
+    assert ctm.executor.stats()['running'] == 0
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,66 @@
+import base64
+import subprocess
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.processors import processor_video
+from ctm_ai.utils import configure_media_cache
+
+
+def _jpeg(tag: bytes) -> bytes:
+    return b'\xff\xd8' + tag + b'\xff\xd9'
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def run(cmd, **kwargs):
+        with lock:
+            calls.append(cmd)
+        if cmd[0] == 'ffprobe':
+            return SimpleNamespace(stdout='2.0\n', returncode=0)
+        count = int(cmd[cmd.index('-frames:v') + 1])
+        stdout = b''.join(_jpeg(b'frame%d' % i) for i in range(count))
+        return SimpleNamespace(stdout=stdout, returncode=0)
+
+    monkeypatch.setattr(subprocess, 'run', run)
+    configure_media_cache({'scope': 'forward'})
+    yield calls
+    configure_media_cache(None)
+
+
+def test_split_jpeg_stream() -> None:
+    data = b'junk' + _jpeg(b'a\xff\x00b') + _jpeg(b'c') + b'\xff\xd8truncated'
+    assert processor_video._split_jpeg_stream(data) == [
+        _jpeg(b'a\xff\x00b'),
+        _jpeg(b'c'),
+    ]
+
+
+def test_frames_come_from_one_ffmpeg_pipe(tmp_path, fake_ffmpeg) -> None:
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'\x00' * 100)
+
+    frames = processor_video._extract_frames_as_base64(str(video), num_frames=4)
+    assert [base64.b64decode(f) for f in frames] == [
+        _jpeg(b'frame%d' % i) for i in range(4)
+    ]
+    ffmpeg = [cmd for cmd in fake_ffmpeg if cmd[0] == 'ffmpeg']
+    assert len(ffmpeg) == 1
+    assert ffmpeg[0][-3:] == ['-c:v', 'mjpeg', 'pipe:1']
+    assert '-ss' in ffmpeg[0] and 'fps=4/2.000' in ffmpeg[0]
+
+    # Cached per (video, num_frames); the duration probe is shared.
+    calls = len(fake_ffmpeg)
+    assert processor_video._extract_frames_as_base64(str(video), 4) == frames
+    assert len(fake_ffmpeg) == calls
+    assert len(processor_video._extract_frames_as_base64(str(video), 2)) == 2
+    assert len(fake_ffmpeg) == calls + 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
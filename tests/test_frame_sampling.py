@@ -0,0 +1,102 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ctm_ai.utils import extract_video_frames, load_video, sample_video_frames
+
+
+class FakeCapture:
+    """cv2.VideoCapture over a numbered clip that counts decoded frames."""
+
+    instances: list = []
+    reports_count = True
+
+    def __init__(self, path, total=200) -> None:
+        self.total = total
+        self.position = 0
+        self.decoded = 0
+        self.seeks = 0
+        FakeCapture.instances.append(self)
+
+    def get(self, prop):
+        assert prop == 'frame_count'
+        return float(self.total) if self.reports_count else 0.0
+
+    def set(self, prop, value):
+        assert prop == 'pos_frames'
+        self.seeks += 1
+        self.position = int(value)
+
+    def grab(self):
+        if self.position >= self.total:
+            return False
+        self.position += 1
+        self.decoded += 1
+        return True
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return True, np.full((2, 2, 3), self.position - 1, dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_cv2(monkeypatch):
+    FakeCapture.instances = []
+    written = []
+    module = SimpleNamespace(
+        VideoCapture=FakeCapture,
+        CAP_PROP_FRAME_COUNT='frame_count',
+        CAP_PROP_POS_FRAMES='pos_frames',
+        imwrite=lambda path, frame: written.append(path) or True,
+    )
+    monkeypatch.setitem(sys.modules, 'cv2', module)
+    return written
+
+
+def test_decodes_only_target_frames() -> None:
+    frames = list(sample_video_frames('clip.mp4', num_frames=4))
+    assert [index for index, _ in frames] == [0, 50, 100, 150]
+    assert [int(frame[0, 0, 0]) for _, frame in frames] == [0, 50, 100, 150]
+    capture = FakeCapture.instances[-1]
+    assert capture.decoded == 4 and capture.seeks == 3
+
+    # Close targets are reached by grabbing instead of seeking.
+    assert [i for i, _ in sample_video_frames('clip.mp4', [5, 3, 40])] == [3, 5, 40]
+    capture = FakeCapture.instances[-1]
+    assert capture.seeks == 1 and capture.decoded == 7
+
+
+def test_load_video_and_extract_frames_keep_their_sampling(fake_cv2, tmp_path) -> None:
+    frames = load_video('clip.mp4', frame_num=5)
+    assert [int(f[0, 0, 0]) for f in frames] == [0, 40, 80, 120, 160]
+    assert FakeCapture.instances[-1].decoded == 5
+
+    paths = extract_video_frames('clip.mp4', str(tmp_path), max_frames=3)
+    assert [p.rsplit('/', 1)[1] for p in paths] == [
+        'frame_00000.jpg',
+        'frame_00066.jpg',
+        'frame_00133.jpg',
+    ]
+    assert fake_cv2 == paths
+
+
+def test_videos_without_a_frame_count_are_read_sequentially(monkeypatch) -> None:
+    monkeypatch.setattr(FakeCapture, 'reports_count', False)
+    frames = load_video('clip.webm', frame_num=5)
+    assert [int(f[0, 0, 0]) for f in frames] == [0, 40, 80, 120, 160]
+    assert FakeCapture.instances[-1].seeks == 0
+
+    frames = list(sample_video_frames('clip.webm', num_frames=4))
+    assert [index for index, _ in frames] == [0, 50, 100, 150]
+    assert [i for i, _ in sample_video_frames('clip.webm', [3, 500])] == [3]
+    assert sum(capture.seeks for capture in FakeCapture.instances) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ctm_ai.chunks import Chunk
+from ctm_ai.ctms.ctm import ConsciousTuringMachine, split_fuse_answer
+
+
+def _build_ctm() -> ConsciousTuringMachine:
+    ctm = ConsciousTuringMachine()
+    ctm.config.processors_config = {
+        'language_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        'code_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        'vision_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+    }
+    ctm.load_ctm()
+    # language and code both link to vision and to each other.
+    ctm.processor_graph.add_link('language_processor', 'vision_processor')
+    ctm.processor_graph.add_link('code_processor', 'vision_processor')
+    ctm.processor_graph.add_link('code_processor', 'language_processor')
+    return ctm
+
+
+def _chunks():
+    return [
+        Chunk(1, 'language_processor', additional_questions=['Is it ironic?']),
+        Chunk(1, 'code_processor', additional_questions=['Does it run?']),
+        Chunk(1, 'vision_processor'),
+    ]
+
+
+def _fake_ask(ctm, replies, calls):
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, max
+
+    def install(processor):
+        def ask(query, phase, **kwargs):
+            with lock:
+                calls.append((processor.name, query))
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return Chunk(1, processor.name, gist=replies[processor.name])
+
+        processor.ask = ask
+
+    for processor in ctm.processor_graph.nodes:
+        install(processor)
+    return in_flight
+
+
+def test_questions_for_one_neighbor_are_merged_and_split(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    ctm = _build_ctm()
+    calls = []
+    replies = {
+        'vision_processor': '[Part 1] Yes, ironic.\n[Part 2] No, it crashes.',
+        'language_processor': 'It runs.',
+        'code_processor': 'Not ironic.',
+    }
+    in_flight = _fake_ask(ctm, replies, calls)
+    chunks = _chunks()
+
+    ctm.fuse_processor(chunks, 'q', winning_chunk=chunks[2])
+
+    assert sorted(name for name, _ in calls) == [
+        'code_processor',
+        'language_processor',
+        'vision_processor',
+    ]
+    merged = dict(calls)['vision_processor']
+    assert '[Part 1]\n1. Is it ironic?' in merged
+    assert '[Part 2]\n1. Does it run?' in merged
+    assert in_flight[1] == 3
+
+    language = ctm.processor_graph.get_node('language_processor')
+    code = ctm.processor_graph.get_node('code_processor')
+    assert sorted(h['answer'] for h in language.fuse_history) == [
+        'Not ironic.',
+        'Yes, ironic.',
+    ]
+    assert sorted(h['answer'] for h in code.fuse_history) == [
+        'It runs.',
+        'No, it crashes.',
+    ]
+
+
+def test_unsplittable_answer_goes_to_every_asker(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    ctm = _build_ctm()
+    replies = {
+        'vision_processor': 'Both: yes.',
+        'language_processor': 'Sure.',
+        'code_processor': 'Maybe.',
+    }
+    _fake_ask(ctm, replies, [])
+    chunks = _chunks()
+
+    ctm.fuse_processor(chunks, 'q', winning_chunk=chunks[2])
+
+    language = ctm.processor_graph.get_node('language_processor')
+    assert sorted(h['answer'] for h in language.fuse_history) == [
+        'Both: yes.',
+        'Maybe.',
+    ]
+
+
+def test_async_fuse_without_batching(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    ctm = _build_ctm()
+    ctm.FUSE_BATCH_QUESTIONS = False
+    queries = []
+
+    for processor in ctm.processor_graph.nodes:
+
+        async def aask(query, phase, _name=processor.name, **kwargs):
+            queries.append(query)
+            return Chunk(1, _name, gist=f'{_name} says hi')
+
+        processor.aask = aask
+
+    chunks = _chunks()
+    asyncio.run(ctm.afuse_processor(chunks, 'q', winning_chunk=chunks[2]))
+
+    assert len(queries) == 4
+    assert not any('[Part' in query for query in queries)
+
+
+def test_split_fuse_answer() -> None:
+    assert split_fuse_answer('[Part 2] b [Part 1] a', 2) == ['a', 'b']
+    assert split_fuse_answer('[Part 1] a', 2) is None
+    assert split_fuse_answer('[Part 1] a [Part 2]', 2) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ctm_ai.utils import HedgePolicy, configure_executor, get_executor
+
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    configure_executor(None)
+
+
+def _warm_up(policy: HedgePolicy, model: str, latency: float = 0.01) -> None:
+    for _ in range(policy.min_samples):
+        policy.tracker(model).record(latency)
+        policy._start_primary()
+
+
+def test_slow_call_is_hedged_and_fast_duplicate_wins() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    calls = []
+    discarded = []
+    lock = threading.Lock()
+
+    def fn() -> str:
+        with lock:
+            calls.append(1)
+            attempt = len(calls) - 1
+        time.sleep(1.0 if attempt == 0 else 0.01)
+        return f'attempt-{attempt}'
+
+    start = time.monotonic()
+    assert policy.call('gemini/x', fn, discarded.append) == 'attempt-1'
+    # The caller gets the hedge's answer without waiting for the primary.
+    assert time.monotonic() - start < 0.5
+    assert discarded == []
+    assert policy.stats()['hedged_requests'] == 1
+    assert policy.stats()['hedge_wins'] == 1
+    time.sleep(1.0)  # the losing primary finishes in the background
+    assert discarded == ['attempt-0']
+
+
+def test_fast_primary_is_not_hedged_and_loser_is_accounted() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x', latency=0.05)
+    discarded = []
+
+    assert policy.call('gemini/x', lambda: 'ok') == 'ok'
+    assert policy.stats()['hedged_requests'] == 0
+
+    attempts = []
+
+    def slow_primary() -> str:
+        attempts.append(1)
+        attempt = len(attempts)
+        time.sleep(0.15 if attempt == 1 else 0.3)
+        return f'attempt-{attempt}'
+
+    assert policy.call('gemini/x', slow_primary, discarded.append) == 'attempt-1'
+    time.sleep(0.4)  # the losing hedge finishes in the background
+    assert discarded == ['attempt-2']
+
+
+def test_failed_primary_falls_back_to_running_hedge() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    attempts = []
+
+    def fn() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.1)
+            raise TimeoutError('primary timed out')
+        time.sleep(0.1)
+        return 'hedge'
+
+    assert policy.call('gemini/x', fn) == 'hedge'
+    assert policy.stats()['hedge_wins'] == 1
+
+
+def test_primary_left_queued_on_a_full_pool_runs_on_the_caller() -> None:
+    configure_executor({'max_workers': 1})
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    threads = []
+
+    def fn() -> str:
+        threads.append(threading.current_thread())
+        return 'ok'
+
+    # The only worker waits on its own hedged call and must not deadlock.
+    outer = get_executor().submit(lambda: policy.call('gemini/x', fn))
+    assert outer.result(timeout=5) == 'ok'
+    assert len(threads) == 1 and threads[0].name.startswith('ctm-worker')
+    assert policy.stats()['hedged_requests'] == 0
+
+
+def test_budget_caps_duplicates() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=0.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    calls = []
+
+    def fn() -> str:
+        calls.append(1)
+        time.sleep(0.05)
+        return 'ok'
+
+    assert policy.call('gemini/x', fn) == 'ok'
+    assert len(calls) == 1
+    assert policy.stats()['hedged_requests'] == 0
+
+
+def test_async_hedge_cancels_loser() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    attempts = []
+    cancelled = []
+
+    async def fn() -> str:
+        attempt = len(attempts)
+        attempts.append(attempt)
+        try:
+            await asyncio.sleep(0.5 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return f'attempt-{attempt}'
+
+    async def main() -> str:
+        result = await policy.acall('gemini/x', fn)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 'attempt-1'
+    assert cancelled == [0]
+
+
+def test_async_loser_that_already_finished_is_accounted() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=1.0, min_samples=5)
+    _warm_up(policy, 'gemini/x')
+    discarded = []
+
+    async def main() -> str:
+        loop = asyncio.get_running_loop()
+        primary, hedge = loop.create_future(), loop.create_future()
+        # Both copies are done before the race looks at them.
+        primary.set_result('primary')
+        hedge.set_result('hedge')
+        return await policy._arace(
+            'gemini/x', primary, lambda: hedge, time.monotonic(), discarded.append
+        )
+
+    assert asyncio.run(main()) in ('primary', 'hedge')
+    assert len(discarded) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import APIKeyPool, configure_key_pool
+
+
+class _QuotaExceeded(Exception):
+    status_code = 429
+
+
+class _BadKey(Exception):
+    status_code = 401
+
+
+@pytest.fixture(autouse=True)
+def _reset_pools():
+    yield
+    configure_key_pool('gemini', None)
+
+
+def test_pool_picks_least_loaded_key() -> None:
+    pool = APIKeyPool('gemini', ['key-aaaa', 'key-bbbb'])
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first, second} == {'key-aaaa', 'key-bbbb'}
+    pool.release(first)
+    assert pool.acquire() == first
+
+
+def test_failing_keys_are_quarantined() -> None:
+    pool = APIKeyPool('gemini', ['key-aaaa', 'key-bbbb', 'key-cccc'])
+    pool.release(pool.acquire(), error=_QuotaExceeded())
+    pool.release(pool.acquire(), error=_BadKey())
+    pool.release(pool.acquire(), error=ValueError('bad json'))
+
+    stats = {s['key']: s for s in pool.stats()}
+    assert [stats[k]['healthy'] for k in ('...aaaa', '...bbbb', '...cccc')] == [
+        False,
+        False,
+        True,
+    ]
+    assert all(pool.acquire() == 'key-cccc' for _ in range(3))
+
+
+def test_processor_rotates_keys_from_pool(monkeypatch) -> None:
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    configure_key_pool('gemini', ['key-aaaa', 'key-bbbb'])
+    used = []
+
+    def fake_completion(**kwargs):
+        used.append(kwargs['api_key'])
+        if kwargs['api_key'] == 'key-aaaa':
+            raise _QuotaExceeded()
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(message=SimpleNamespace(content='{"response": "ok"}'))
+            ],
+            usage=SimpleNamespace(
+                prompt_tokens=10, completion_tokens=5, total_tokens=15
+            ),
+        )
+
+    monkeypatch.setattr('litellm.completion', fake_completion)
+    monkeypatch.setattr('time.sleep', lambda s: None)
+    processor = BaseProcessor(name='language_processor')
+
+    for _ in range(3):
+        output = processor.ask_executor(messages=[{'role': 'user', 'content': 'hi'}])
+        assert output['response'] == 'ok'
+
+    assert used.count('key-aaaa') == 1
+    assert used[-2:] == ['key-bbbb', 'key-bbbb']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
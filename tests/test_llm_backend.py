@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    LiteLLMBackend,
+    LLMBackend,
+    MockLLMBackend,
+    configure_llm_backend,
+    get_llm_backend,
+)
+
+PROCESSOR_MODEL = 'gemini/gemini-2.0-flash'
+PARSE_MODEL = 'gemini/gemini-2.5-flash-lite'
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    yield
+    configure_llm_backend(None)
+
+
+def test_ctm_runs_offline_against_mock_backend(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+
+    def responder(request):
+        if request['model'] == PARSE_MODEL:
+            return 'Yes'
+        return {
+            'response': 'Yes, it is sarcastic.',
+            'additional_questions': [],
+            'relevance': 0.9,
+            'confidence': 0.9,
+            'surprise': 0.1,
+        }
+
+    backend = MockLLMBackend(responder)
+    ctm = ConsciousTuringMachine()
+    ctm.config.max_iter_num = 1
+    ctm.config.llm_backend = backend
+    ctm.config.processors_config = {
+        'language_processor': {'model': PROCESSOR_MODEL},
+        'code_processor': {'model': PROCESSOR_MODEL},
+    }
+    ctm.load_ctm()
+
+    answer, _, parsed = ctm.forward(query='Is this sarcastic?', text='Great.')
+
+    assert get_llm_backend() is backend
+    assert answer == 'Yes, it is sarcastic.'
+    assert parsed == 'Yes'
+    models = [call['model'] for call in backend.calls]
+    assert models.count(PROCESSOR_MODEL) >= 2
+    assert models[-1] == PARSE_MODEL
+
+
+def test_mock_backend_streams_and_completes_async(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    reply = {'response': 'yes', 'relevance': 0.9, 'padding': 'x' * 200}
+    backend = configure_llm_backend({'type': 'mock', 'responder': reply})
+    processor = BaseProcessor(name='language_processor', stream=True)
+    messages = [{'role': 'user', 'content': 'q'}]
+
+    output = processor.ask_executor(messages=messages, phase='link_form')
+    assert output['response'] == 'yes'
+    processor.stream = False
+    output = asyncio.run(processor.ask_executor_async(messages=messages))
+    assert output['relevance'] == 0.9
+    assert len(backend.calls) == 2
+
+    with pytest.raises(ValueError, match='Unknown LLM backend'):
+        configure_llm_backend('nope')
+
+
+def test_litellm_backend_applies_defaults(monkeypatch) -> None:
+    seen = []
+
+    def fake_completion(**kwargs):
+        seen.append(kwargs)
+        return json.dumps(kwargs)
+
+    monkeypatch.setattr('litellm.completion', fake_completion)
+    backend = LiteLLMBackend(api_base='http://localhost:8000/v1')
+
+    backend.complete(model='openai/local', messages=[])
+    backend.stream(model='openai/local', messages=[], api_base='http://other')
+
+    assert seen[0]['api_base'] == 'http://localhost:8000/v1'
+    assert seen[1]['api_base'] == 'http://other'
+    assert seen[1]['stream'] is True
+
+
+def test_backends_must_implement_complete_and_stream() -> None:
+    class CompleteOnly(LLMBackend):
+        def complete(self, **kwargs):
+            return None
+
+    with pytest.raises(TypeError):
+        LLMBackend()
+    with pytest.raises(TypeError):
+        CompleteOnly()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,190 @@
+import base64
+import os
+import threading
+import time
+
+import pytest
+
+from ctm_ai.chunks import Chunk
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    MediaEncodingCache,
+    configure_media_cache,
+    encode_data_url,
+    encode_file_base64,
+    get_executor,
+    get_media_cache,
+)
+from ctm_ai.utils import media_cache as media_cache_module
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'\x00' * 3000)
+    return str(path)
+
+
+def test_cache_is_bounded_lru_and_keyed_by_file_identity(tmp_path, clip) -> None:
+    cache = MediaEncodingCache(max_mb=5000 / 1024 / 1024, scope='process')
+    encodes = []
+
+    def encode(path):
+        encodes.append(path)
+        return 'x' * os.path.getsize(path)
+
+    other = str(tmp_path / 'other.wav')
+    with open(other, 'wb') as f:
+        f.write(b'\x01' * 3000)
+
+    cache.get_or_encode(clip, 'base64', lambda: encode(clip))
+    cache.get_or_encode(clip, 'base64', lambda: encode(clip))
+    cache.get_or_encode(other, 'base64', lambda: encode(other))  # evicts clip
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 3000
+
+    with open(other, 'ab') as f:
+        f.write(b'\x01')  # new size: re-encoded
+    cache.get_or_encode(other, 'base64', lambda: encode(other))
+    cache.get_or_encode(clip, 'base64', lambda: encode(clip))
+    assert encodes == [clip, other, other, clip]
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 4
+    assert stats['hit_ratio'] == pytest.approx(0.2)
+
+    cache.end_forward()  # process scope keeps entries
+    assert cache.stats()['entries'] == 1
+
+
+def test_concurrent_requests_encode_once(clip) -> None:
+    cache = MediaEncodingCache()
+    encodes = []
+
+    def slow_encode():
+        encodes.append(1)
+        time.sleep(0.05)
+        return 'encoded'
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache.get_or_encode(clip, 'base64', slow_encode)
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['encoded'] * 8
+    assert len(encodes) == 1
+
+
+def test_video_is_read_once_per_forward(monkeypatch, clip) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    reads = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        if path == clip:
+            reads.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', counting_open)
+    configure_media_cache({'scope': 'forward'})
+    try:
+        processor = BaseProcessor(name='video_processor')
+        first = processor.build_executor_messages('q1', video_path=clip)
+        second = processor.build_executor_messages('q2', video_path=clip)
+        assert first[1] == second[1]
+        assert len(reads) == 1
+
+        get_media_cache().end_forward()
+        processor.build_executor_messages('q3', video_path=clip)
+        assert len(reads) == 2
+    finally:
+        configure_media_cache(None)
+
+
+def test_failed_forward_still_drops_its_entries(monkeypatch, clip) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    configure_media_cache({'scope': 'forward'})
+    try:
+        ctm = ConsciousTuringMachine()
+        ctm.config.processors_config = {
+            'video_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+        }
+        ctm.load_ctm()
+        processor = ctm.processor_graph.get_node('video_processor')
+
+        def ask(query, *args, **kwargs):
+            processor.build_executor_messages(query, video_path=kwargs['video_path'])
+            return Chunk(1, processor.name, gist='a', weight=0.1)
+
+        def fail(chunks):
+            raise RuntimeError('boom')
+
+        processor.ask = ask
+        monkeypatch.setattr(ctm, 'uptree_competition', fail)
+        with pytest.raises(RuntimeError):
+            ctm.forward('q', video_path=clip)
+        assert get_media_cache().stats()['entries'] == 0
+        assert get_media_cache()._forwards == []
+    finally:
+        configure_media_cache(None)
+
+
+def test_forward_scope_keeps_entries_other_forwards_use(tmp_path, clip) -> None:
+    cache = MediaEncodingCache(scope='forward')
+    other = str(tmp_path / 'other.wav')
+    with open(other, 'wb') as f:
+        f.write(b'\x01' * 10)
+
+    def run_forward(paths, started, release):
+        forward = cache.begin_forward()
+        for path in paths:
+            # Processors encode on the shared executor's workers.
+            get_executor().submit(
+                cache.get_or_encode, path, 'base64', lambda p=path: p
+            ).result(timeout=5)
+        started.set()
+        release.wait(5)
+        cache.end_forward(forward)
+
+    events = [threading.Event() for _ in range(4)]
+    first = threading.Thread(target=run_forward, args=([clip], *events[:2]))
+    second = threading.Thread(target=run_forward, args=([clip, other], *events[2:]))
+    first.start()
+    second.start()
+    events[0].wait(5)
+    events[2].wait(5)
+    assert cache.stats()['entries'] == 2
+
+    events[3].set()  # the second forward ends; the first still uses clip
+    second.join()
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == len(clip)
+
+    events[1].set()
+    first.join()
+    assert cache.stats()['entries'] == 0 and cache.stats()['bytes'] == 0
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, 4, 299, 300, 301, 1000])
+def test_chunked_encoder_matches_b64encode(monkeypatch, tmp_path, size) -> None:
+    monkeypatch.setattr(media_cache_module, '_ENCODE_CHUNK', 30)
+    path = tmp_path / 'media.bin'
+    data = os.urandom(size)
+    path.write_bytes(data)
+    expected = base64.b64encode(data).decode('utf-8')
+    assert encode_file_base64(str(path)) == expected
+    assert encode_data_url(str(path), 'video/mp4') == (
+        f'data:video/mp4;base64,{expected}'
+    )
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    MediaPack,
+    MediaPackWriter,
+    configure_media_cache,
+    configure_media_pack,
+    get_media_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def restore():
+    yield
+    configure_media_pack(None)
+    configure_media_cache(None)
+
+
+def test_pack_round_trips_text_and_json(tmp_path) -> None:
+    clip = tmp_path / 'clip.mp4'
+    clip.write_bytes(b'\x00' * 10)
+    path = str(tmp_path / 'media.pack')
+    with MediaPackWriter(path) as writer:
+        writer.add(str(clip), 'data_url:video/mp4', 'data:video/mp4;base64,AAAA')
+        writer.add(str(clip), 'jpeg_frames_4', ['a', 'b'])
+        writer.add(str(clip), 'jpeg_frames_4', ['ignored'])  # first one wins
+    pack = MediaPack(path)
+    assert len(pack) == 2
+    assert pack.get(str(clip), 'data_url:video/mp4') == 'data:video/mp4;base64,AAAA'
+    assert pack.get(str(clip), 'jpeg_frames_4', size=10) == ['a', 'b']
+    assert pack.get(str(clip), 'jpeg_frames_4', size=11) is None  # stale
+    assert pack.get(str(clip), 'duration') is None
+
+
+def test_processor_reads_from_pack_without_opening_media(monkeypatch, tmp_path):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    clip = tmp_path / 'clip.mp4'
+    clip.write_bytes(b'\x00' * 3000)
+    path = str(tmp_path / 'media.pack')
+    processor = BaseProcessor(name='video_processor')
+
+    with MediaPackWriter(path) as writer:
+        get_media_cache().recorder = writer.add
+        packed = processor.build_executor_messages('q', video_path=str(clip))
+        get_media_cache().recorder = None
+    assert len(writer) == 1
+
+    configure_media_cache({'scope': 'forward'})
+    configure_media_pack(path)
+    real_open = open
+
+    def guarded_open(file, *args, **kwargs):
+        assert file != str(clip), 'media must come from the pack'
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', guarded_open)
+    assert processor.build_executor_messages('q', video_path=str(clip)) == packed
+    assert get_media_cache().stats()['pack_hits'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,136 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ctm_ai.ctms.ctm import ConsciousTuringMachine
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    MediaPreprocessor,
+    configure_media_cache,
+    configure_transcode_cache,
+    estimate_image_tokens,
+)
+
+SETTINGS = {'max_long_edge': 512, 'jpeg_quality': 70}
+
+
+def _noise_image(width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8))
+
+
+def _decode(url: str) -> Image.Image:
+    header, data = url.split(',', 1)
+    assert header == 'data:image/jpeg;base64'
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch, tmp_path):
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    configure_media_cache({'scope': 'forward'})
+    configure_transcode_cache({'cache_dir': str(tmp_path / 'transcodes')})
+    yield
+    configure_transcode_cache(None)
+    configure_media_cache(None)
+
+
+def test_token_estimates() -> None:
+    assert estimate_image_tokens(300, 200, 'gemini') == 258
+    assert estimate_image_tokens(2000, 1000, 'gemini') == 6 * 258
+    assert estimate_image_tokens(280, 56, 'qwen') == 20
+
+
+def test_image_path_is_shrunk_once_and_reported(monkeypatch, tmp_path) -> None:
+    path = tmp_path / 'photo.png'
+    _noise_image(2000, 1000).save(path)
+    processor = BaseProcessor(name='vision_processor', media_preprocess=SETTINGS)
+    writes = []
+    write_image = processor.media_preprocess._write_image
+    monkeypatch.setattr(
+        processor.media_preprocess,
+        '_write_image',
+        lambda source, output: writes.append(source) or write_image(source, output),
+    )
+
+    first = processor.build_executor_messages('q1', image_path=str(path))
+    second = processor.build_executor_messages('q2', image_path=str(path))
+    assert first[1] == second[1]
+    url = first[1]['content'][0]['image_url']['url']
+    assert _decode(url).size == (512, 256)
+
+    configure_media_cache(None)  # next forward: read back from the disk cache
+    processor.build_executor_messages('q3', image_path=str(path))
+    assert len(writes) == 1
+
+    # q2 reused q1's result; q3 prepared the image again from the disk cache.
+    stats = processor.media_preprocess.stats()
+    assert stats['inputs'] == 2 and stats['shrunk'] == 2
+    assert stats['tokens_saved'] == 2 * (6 * 258 - 258)
+    assert stats['bytes_saved'] > 0
+
+
+def test_settings_reach_processors_through_ctm_config() -> None:
+    ctm = ConsciousTuringMachine()
+    ctm.config.processors_config = {
+        'vision_processor': {
+            'model': 'gemini/gemini-2.5-flash-lite',
+            'media_preprocess': SETTINGS,
+        },
+        'language_processor': {'model': 'gemini/gemini-2.5-flash-lite'},
+    }
+    ctm.load_ctm()
+    vision = ctm.processor_graph.get_node('vision_processor')
+    assert vision.media_preprocess.max_long_edge == 512
+    assert ctm.processor_graph.get_node('language_processor').media_preprocess is None
+
+
+def test_in_memory_images_and_unshrinkable_inputs(tmp_path) -> None:
+    preprocessor = MediaPreprocessor(**SETTINGS)
+    image = _noise_image(1024, 1024)
+    encoded = preprocessor.image_base64(image, 'qwen')
+    assert preprocessor.image_base64(image, 'qwen') == encoded
+    assert _decode(f'data:image/jpeg;base64,{encoded}').size == (512, 512)
+    assert preprocessor.stats()['tokens_saved'] == 37 * 37 - 19 * 19
+
+    # A tiny PNG that JPEG would only enlarge is sent unchanged.
+    small = tmp_path / 'icon.png'
+    Image.new('RGB', (16, 16), 'white').save(small)
+    url = preprocessor.data_url(str(small), 'image/png', 'gemini')
+    assert url.startswith('data:image/png;base64,')
+    assert preprocessor.stats()['inputs'] == 2
+    assert preprocessor.stats()['shrunk'] == 1
+
+
+def test_oversized_video_is_accepted_once_shrunk_below_the_inline_limit(
+    monkeypatch, tmp_path
+) -> None:
+    path = tmp_path / 'clip.mp4'
+    with open(path, 'wb') as f:
+        f.truncate(40 * 1024 * 1024)
+    plain = BaseProcessor(name='video_processor')
+    with pytest.raises(ValueError, match='20MB limit'):
+        plain.build_executor_messages('q', video_path=str(path))
+
+    processor = BaseProcessor(name='video_processor', media_preprocess=SETTINGS)
+    shrunk = 'data:video/mp4;base64,' + base64.b64encode(b'\0' * 1024).decode()
+    monkeypatch.setattr(processor.media_preprocess, 'data_url', lambda *args: shrunk)
+    messages = processor.build_executor_messages('q', video_path=str(path))
+    assert messages[1]['content'][0]['image_url']['url'] == shrunk
+
+    # The limit applies to what is sent, so too little shrinking still fails.
+    large = b'\0' * (21 * 1024 * 1024)
+    monkeypatch.setattr(
+        processor.media_preprocess,
+        'data_url',
+        lambda *args: 'data:video/mp4;base64,' + base64.b64encode(large).decode(),
+    )
+    with pytest.raises(ValueError, match='20MB limit'):
+        processor.build_executor_messages('q', video_path=str(path))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,206 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import (
+    MediaUploadRegistry,
+    configure_key_pool,
+    configure_media_uploads,
+)
+
+
+class FakeFileAPI:
+    """Local stand-in for the Gemini resumable upload + files endpoints.
+
+    The first non-initial chunk of every upload fails once, after the server
+    has stored half of it, to exercise resuming from the reported offset.
+    """
+
+    def __init__(self) -> None:
+        self.sessions = {}
+        self.files = {}
+        self.contents = {}
+        self.chunk_posts = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _reply(self, status, payload=None, headers=None) -> None:
+                body = json.dumps(payload or {}).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get('Content-Length') or 0)
+                data = self.rfile.read(length)
+                self._reply(*server.handle(self.path, self.headers, data))
+
+            def do_GET(self) -> None:
+                resource = server.files[self.path.rsplit('/', 1)[-1]]
+                self._reply(200, {**resource, 'state': 'ACTIVE'})
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.api_base = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle(self, path, headers, data):
+        command = headers['X-Goog-Upload-Command']
+        if command == 'start':
+            session = str(len(self.sessions))
+            self.sessions[session] = {'data': b'', 'failed': False}
+            url = f'{self.api_base}/upload/session/{session}'
+            return 200, {}, {'X-Goog-Upload-URL': url}
+        session = self.sessions[path.rsplit('/', 1)[-1]]
+        if command == 'query':
+            size = str(len(session['data']))
+            return 200, {}, {'X-Goog-Upload-Size-Received': size}
+        self.chunk_posts += 1
+        assert int(headers['X-Goog-Upload-Offset']) == len(session['data'])
+        if session['data'] and not session['failed']:
+            session['failed'] = True
+            session['data'] += data[: len(data) // 2]
+            return 503, {}, {}
+        session['data'] += data
+        if 'finalize' not in command:
+            return 200, {}, {}
+        file_id = f'f{len(self.files)}'
+        self.files[file_id] = {
+            'name': f'files/{file_id}',
+            'uri': f'{self.api_base}/v1beta/files/{file_id}',
+            'mimeType': 'video/mp4',
+        }
+        self.contents[file_id] = session['data']
+        return 200, {'file': {**self.files[file_id], 'state': 'PROCESSING'}}, {}
+
+
+@pytest.fixture
+def file_api():
+    api = FakeFileAPI()
+    yield api
+    api.httpd.shutdown()
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(bytes(range(256)) * 10)
+    return str(path)
+
+
+def _registry(file_api, **kwargs) -> MediaUploadRegistry:
+    return MediaUploadRegistry(
+        api_base=file_api.api_base, chunk_size=512, poll_interval_s=0.01, **kwargs
+    )
+
+
+def test_upload_is_chunked_resumed_and_done_once(file_api, video) -> None:
+    registry = _registry(file_api)
+
+    first = registry.file_block(video, 'video/mp4', 'gemini', 'test-key')
+    second = registry.file_block(video, 'video/mp4', 'gemini', 'test-key')
+
+    assert first == second
+    assert first['file'] == {
+        'file_id': file_api.files['f0']['uri'],
+        'format': 'video/mp4',
+    }
+    assert file_api.contents['f0'] == open(video, 'rb').read()
+    # 2560 bytes in 512-byte chunks, plus the retried chunk.
+    assert file_api.chunk_posts == 6
+    assert registry.stats() == {'uploads': 1, 'reused': 1}
+    assert registry.file_block(video, 'video/mp4', 'qwen') is None
+
+
+def test_uris_expire_and_persist_across_registries(file_api, video, tmp_path) -> None:
+    index_path = str(tmp_path / 'uploads.json')
+    _registry(file_api, index_path=index_path).file_block(
+        video, 'video/mp4', 'gemini', 'test-key'
+    )
+
+    reloaded = _registry(file_api, index_path=index_path)
+    reloaded.file_block(video, 'video/mp4', 'gemini', 'test-key')
+    assert reloaded.stats() == {'uploads': 0, 'reused': 1}
+
+    expired = _registry(file_api, ttl_s=0)
+    expired.file_block(video, 'video/mp4', 'gemini', 'test-key')
+    expired.file_block(video, 'video/mp4', 'gemini', 'test-key')
+    assert expired.stats() == {'uploads': 2, 'reused': 0}
+
+
+def test_video_over_inline_limit_is_sent_by_reference(
+    file_api, tmp_path, monkeypatch
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    path = tmp_path / 'long.mp4'
+    with open(path, 'wb') as f:
+        f.truncate(21 * 1024 * 1024)
+    processor = BaseProcessor(
+        name='video_processor', model='gemini/gemini-2.5-flash-lite'
+    )
+    with pytest.raises(ValueError, match='20MB'):
+        processor.build_executor_messages('q', video_path=str(path))
+
+    configure_media_uploads({'api_base': file_api.api_base, 'poll_interval_s': 0.01})
+    try:
+        messages = processor.build_executor_messages('q', video_path=str(path))
+    finally:
+        configure_media_uploads(None)
+
+    assert messages[1]['content'] == [
+        {
+            'type': 'file',
+            'file': {'file_id': file_api.files['f0']['uri'], 'format': 'video/mp4'},
+        }
+    ]
+    assert len(file_api.contents['f0']) == 21 * 1024 * 1024
+
+
+def test_requests_with_uploads_use_the_uploading_key(
+    file_api, video, monkeypatch
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    sent_keys = []
+
+    def fake_completion(**kwargs):
+        sent_keys.append(kwargs['api_key'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{}'))],
+            usage=None,
+        )
+
+    monkeypatch.setattr('litellm.completion', fake_completion)
+    pool = configure_key_pool('gemini', ['key-a', 'key-b'])
+    configure_media_uploads({'api_base': file_api.api_base, 'poll_interval_s': 0.01})
+    processor = BaseProcessor(
+        name='video_processor', model='gemini/gemini-2.5-flash-lite'
+    )
+    try:
+        block = processor.uploaded_media_block(video, 'video/mp4')
+        assert block is not None
+        upload_key = pool.preferred_key()
+        busy = pool.acquire()  # the uploading key is now the busier one
+        assert busy == upload_key
+        messages = [{'role': 'user', 'content': [block]}]
+        processor._call_provider({'model': processor.model, 'messages': messages})
+        processor._call_provider(
+            {'model': processor.model, 'messages': [{'role': 'user', 'content': 'q'}]}
+        )
+        pool.release(busy)
+    finally:
+        configure_media_uploads(None)
+        configure_key_pool('gemini', None)
+    assert sent_keys == [upload_key, 'key-b']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.processors.rapidapi_processors import processor_weather
+from ctm_ai.utils import MetricsRegistry, MockLLMBackend, get_metrics
+
+MODEL = 'gemini/gemini-2.5-flash-lite'
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+def test_prometheus_export_has_labeled_counters_and_histograms() -> None:
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    response = MockLLMBackend('{}').complete(model=MODEL, messages=[])
+    prompt_tokens = 2 * response.usage.prompt_tokens
+    registry.observe_call('video_processor', MODEL, 'initial', 0.5, 0.2, response)
+    registry.observe_call('video_processor', MODEL, 'initial', 2.0, 0.0, response)
+    registry.observe_call(
+        'video_processor', MODEL, 'fuse', 0.0, 0.0, error=TimeoutError('slow')
+    )
+
+    text = registry.to_prometheus()
+    labels = 'processor="video_processor",model="gemini/gemini-2.5-flash-lite"'
+    assert f'ctm_llm_calls_total{{{labels},phase="initial"}} 2' in text
+    assert (
+        f'ctm_llm_prompt_tokens_total{{{labels},phase="initial"}} {prompt_tokens}'
+        in text
+    )
+    assert (
+        f'ctm_llm_errors_total{{{labels},phase="fuse",error="TimeoutError"}} 1' in text
+    )
+    assert (
+        f'ctm_llm_call_latency_seconds_bucket{{{labels},phase="initial",le="1.0"}} 1'
+        in text
+    )
+    assert (
+        f'ctm_llm_call_latency_seconds_bucket{{{labels},phase="initial",le="+Inf"}} 2'
+        in text
+    )
+    assert '# TYPE ctm_llm_queue_wait_seconds histogram' in text
+
+    latency = registry.to_dict()['ctm_llm_call_latency_seconds'][0]
+    assert latency['phase'] == 'initial'
+    assert latency['count'] == 2
+    assert latency['sum'] == pytest.approx(2.5)
+
+
+def test_processor_calls_and_retries_are_recorded(
+    monkeypatch, tmp_path, mock_backend
+) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    attempts = []
+
+    def responder(request):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ServiceUnavailable('overloaded')
+        return {'response': 'yes', 'relevance': 0.9}
+
+    mock_backend(responder)
+    metrics = get_metrics()
+    metrics.reset()
+    processor = BaseProcessor(name='language_processor', model=MODEL)
+
+    output = processor.ask_executor(
+        messages=[{'role': 'user', 'content': 'q'}], phase='link_form'
+    )
+
+    assert output['response'] == 'yes'
+    path = tmp_path / 'metrics.json'
+    metrics.dump_json(str(path))
+    dumped = json.loads(path.read_text())
+    labels = {'processor': 'language_processor', 'model': MODEL, 'phase': 'link_form'}
+    assert dumped['ctm_llm_calls_total'] == [{**labels, 'value': 1}]
+    completion_tokens = processor._usage_stats['completion_tokens']
+    assert completion_tokens > 0
+    assert dumped['ctm_llm_completion_tokens_total'] == [
+        {**labels, 'value': completion_tokens}
+    ]
+    assert dumped['ctm_llm_retries_total'] == [{**labels, 'value': 1}]
+    assert dumped['ctm_llm_errors_total'] == [
+        {**labels, 'error': 'ServiceUnavailable', 'value': 1}
+    ]
+    assert dumped['ctm_llm_queue_wait_seconds'][0]['count'] == 2
+    metrics.reset()
+
+
+def test_rapidapi_prompts_and_tool_loop_are_recorded(monkeypatch, mock_backend) -> None:
+    monkeypatch.setenv('RAPIDAPI_KEY', 'test-key')
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    mock_backend('Tokyo')
+    agent = processor_weather.WeatherMCPAgent
+    monkeypatch.setattr(agent, '__aenter__', lambda self: asyncio.sleep(0, self))
+    monkeypatch.setattr(agent, '__aexit__', lambda self, *args: asyncio.sleep(0))
+    metrics = get_metrics()
+    metrics.reset()
+    processor = BaseProcessor(name='weather_processor', model=MODEL)
+    weather_query = processor._generate_weather_query('Weather in Tokyo?')
+    response = processor._call_weather_mcp(weather_query)
+    assert response == 'Tokyo'
+    processor._generate_additional_question('Weather in Tokyo?', response)
+
+    calls = {
+        (entry['model'], entry['phase']): entry['value']
+        for entry in metrics.to_dict()['ctm_llm_calls_total']
+        if entry['processor'] == 'weather_processor'
+    }
+    assert calls == {
+        (MODEL, 'api_query'): 1,
+        ('gpt-4o-mini', 'mcp'): 1,
+        (MODEL, 'additional_question'): 1,
+    }
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
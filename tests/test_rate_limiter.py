@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from ctm_ai.utils import RateLimiter, configure_rate_limits, get_rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def _reset_limits():
+    yield
+    configure_rate_limits(None)
+
+
+def test_rpm_bucket_paces_requests_after_burst() -> None:
+    limiter = RateLimiter('test', rpm=600)
+    for _ in range(600):
+        assert limiter.acquire() == 0.0
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+
+
+def test_tpm_settle_returns_unused_tokens() -> None:
+    limiter = RateLimiter('test', tpm=1000)
+    limiter.acquire(900)
+    limiter.settle(reserved=900, actual=100)
+    assert limiter.acquire(800) == 0.0
+
+
+def test_model_limit_overrides_provider_limit() -> None:
+    configure_rate_limits({'gemini': {'rpm': 100}, 'gemini/gemini-2.5-pro': {'rpm': 5}})
+    assert get_rate_limiter('gemini/gemini-2.5-pro').rpm == 5
+    flash = get_rate_limiter('gemini/gemini-2.5-flash-lite')
+    assert flash.rpm == 100
+    assert get_rate_limiter('gemini/gemini-2.0-flash') is flash
+    assert get_rate_limiter('qwen/qwen3-omni-flash') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.utils import SingleFlight, configure_singleflight
+
+
+@pytest.fixture(autouse=True)
+def _reset_singleflight():
+    yield
+    configure_singleflight(False)
+
+
+def test_concurrent_identical_calls_share_one_execution() -> None:
+    flight = SingleFlight()
+    calls = []
+    results = []
+    started = threading.Event()
+
+    def slow() -> str:
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return 'answer'
+
+    def worker() -> None:
+        results.append(flight.do('k', slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    # Once finished, the key is free again.
+    assert flight.do('k', lambda: 'fresh') == ('fresh', False)
+
+
+def test_async_followers_share_leader_error() -> None:
+    flight = SingleFlight()
+
+    async def failing() -> None:
+        await asyncio.sleep(0.01)
+        raise RuntimeError('503')
+
+    async def main():
+        return await asyncio.gather(
+            flight.ado('k', failing), flight.ado('k', failing), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_processor_counts_coalesced_calls(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    configure_singleflight(True)
+    calls = []
+
+    async def fake_acompletion(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(
+            choices=[
+                SimpleNamespace(message=SimpleNamespace(content='{"response": "ok"}'))
+            ],
+            usage=SimpleNamespace(
+                prompt_tokens=10, completion_tokens=5, total_tokens=15
+            ),
+        )
+
+    monkeypatch.setattr('litellm.acompletion', fake_acompletion)
+    processor = BaseProcessor(name='language_processor')
+    messages = [{'role': 'user', 'content': 'same prompt'}]
+
+    async def main():
+        return await asyncio.gather(
+            *(processor.ask_executor_async(messages=messages) for _ in range(3))
+        )
+
+    outputs = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(o['response'] == 'ok' for o in outputs)
+    assert processor._usage_stats['api_calls'] == 1
+    assert processor._usage_stats['total_tokens'] == 15
+    assert processor._usage_stats['coalesced_calls'] == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,62 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ctm_ai.processors import BaseProcessor
+from ctm_ai.processors.utils import IncrementalJSONExtractor
+
+
+def _stream(text: str, size: int = 4):
+    for i in range(0, len(text), size):
+        delta = SimpleNamespace(content=text[i : i + size])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+def test_extractor_reports_fields_as_they_close() -> None:
+    text = (
+        '```json\n{"response": "a \\"quoted\\" {b}", "relevance": 0.7, "tags": [1, 2]}'
+    )
+    extractor = IncrementalJSONExtractor()
+    seen = []
+    for i in range(0, len(text), 3):
+        seen.extend(extractor.feed(text[i : i + 3]))
+    assert seen == ['response', 'relevance', 'tags']
+    assert extractor.fields['response'] == 'a "quoted" {b}'
+    assert extractor.fields['tags'] == [1, 2]
+
+
+def test_link_form_stream_stops_after_response_and_relevance(monkeypatch) -> None:
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-key')
+    payload = json.dumps({'response': 'yes', 'relevance': 0.9, 'padding': 'x' * 200})
+    consumed = []
+
+    def fake_completion(**kwargs):
+        assert kwargs['stream'] is True
+        for chunk in _stream(payload):
+            consumed.append(chunk.choices[0].delta.content)
+            yield chunk
+
+    tokens = []
+    callback = SimpleNamespace(
+        on_llm_new_token=lambda token, **kw: tokens.append((token, kw['phase']))
+    )
+    monkeypatch.setattr('litellm.completion', fake_completion)
+    processor = BaseProcessor(
+        name='language_processor', stream=True, callbacks=[callback]
+    )
+
+    output = processor.ask_executor(
+        messages=[{'role': 'user', 'content': 'q'}], phase='link_form'
+    )
+
+    assert output['response'] == 'yes'
+    assert output['relevance'] == 0.9
+    assert len(''.join(consumed)) < len(payload)
+    assert ''.join(t for t, _ in tokens) == ''.join(consumed)
+    assert {phase for _, phase in tokens} == {'link_form'}
+    assert processor._usage_stats['completion_tokens'] > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
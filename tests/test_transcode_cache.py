@@ -0,0 +1,144 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from ctm_ai.processors.processor_audio import AudioProcessor
+from ctm_ai.utils import (
+    TranscodeCache,
+    TranscodeError,
+    configure_media_cache,
+    configure_transcode_cache,
+    transcoded,
+)
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / 'clip.wav'
+    path.write_bytes(b'\x01' * 1000)
+    return str(path)
+
+
+def _fake_transcoder(calls, delay=0.0):
+    def run(source, output):
+        calls.append(source)
+        time.sleep(delay)
+        with open(source, 'rb') as src, open(output, 'wb') as out:
+            out.write(b'video:' + src.read())
+        return True
+
+    return run
+
+
+def test_transcodes_once_per_content_and_recipe(tmp_path, audio) -> None:
+    cache = TranscodeCache(str(tmp_path / 'cache'))
+    calls = []
+    run = _fake_transcoder(calls)
+
+    first = cache.transcode(audio, 'black_v1', run)
+    copy = str(tmp_path / 'renamed.wav')
+    shutil.copy(audio, copy)
+    assert cache.transcode(copy, 'black_v1', run) == first  # same bytes
+    assert cache.transcode(audio, 'black_v2', run) != first
+    assert len(calls) == 2
+    with open(first, 'rb') as f:
+        assert f.read().startswith(b'video:')
+
+    # A fresh cache over the same directory (a new process) reuses outputs.
+    again = TranscodeCache(str(tmp_path / 'cache'))
+    assert again.transcode(audio, 'black_v1', run) == first
+    assert len(calls) == 2 and again.stats()['hits'] == 1
+
+
+def test_concurrent_requests_transcode_once(tmp_path, audio) -> None:
+    cache = TranscodeCache(str(tmp_path / 'cache'))
+    calls = []
+    run = _fake_transcoder(calls, delay=0.05)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.transcode(audio, 'black_v1', run))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and len(results) == 8
+    assert len(calls) == 1
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path) -> None:
+    cache = TranscodeCache(str(tmp_path / 'cache'), max_mb=2500 / 1024 / 1024)
+    run = _fake_transcoder([])
+    outputs = []
+    for i in range(3):
+        source = tmp_path / f'{i}.wav'
+        source.write_bytes(bytes([i]) * 1000)
+        outputs.append(cache.transcode(str(source), 'black_v1', run))
+        os.utime(outputs[-1], (i, i))  # deterministic LRU order
+    assert [os.path.exists(path) for path in outputs] == [False, True, True]
+    assert cache.stats()['files'] == 2
+
+
+def test_outputs_in_use_are_not_evicted(tmp_path) -> None:
+    cache = TranscodeCache(str(tmp_path / 'cache'), max_mb=1500 / 1024 / 1024)
+    run = _fake_transcoder([])
+    sources = []
+    for i in range(3):
+        sources.append(tmp_path / f'{i}.wav')
+        sources[-1].write_bytes(bytes([i]) * 1000)
+
+    with cache.use(str(sources[0]), 'black_v1', run) as output:
+        os.utime(output, (0, 0))  # least recently used
+        cache.transcode(str(sources[1]), 'black_v1', run)
+        cache.transcode(str(sources[2]), 'black_v1', run)
+        with open(output, 'rb') as f:
+            assert f.read()
+    cache.transcode(str(sources[1]), 'black_v1', run)
+    assert not os.path.exists(output)  # evicted once released
+
+
+def test_failed_transcode_leaves_nothing_behind(tmp_path, audio) -> None:
+    cache_dir = tmp_path / 'cache'
+    configure_transcode_cache({'cache_dir': str(cache_dir)})
+    try:
+        with pytest.raises(TranscodeError):
+            with transcoded(audio, 'black_v1', lambda source, output: False):
+                pass
+        assert os.listdir(cache_dir) == []
+    finally:
+        configure_transcode_cache(None)
+
+
+def test_qwen_audio_processor_reads_cached_transcode(
+    monkeypatch, tmp_path, audio
+) -> None:
+    monkeypatch.setenv('DASHSCOPE_API_KEY', 'test-key')
+    calls = []
+    monkeypatch.setattr(
+        AudioProcessor,
+        '_make_black_video_with_audio',
+        staticmethod(_fake_transcoder(calls)),
+    )
+    configure_transcode_cache({'cache_dir': str(tmp_path / 'cache')})
+    configure_media_cache({'scope': 'forward'})
+    try:
+        processor = AudioProcessor(
+            name='audio_processor', model='qwen/qwen3-omni-flash'
+        )
+        first = processor._build_qwen_audio_content(audio)
+        configure_media_cache(None)  # a new forward pass with an empty cache
+        assert processor._build_qwen_audio_content(audio) == first
+        assert len(calls) == 1
+    finally:
+        configure_transcode_cache(None)
+        configure_media_cache(None)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])